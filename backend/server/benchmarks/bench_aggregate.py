@@ -0,0 +1,74 @@
+"""Latency of /aggregate/ queries against an in-memory column store.
+
+Usage (from backend/server):
+
+    python benchmarks/bench_aggregate.py --rows 5000000
+
+Builds a synthetic ColumnStore (the loading cost is paid once per dataset
+and then cached) and times typical dashboard queries against it.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.configure(
+    INSTALLED_APPS=['equipment_chem'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+)
+django.setup()
+
+from equipment_chem.analytics import ColumnStore, aggregate, parse_query  # noqa: E402
+
+TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+QUERIES = [
+    'metrics=mean',
+    'group_by=type&metrics=count,mean,min,max',
+    'group_by=type&metrics=mean,std',
+    'group_by=type&metrics=p50,p95,p99',
+    'group_by=type&flowrate__gte=100&pressure__lt=7&metrics=mean,max',
+    'type=Pump,Valve&fields=temperature&metrics=mean,p95',
+]
+
+
+def main():
+    from django.http import QueryDict
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    store = ColumnStore(
+        rng.choice(TYPES, args.rows),
+        {
+            'flowrate': rng.normal(120, 25, args.rows),
+            'pressure': rng.normal(6, 1.5, args.rows),
+            'temperature': rng.normal(115, 12, args.rows),
+        },
+    )
+    print(f'built store of {args.rows} rows in {time.perf_counter() - start:.2f}s\n')
+
+    print(f"{'query':<66} {'best ms':>9}")
+    for query in QUERIES:
+        kwargs = parse_query(QueryDict(query))
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            aggregate(store, **kwargs)
+            best = min(best, time.perf_counter() - start)
+        print(f'{query:<66} {best * 1000:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
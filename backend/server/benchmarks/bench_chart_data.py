@@ -0,0 +1,77 @@
+"""Chart-data latency and payload size as datasets grow.
+
+Usage (from backend/server):
+
+    python benchmarks/bench_chart_data.py --rows 100000 1000000 5000000
+
+Times /chart-data/ payload construction on a synthetic ColumnStore (cold,
+then cached) and reports JSON and .npz sizes for the desktop and web
+requests, which should stay flat as the row count grows.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure(
+        INSTALLED_APPS=['equipment_chem'],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    )
+    django.setup()
+
+from django.http import QueryDict  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from equipment_chem import charts  # noqa: E402
+from equipment_chem.analytics import ColumnStore  # noqa: E402
+from equipment_chem.renderers import NpzRenderer  # noqa: E402
+
+TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+QUERIES = {
+    'desktop (npz)': ('charts=scatter,hist2d,correlation,temperature', NpzRenderer()),
+    'web (json)': ('charts=density,temperature&bins=40&points=400', JSONRenderer()),
+    'minmax 2000 (json)': ('charts=temperature&series=minmax&points=2000', JSONRenderer()),
+}
+
+
+def build_store(rows):
+    rng = np.random.default_rng(0)
+    flow = rng.normal(120, 25, rows)
+    temperature = 115 + np.cumsum(rng.normal(0, 0.1, rows))
+    temperature[::1000] = np.nan
+    return ColumnStore(
+        rng.choice(TYPES, rows),
+        {'flowrate': flow, 'pressure': 0.02 * flow + rng.normal(4, 1, rows), 'temperature': temperature},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'request':<20} {'cold ms':>9} {'warm ms':>9} {'bytes':>9}")
+    for rows in args.rows:
+        store = build_store(rows)
+        for label, (query, renderer) in QUERIES.items():
+            kwargs = charts.parse_query(QueryDict(query))
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                data = charts.chart_data(store, 1, **kwargs)
+                body = renderer.render(data)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f'{rows:>10}  {label:<20} {timings[0]:>9.1f} {timings[1]:>9.1f} {len(body):>9}')
+
+
+if __name__ == '__main__':
+    main()
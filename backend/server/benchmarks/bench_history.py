@@ -0,0 +1,161 @@
+"""History endpoint latency with many stored datasets.
+
+Usage (from backend/server):
+
+    python benchmarks/bench_history.py --datasets 10000 1000000
+
+Seeds a throwaway SQLite database with N datasets per size and times the
+history query and full (uncached) response with and without the
+``uploaded_at`` index, plus a cached 304 revalidation.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+WORKDIR = tempfile.mkdtemp(prefix='bench_history_')
+
+if not settings.configured:
+    settings.configure(
+        INSTALLED_APPS=[
+            'django.contrib.contenttypes',
+            'django.contrib.auth',
+            'rest_framework',
+            'equipment_chem',
+        ],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(WORKDIR, 'db.sqlite3')}},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        REST_FRAMEWORK={'DEFAULT_PERMISSION_CLASSES': []},
+        DATASET_RETENTION={'SWEEP_INTERVAL': None},
+        USE_TZ=True,
+    )
+    django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from equipment_chem import history  # noqa: E402
+from equipment_chem.models import Dataset  # noqa: E402
+from equipment_chem.serializers import DatasetSerializer  # noqa: E402
+from equipment_chem.views import DatasetHistoryView  # noqa: E402
+
+TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+BATCH = 20_000
+
+
+def seed(total):
+    """Top the table up to ``total`` rows with shuffled upload times."""
+    have = Dataset.objects.count()
+    rng = random.Random(have)
+    while have < total:
+        n = min(BATCH, total - have)
+        datasets = []
+        for _ in range(n):
+            distribution = {t: rng.randint(0, 50) for t in TYPES}
+            datasets.append(Dataset(
+                filename=f'plant_{have}.csv',
+                total_equipment=sum(distribution.values()),
+                avg_flowrate=rng.uniform(50, 200),
+                avg_pressure=rng.uniform(2, 10),
+                avg_temperature=rng.uniform(80, 150),
+                equipment_type_distribution=distribution,
+            ))
+            have += 1
+        Dataset.objects.bulk_create(datasets)
+    # auto_now_add stamps every row with "now"; spread them over a year so
+    # the ORDER BY has real work to do.
+    table = connection.ops.quote_name(Dataset._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET uploaded_at = datetime(%s, '-' || (abs(random()) %% 31536000) || ' seconds')",
+            [timezone.now().strftime('%Y-%m-%d %H:%M:%S')],
+        )
+
+
+def uploaded_at_index():
+    constraints = connection.introspection.get_constraints(connection.cursor(), Dataset._meta.db_table)
+    for name, info in constraints.items():
+        if info['index'] and info['columns'] == ['uploaded_at']:
+            return name
+    return None
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def legacy_build():
+    datasets = Dataset.objects.filter(is_complete=True).order_by('-uploaded_at')[:history.HISTORY_LIMIT]
+    return DatasetSerializer(datasets, many=True).data
+
+
+def run(total, repeat):
+    seed(total)
+    factory = APIRequestFactory()
+    view = DatasetHistoryView.as_view()
+
+    def uncached(include=''):
+        def call():
+            history.invalidate()
+            view(factory.get('/api/history/', {'include': include} if include else {}))
+        return call
+
+    etag = view(factory.get('/api/history/'))['ETag']
+
+    def revalidate():
+        assert view(factory.get('/api/history/', HTTP_IF_NONE_MATCH=etag)).status_code == 304
+
+    rows = [
+        ('uncached, compact', uncached()),
+        ('uncached, include=distribution', uncached('distribution')),
+        ('uncached, serializer __all__', legacy_build),
+        ('cached 304', revalidate),
+    ]
+
+    index = uploaded_at_index()
+    print(f'{total:>9} datasets')
+    for label, fn in rows:
+        print(f'  {label:<32} {best_of(fn, repeat):8.2f} ms  (indexed)')
+
+    if index:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(index)}')
+        for label, fn in rows[:3]:
+            print(f'  {label:<32} {best_of(fn, repeat):8.2f} ms  (no index)')
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE INDEX {} ON {} ({})'.format(
+                connection.ops.quote_name(index),
+                connection.ops.quote_name(Dataset._meta.db_table),
+                connection.ops.quote_name('uploaded_at'),
+            ))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--datasets', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    for total in sorted(args.datasets):
+        run(total, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Peak RSS and throughput of the chunked CSV ingestion.
+
+Usage (from backend/server):
+
+    python benchmarks/bench_ingest.py                 # 10k, 1M and 10M rows
+    python benchmarks/bench_ingest.py --rows 10000 1000000 --chunksize 50000
+    python benchmarks/bench_ingest.py --engine c
+
+Each size runs in its own subprocess so the reported peak RSS belongs to
+that run alone. Generated files are kept in the work directory and reused.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure()
+
+TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+
+def generate_csv(path, rows, block=1_000_000):
+    rng = np.random.default_rng(0)
+    with open(path, 'w', newline='') as fh:
+        fh.write('Equipment Name,Type,Flowrate,Pressure,Temperature\n')
+        for start in range(0, rows, block):
+            n = min(block, rows - start)
+            types = rng.choice(TYPES, n)
+            frame = pd.DataFrame({
+                'Equipment Name': [f'{t}-{i}' for t, i in zip(types, range(start, start + n))],
+                'Type': types,
+                'Flowrate': rng.normal(120, 25, n).round(1),
+                'Pressure': rng.normal(6, 1.5, n).round(2),
+                'Temperature': rng.normal(115, 12, n).round(1),
+            })
+            frame.to_csv(fh, header=False, index=False)
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_one(path, chunksize, engine):
+    from equipment_chem.ingest import summarize_csv
+
+    start = time.perf_counter()
+    with open(path, 'rb') as fh:
+        summary = summarize_csv(fh, chunksize=chunksize, engine=engine)
+    elapsed = time.perf_counter() - start
+    rows = summary['total_equipment']
+    print(f'{rows},{elapsed:.3f},{rows / elapsed:.0f},{peak_rss_mb():.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--engine', default='auto', choices=['auto', 'c', 'pyarrow'])
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'chemviz-bench'))
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.run_one, args.chunksize, args.engine)
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    print(f"{'rows':>12} {'size MB':>9} {'seconds':>9} {'rows/sec':>12} {'peak RSS MB':>12}")
+    for rows in args.rows:
+        path = os.path.join(args.workdir, f'equipment_{rows}.csv')
+        if not os.path.exists(path):
+            generate_csv(path, rows)
+        out = subprocess.run(
+            [sys.executable, __file__, '--run-one', path, '--chunksize', str(args.chunksize), '--engine', args.engine],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip().splitlines()[-1]
+        _, seconds, rate, rss = out.split(',')
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f'{rows:>12} {size_mb:>9.1f} {float(seconds):>9.2f} {int(rate):>12} {float(rss):>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Compare CSV parsing engines on uploaded equipment exports.
+
+Usage (from backend/server):
+
+    python benchmarks/bench_parsers.py                       # media/uploads/*.csv
+    python benchmarks/bench_parsers.py big.csv --repeat 3
+
+Variants:
+    default   pd.read_csv with every column and inferred dtypes (the old path)
+    c         schema parser, pruned columns, pinned dtypes, pandas C engine
+    pyarrow   schema parser on pyarrow's CSV reader (skipped if not installed)
+
+Memory is the deep size of the parsed frames, which is what a worker holds
+for a single chunk.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure()
+
+from equipment_chem.parsing import SUMMARY_COLUMNS, pyarrow_available, read_csv_chunks  # noqa: E402
+
+CHUNKSIZE = 10_000_000
+
+
+def parse_default(path):
+    with open(path, 'rb') as fh:
+        return [pd.read_csv(fh)]
+
+
+def parse_schema(engine):
+    def parse(path):
+        with open(path, 'rb') as fh:
+            return list(read_csv_chunks(fh, CHUNKSIZE, columns=SUMMARY_COLUMNS, engine=engine))
+    return parse
+
+
+def measure(parse, path, repeat):
+    best = float('inf')
+    frames = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = parse(path)
+        best = min(best, time.perf_counter() - start)
+    memory = sum(int(frame.memory_usage(deep=True).sum()) for frame in frames)
+    return best, memory
+
+
+def main():
+    default_glob = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'media', 'uploads', '*.csv')
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(default_glob))
+    variants = [('default', parse_default), ('c', parse_schema('c'))]
+    if pyarrow_available():
+        variants.append(('pyarrow', parse_schema('pyarrow')))
+    else:
+        print('pyarrow not installed; skipping the pyarrow engine\n')
+
+    print(f"{'file':<40} {'engine':<8} {'ms':>10} {'speedup':>8} {'frame KB':>10}")
+    for path in paths:
+        baseline = None
+        for name, parse in variants:
+            seconds, memory = measure(parse, path, args.repeat)
+            baseline = baseline or seconds
+            print(f'{os.path.basename(path)[:40]:<40} {name:<8} {seconds * 1000:>10.2f} '
+                  f'{baseline / seconds:>7.1f}x {memory / 1024:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Re-open time of a stored dataset: CSV re-parse vs. Parquet sidecar.
+
+Usage (from backend/server):
+
+    python benchmarks/bench_sidecar.py --rows 20000000     # roughly a 1 GB CSV
+
+The sidecar is written the same way ingestion writes it (one row group per
+chunk); reads memory-map it and pull only the columns a caller asks for.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+
+WORKDIR = os.path.join(tempfile.gettempdir(), 'chemviz-bench')
+settings.configure(MEDIA_ROOT=WORKDIR)
+
+from bench_ingest import generate_csv  # noqa: E402
+from equipment_chem import sidecar  # noqa: E402
+from equipment_chem.parsing import RECORD_COLUMNS, read_csv_chunks  # noqa: E402
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f'{label:<44} {time.perf_counter() - start:>8.3f}s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000_000)
+    args = parser.parse_args()
+
+    os.makedirs(WORKDIR, exist_ok=True)
+    name = f'equipment_{args.rows}.csv'
+    path = os.path.join(WORKDIR, name)
+    if not os.path.exists(path):
+        generate_csv(path, args.rows)
+
+    parquet = os.path.join(WORKDIR, sidecar.sidecar_name(name))
+    if not os.path.exists(parquet):
+        writer = sidecar.SidecarWriter(name)
+        with open(path, 'rb') as fh:
+            for chunk in read_csv_chunks(fh, 1_000_000, columns=RECORD_COLUMNS):
+                writer(chunk)
+        writer.close()
+
+    print(f'CSV {os.path.getsize(path) / 2**20:.0f} MB, '
+          f'sidecar {os.path.getsize(parquet) / 2**20:.0f} MB, {args.rows} rows\n')
+    timed('pd.read_csv (all columns)', lambda: pd.read_csv(path))
+    timed('sidecar, all columns -> pandas', lambda: sidecar.read_table(name).to_pandas())
+    numeric = ['Flowrate', 'Pressure', 'Temperature']
+    timed('sidecar, numeric columns -> numpy', lambda: [
+        column.to_numpy() for column in sidecar.read_table(name, numeric).columns
+    ])
+    timed('sidecar, Type only (dictionary)', lambda: sidecar.read_table(name, ['Type']).to_pandas())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+"""Vectorized filtering and aggregation over a columnar copy of a dataset."""
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection
+
+from . import sidecar
+from .models import EquipmentRecord
+
+# API field name -> EquipmentRecord column
+METRIC_FIELDS = {
+    'flowrate': 'flowrate',
+    'pressure': 'pressure',
+    'temperature': 'temperature',
+}
+
+FILTER_OPS = {
+    'gte': np.greater_equal,
+    'gt': np.greater,
+    'lte': np.less_equal,
+    'lt': np.less,
+}
+
+BASIC_METRICS = ('count', 'mean', 'min', 'max', 'std')
+PERCENTILE_RE = re.compile(r'^p(\d{1,2}(?:\.\d+)?|100)$')
+DEFAULT_METRICS = ['count', 'mean', 'min', 'max']
+
+# API field name -> CSV / sidecar column
+CSV_COLUMNS = {'flowrate': 'Flowrate', 'pressure': 'Pressure', 'temperature': 'Temperature'}
+
+FETCH_BATCH = 50_000
+
+
+class ColumnStore:
+    """NumPy columns of one dataset with rows sorted by equipment type.
+
+    Sorting once at load time keeps each type contiguous, so any row mask
+    still leaves groups as contiguous runs and per-group reductions become
+    ``reduceat`` calls instead of Python loops.
+    """
+
+    def __init__(self, types, columns):
+        types = pd.Series(types)
+        if isinstance(types.dtype, pd.CategoricalDtype):
+            if '' not in types.cat.categories:
+                types = types.cat.add_categories([''])
+            # Same (lexical) group order whichever source the store came from.
+            types = types.cat.reorder_categories(sorted(types.cat.categories))
+        else:
+            types = types.astype(object)
+        codes, self.type_names = pd.factorize(types.fillna(''), sort=True)
+        order = np.argsort(codes, kind='stable')
+        self.codes = codes[order].astype(np.int32)
+        self.row_index = order
+        self.columns = {name: np.asarray(values, dtype=np.float64)[order] for name, values in columns.items()}
+        self.has_nan = {name: bool(np.isnan(values).any()) for name, values in self.columns.items()}
+
+        groups = np.arange(len(self.type_names))
+        self.starts = np.searchsorted(self.codes, groups, side='left')
+        self.ends = np.searchsorted(self.codes, groups, side='right')
+        self._sorted = {}
+        self._row_ordered = {}
+        # Other per-dataset results computed from these columns (see charts.py).
+        self.derived = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def sorted_values(self, name, grouped):
+        """``(values, perm)`` sorted per type group (or overall), NaNs last.
+
+        Built on first use and kept, so percentiles over the whole dataset
+        are index lookups and filtered ones a single gather.
+        """
+        key = (name, grouped)
+        if key not in self._sorted:
+            values = self.columns[name]
+            perm = np.lexsort((values, self.codes)) if grouped else np.argsort(values, kind='stable')
+            self._sorted[key] = (values[perm], perm)
+        return self._sorted[key]
+
+    def row_ordered(self, name):
+        """Column ``name`` in the dataset's original row order (built on first use)."""
+        if name not in self._row_ordered:
+            values = np.empty_like(self.columns[name])
+            values[self.row_index] = self.columns[name]
+            self._row_ordered[name] = values
+        return self._row_ordered[name]
+
+
+def _load_from_sidecar(file_paths):
+    tables = [sidecar.read_table(path, ['Type', *CSV_COLUMNS.values()]) for path in file_paths]
+    if len(tables) == 1:
+        table = tables[0]
+    else:
+        import pyarrow as pa
+
+        # Appended parts may have encoded Type with different dictionaries.
+        table = pa.concat_tables(tables).unify_dictionaries()
+    return ColumnStore(
+        table.column('Type').to_pandas(),
+        # Null cells come back as NaN.
+        {name: table.column(col).to_numpy() for name, col in CSV_COLUMNS.items()},
+    )
+
+
+def _load_from_records(dataset_id):
+    table = connection.ops.quote_name(EquipmentRecord._meta.db_table)
+    fields = ['type', *METRIC_FIELDS.values()]
+    sql = 'SELECT {} FROM {} WHERE dataset_id = %s ORDER BY id'.format(
+        ', '.join(connection.ops.quote_name(f) for f in fields), table,
+    )
+    types, values = [], []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [dataset_id])
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH)
+            if not rows:
+                break
+            types.extend(row[0] for row in rows)
+            values.extend(row[1:] for row in rows)
+
+    # None (missing cell) becomes NaN in a float array.
+    matrix = np.array(values, dtype=np.float64).reshape(-1, len(METRIC_FIELDS))
+    return ColumnStore(types, {name: matrix[:, i] for i, name in enumerate(METRIC_FIELDS)})
+
+
+class _StoreCache:
+    """Small process-local LRU of ColumnStores keyed by dataset id."""
+
+    def __init__(self):
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset):
+        with self._lock:
+            # Signals only drop entries in the process that saved the
+            # dataset; an append made elsewhere shows as a new content hash.
+            content_hash, store = self._stores.get(dataset.pk, (None, None))
+            if store is not None and content_hash == dataset.content_hash:
+                self._stores.move_to_end(dataset.pk)
+                return store
+
+        # A dataset's rows are its upload's followed by any appended parts.
+        paths = [dataset.file_path, *dataset.parts.values_list('file_path', flat=True)]
+        if all(sidecar.sidecar_exists(path) for path in paths):
+            store = _load_from_sidecar(paths)
+        else:
+            store = _load_from_records(dataset.rows_id)
+        with self._lock:
+            self._stores[dataset.pk] = dataset.content_hash, store
+            while len(self._stores) > getattr(settings, 'COLUMN_CACHE_MAX_DATASETS', 8):
+                self._stores.popitem(last=False)
+        return store
+
+    def invalidate(self, dataset_id):
+        with self._lock:
+            self._stores.pop(dataset_id, None)
+
+
+column_cache = _StoreCache()
+
+
+def _parse_metric(name):
+    name = name.strip().lower()
+    if name == 'median':
+        name = 'p50'
+    if name in BASIC_METRICS:
+        return name
+    match = PERCENTILE_RE.match(name)
+    if match:
+        return name
+    raise ValueError(f"Unknown metric '{name}'")
+
+
+def parse_filters(params):
+    """``(field, op, value)`` triples from params such as ``pressure__gte=5``."""
+    filters = []
+    for key, raw in params.items():
+        field, _, op = key.lower().partition('__')
+        if field in METRIC_FIELDS and op in FILTER_OPS:
+            try:
+                filters.append((field, op, float(raw)))
+            except ValueError:
+                raise ValueError(f"'{key}' must be a number")
+    return filters
+
+
+def parse_types(params):
+    """Equipment types from a comma-separated ``type`` param, or None."""
+    types = params.get('type')
+    return [t.strip() for t in types.split(',')] if types else None
+
+
+def parse_query(params):
+    """Turn request query params into keyword arguments for ``aggregate``."""
+    fields = params.get('fields')
+    fields = [f.strip().lower() for f in fields.split(',')] if fields else list(METRIC_FIELDS)
+    for field in fields:
+        if field not in METRIC_FIELDS:
+            raise ValueError(f"Unknown field '{field}'")
+
+    metrics = params.get('metrics')
+    metrics = [_parse_metric(m) for m in metrics.split(',')] if metrics else DEFAULT_METRICS
+
+    filters = parse_filters(params)
+    types = parse_types(params)
+    group_by = (params.get('group_by') or '').lower()
+    if group_by not in ('', 'type'):
+        raise ValueError("group_by only supports 'type'")
+
+    return {
+        'fields': fields,
+        'metrics': metrics,
+        'filters': filters,
+        'types': types,
+        'group_by_type': group_by == 'type',
+    }
+
+
+def _clean(metric, value):
+    if metric == 'count':
+        return int(value)
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _interpolate(sorted_values, n, qs):
+    """Linear-interpolated percentiles of the first ``n`` sorted values."""
+    pos = np.asarray(qs) / 100.0 * (n - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _field_metrics(store, field, mask, rows, starts, ends, metrics, grouped):
+    values = store.columns[field]
+    if rows is not None:
+        values = values.take(rows)
+    n_groups = len(starts)
+    lengths = ends - starts
+    nonempty = lengths > 0
+    idx = starts[nonempty]
+
+    def per_group(reduced, fill=0.0):
+        out = np.full(n_groups, fill, dtype=np.float64)
+        out[nonempty] = reduced
+        return out
+
+    if store.has_nan[field]:
+        valid = ~np.isnan(values)
+        counts = per_group(np.add.reduceat(valid, idx, dtype=np.int64) if len(idx) else [])
+        filled = np.where(valid, values, 0.0)
+    else:
+        valid = None
+        counts = lengths.astype(np.float64)
+        filled = values
+
+    out = {'count': counts}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = per_group(np.add.reduceat(filled, idx) if len(idx) else []) / counts
+        out['mean'] = means
+        if 'std' in metrics:
+            # Squared deviations from each group's mean as one BLAS dot
+            # product per group; centring first avoids the cancellation of
+            # sum(x**2) - n * mean**2 when the spread is small next to the mean.
+            m2 = np.zeros(n_groups)
+            for g, (a, b) in enumerate(zip(starts, ends)):
+                if counts[g] < 2:
+                    continue
+                deviations = filled[a:b] - means[g]
+                if valid is not None:
+                    deviations[~valid[a:b]] = 0.0
+                m2[g] = np.dot(deviations, deviations)
+            out['std'] = np.where(counts > 1, np.sqrt(m2 / np.maximum(counts - 1, 1)), np.nan)  # sample std, as pandas
+
+    if 'min' in metrics or 'max' in metrics:
+        # fmin/fmax ignore NaN unless a whole group is NaN.
+        out['min'] = per_group(np.fmin.reduceat(values, idx) if len(idx) else [], np.nan)
+        out['max'] = per_group(np.fmax.reduceat(values, idx) if len(idx) else [], np.nan)
+
+    percentiles = [m for m in metrics if m.startswith('p')]
+    if percentiles:
+        sorted_values, perm = store.sorted_values(field, grouped)
+        if mask is not None:
+            # Gathering the mask through the sort permutation keeps the
+            # surviving values sorted, so no re-sort is needed.
+            sorted_values = sorted_values[mask[perm]]
+        qs = [float(m[1:]) for m in percentiles]
+        table = np.full((n_groups, len(qs)), np.nan)
+        for g in np.flatnonzero(counts):
+            table[g] = _interpolate(sorted_values[starts[g]:], int(counts[g]), qs)
+        for i, m in enumerate(percentiles):
+            out[m] = table[:, i]
+
+    return {m: out[m] for m in metrics}
+
+
+def aggregate(store, fields, metrics, filters=(), types=None, group_by_type=False):
+    mask = None
+    for field, op, value in filters:
+        # NaN never satisfies a comparison, so filtered fields drop missing cells.
+        hit = FILTER_OPS[op](store.columns[field], value)
+        mask = hit if mask is None else mask & hit
+    if types is not None:
+        # Types are contiguous runs, so this is a few slice assignments.
+        type_mask = np.zeros(len(store), dtype=bool)
+        for g in np.flatnonzero(np.isin(store.type_names, types)):
+            type_mask[store.starts[g]:store.ends[g]] = True
+        mask = type_mask if mask is None else mask & type_mask
+
+    if mask is None:
+        rows = None
+        rows_matched = len(store)
+        lengths = store.ends - store.starts
+    else:
+        # Matching row numbers, ascending; one take() per field is cheaper
+        # than boolean-indexing every column.
+        rows = np.flatnonzero(mask)
+        rows_matched = len(rows)
+        lengths = np.searchsorted(rows, store.ends) - np.searchsorted(rows, store.starts)
+
+    if group_by_type:
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+    else:
+        starts = np.array([0])
+        ends = np.array([rows_matched])
+
+    per_field = {
+        field: _field_metrics(store, field, mask, rows, starts, ends, metrics, group_by_type)
+        for field in fields
+    }
+
+    results = []
+    for g in range(len(starts)):
+        if group_by_type and ends[g] == starts[g]:
+            continue
+        row = {'type': str(store.type_names[g])} if group_by_type else {}
+        row['rows'] = int(ends[g] - starts[g])
+        for field in fields:
+            row[field] = {m: _clean(m, v[g]) for m, v in per_field[field].items()}
+        results.append(row)
+
+    return {'rows_matched': rows_matched, 'results': results}
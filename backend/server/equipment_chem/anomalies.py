@@ -0,0 +1,271 @@
+"""Anomaly detection over a dataset's readings, run as part of ingestion.
+
+While a file is summarized, ``TypeStats`` keeps per-``Type`` statistics
+(see ``stats.py``) and KLL sketches of each numeric column. Once every row
+has been counted they give each type an operating envelope: z-score bounds
+from its mean and standard deviation, and Tukey fences from its quartiles.
+A second pass over the stored rows (the Parquet sidecar when there is one)
+then checks every reading of a chunk at once against its type's envelope
+and the configured threshold rules, with no per-row Python.
+
+Rules come from ``settings.ANOMALY_DETECTION``. Flagged readings are saved
+as ``EquipmentAnomaly`` rows, at most ``MAX_STORED`` per dataset (the
+furthest from their type's mean); ``Dataset.anomaly_count`` counts every
+row with at least one flagged reading. Flags reflect the rules in force
+when the rows were ingested.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from . import stats
+from .models import EquipmentAnomaly
+from .sketches import KLLSketch
+
+DEFAULT_RULES = {
+    'Z_SCORE': 4.0,       # |value - type mean| / type std above this
+    'IQR_FACTOR': 3.0,    # outside [Q1 - f * IQR, Q3 + f * IQR] of the type
+    'MIN_ROWS': 30,       # types with fewer readings get no statistical envelope
+    # {type or '*': {field: [low, high]}}, None for an open end, e.g.
+    # {'Pump': {'pressure': [None, 12.0]}, '*': {'temperature': [-20, 400]}}
+    'THRESHOLDS': {},
+    'MAX_STORED': 10_000,
+}
+
+# Bit per rule in a flag mask, and its name in EquipmentAnomaly.rules.
+RULES = {1: 'zscore', 2: 'iqr', 4: 'threshold'}
+
+# Type sketches only need quartiles, so they keep fewer values.
+TYPE_SKETCH_K = 100
+
+
+def get_rules():
+    return {**DEFAULT_RULES, **getattr(settings, 'ANOMALY_DETECTION', {})}
+
+
+def _type_codes(chunk):
+    """``(codes, names)``: each row's type as an index into ``names``."""
+    if 'Type' not in chunk.columns:
+        return np.zeros(len(chunk), dtype=np.intp), ['']
+    types = chunk['Type']
+    if not isinstance(types.dtype, pd.CategoricalDtype):
+        types = types.astype('category')
+    codes = types.cat.codes.to_numpy().astype(np.intp)
+    names = list(types.cat.categories)
+    if (codes < 0).any():
+        # Missing types group under ''.
+        codes[codes < 0] = len(names)
+        names.append('')
+    return codes, names
+
+
+class TypeStats:
+    """Per-type column statistics and quartile sketches, mergeable like ``stats``."""
+
+    def __init__(self, types=None):
+        # type -> field -> {'stats': stats state, 'sketch': KLLSketch}
+        self.types = types or {}
+
+    def _entry(self, name, field):
+        fields = self.types.setdefault(name, {})
+        if field not in fields:
+            fields[field] = {'stats': dict(stats.EMPTY), 'sketch': KLLSketch(k=TYPE_SKETCH_K)}
+        return fields[field]
+
+    def update(self, chunk, column_fields):
+        codes, names = _type_codes(chunk)
+        # Group rows by type once; every column is then sliced per group.
+        # Narrow codes let the stable sort run as a radix sort.
+        order = np.argsort(codes.astype(np.min_scalar_type(len(names))), kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        for column, field in column_fields.items():
+            values = chunk[column].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+            for i, name in enumerate(names):
+                if bounds[i] == bounds[i + 1]:
+                    continue
+                group = values[bounds[i]:bounds[i + 1]]
+                entry = self._entry(name, field)
+                entry['stats'] = stats.merge(entry['stats'], stats.describe(group))
+                entry['sketch'].update(group)
+
+    def merge(self, other):
+        for name, fields in other.types.items():
+            for field, theirs in fields.items():
+                entry = self._entry(name, field)
+                entry['stats'] = stats.merge(entry['stats'], theirs['stats'])
+                entry['sketch'].merge(theirs['sketch'])
+        return self
+
+    def envelopes(self, rules):
+        """``{type: {field: bounds}}`` for the statistical rules."""
+        result = {}
+        for name, fields in self.types.items():
+            for field, entry in fields.items():
+                state = entry['stats']
+                envelope = {'count': state['count'], 'mean': state['mean']}
+                std = stats.variance(state)
+                if state['count'] >= rules['MIN_ROWS'] and std is not None:
+                    std = math.sqrt(std)
+                    q1, q3 = entry['sketch'].quantiles([0.25, 0.75])
+                    iqr = q3 - q1
+                    envelope.update({
+                        'std': std, 'q1': q1, 'q3': q3,
+                        'z_low': state['mean'] - rules['Z_SCORE'] * std,
+                        'z_high': state['mean'] + rules['Z_SCORE'] * std,
+                        'iqr_low': q1 - rules['IQR_FACTOR'] * iqr,
+                        'iqr_high': q3 + rules['IQR_FACTOR'] * iqr,
+                    })
+                result.setdefault(name, {})[field] = envelope
+        return result
+
+    def to_dict(self):
+        return {
+            name: {
+                field: {'stats': entry['stats'], 'sketch': entry['sketch'].to_dict()}
+                for field, entry in fields.items()
+            }
+            for name, fields in self.types.items()
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls({
+            name: {
+                field: {'stats': dict(entry['stats']), 'sketch': KLLSketch.from_dict(entry['sketch'])}
+                for field, entry in fields.items()
+            }
+            for name, fields in (state or {}).items()
+        })
+
+
+class Detector:
+    """Flags readings chunk by chunk against fixed per-type bounds."""
+
+    def __init__(self, type_stats, column_fields, rules=None):
+        self.rules = rules or get_rules()
+        self.column_fields = column_fields
+        envelopes = type_stats.envelopes(self.rules)
+        thresholds = self.rules['THRESHOLDS']
+        # Row i of each table belongs to types[i]; the extra last row (NaN,
+        # no bounds) serves types first seen after the envelopes were built.
+        self.types = list(envelopes)
+        self.tables = {}
+        for field in column_fields.values():
+            table = np.full((len(self.types) + 1, 8), np.nan)
+            for i, name in enumerate(self.types):
+                envelope = envelopes[name].get(field, {})
+                table[i, :6] = [
+                    envelope.get(key, np.nan)
+                    for key in ('mean', 'std', 'z_low', 'z_high', 'iqr_low', 'iqr_high')
+                ]
+                table[i, 6:] = self._threshold(thresholds, name, field)
+            table[-1, 6:] = self._threshold(thresholds, None, field)
+            # A reading breaks some rule iff it falls outside the tightest of
+            # the bounds, so one pair of comparisons screens every row.
+            inner = np.fmax.reduce(table[:, [2, 4, 6]], axis=1), np.fmin.reduce(table[:, [3, 5, 7]], axis=1)
+            self.tables[field] = table, inner
+        self.flagged_rows = 0
+        self.found = []
+
+    @staticmethod
+    def _threshold(thresholds, name, field):
+        bounds = (thresholds.get(name) or {}).get(field) or (thresholds.get('*') or {}).get(field)
+        low, high = bounds or (None, None)
+        return [np.nan if low is None else low, np.nan if high is None else high]
+
+    def __call__(self, chunk, offset):
+        codes, names = _type_codes(chunk)
+        slot = {name: i for i, name in enumerate(self.types)}
+        slots = np.array([slot.get(name, len(self.types)) for name in names], dtype=np.intp)[codes]
+        any_flag = np.zeros(len(chunk), dtype=bool)
+        hits = []
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for column, field in self.column_fields.items():
+                values = chunk[column].to_numpy(dtype=np.float64, na_value=np.nan)
+                table, (inner_low, inner_high) = self.tables[field]
+                # Comparisons with NaN (no bound, no reading) are False.
+                flagged = np.flatnonzero((values < inner_low[slots]) | (values > inner_high[slots]))
+                if not len(flagged):
+                    continue
+                any_flag[flagged] = True
+                values = values[flagged]
+                mean, std, z_low, z_high, iqr_low, iqr_high, low, high = table[slots[flagged]].T
+                mask = ((values < z_low) | (values > z_high)) * 1
+                mask |= ((values < iqr_low) | (values > iqr_high)) * 2
+                mask |= ((values < low) | (values > high)) * 4
+                hits.append((field, flagged, values, (values - mean) / std, mask))
+
+        self.flagged_rows += int(any_flag.sum())
+        if not hits:
+            return
+        names = chunk['Equipment Name'] if 'Equipment Name' in chunk.columns else None
+        types = chunk['Type'] if 'Type' in chunk.columns else None
+        for field, flagged, values, z, mask in hits:
+            self.found.append({
+                'row': flagged + offset,
+                'field': np.full(len(flagged), field, dtype=object),
+                'value': values,
+                'zscore': z,
+                'mask': mask,
+                'name': _strings(names, flagged),
+                'type': _strings(types, flagged),
+            })
+        self._trim(2 * self.rules['MAX_STORED'])
+
+    def _trim(self, limit):
+        columns = _concat(self.found)
+        if columns is None or len(columns['row']) <= limit:
+            return
+        # Keep the readings furthest from their type's mean; flags without a
+        # z-score (thresholds on types with no envelope) rank first.
+        score = np.nan_to_num(np.abs(columns['zscore']), nan=np.inf)
+        keep = np.sort(np.argpartition(-score, limit - 1)[:limit]) if limit else []
+        self.found = [{key: values[keep] for key, values in columns.items()}]
+
+    def result(self):
+        """``(flagged rows, readings to store)``, the latter in row order."""
+        self._trim(self.rules['MAX_STORED'])
+        columns = _concat(self.found)
+        if columns is None:
+            return self.flagged_rows, []
+        order = np.lexsort((columns['field'].astype(str), columns['row']))
+        readings = []
+        for i in order:
+            z = columns['zscore'][i]
+            readings.append({
+                'row': int(columns['row'][i]),
+                'name': columns['name'][i],
+                'type': columns['type'][i],
+                'field': columns['field'][i],
+                'value': float(columns['value'][i]),
+                'zscore': None if not np.isfinite(z) else float(z),
+                'rules': ','.join(rule for bit, rule in RULES.items() if columns['mask'][i] & bit),
+            })
+        return self.flagged_rows, readings
+
+
+def _strings(series, index):
+    if series is None:
+        return np.full(len(index), '', dtype=object)
+    values = series.take(index).to_numpy(dtype=object)
+    return np.where(pd.isna(values), '', values).astype(object)
+
+
+def _concat(found):
+    if not found:
+        return None
+    return {key: np.concatenate([part[key] for part in found]) for key in found[0]}
+
+
+def save(dataset_id, readings):
+    EquipmentAnomaly.objects.bulk_create(
+        [EquipmentAnomaly(dataset_id=dataset_id, **reading) for reading in readings], batch_size=1000,
+    )
+
+
+def copy_anomalies(source_id, target_id):
+    readings = EquipmentAnomaly.objects.filter(dataset=source_id).order_by('pk')
+    save(target_id, readings.values('row', 'name', 'type', 'field', 'value', 'zscore', 'rules'))
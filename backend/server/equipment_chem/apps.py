@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class EquipmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'equipment_chem'
+
+    def ready(self):
+        from . import signals  # noqa: F401
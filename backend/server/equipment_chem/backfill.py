@@ -0,0 +1,240 @@
+"""Bulk ingestion of CSV files already on the server's disk.
+
+``manage.py ingest_csv`` backfills exports through the same pipeline as an
+upload, minus HTTP. The CPU-bound part of each file (hashing, parsing,
+summarizing, writing the Parquet sidecar, finding anomalies) runs in a
+pool of worker processes. Only the calling process writes to the
+database, since SQLite takes one writer at a time anyway. It commits new
+Dataset rows a batch at a time, and copies per-row records out of each
+file's sidecar. A batch that fails to commit is retried a file at a time,
+so one bad file doesn't take the rest of its batch (or the run) with it.
+"""
+import glob
+import gzip
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.files import File
+from django.db import transaction
+
+from . import anomalies, history, retention
+from .ingest import (
+    cached_dataset, find_anomalies, ingest_cached, ingest_file, store_records_enabled, summarize_stored,
+    write_records,
+)
+from .models import Dataset
+from .uploads import COMPRESSION_SUFFIXES, plain_name, store_upload, upload_codec, zstandard
+
+CSV_SUFFIXES = ('.csv', *(f'.csv{suffix}' for suffix in COMPRESSION_SUFFIXES))
+DEFAULT_BATCH_SIZE = 50
+
+
+def find_sources(patterns):
+    """CSV files (also ``.csv.gz``/``.csv.zst``) in directories or matching globs."""
+    sources = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths = (os.path.join(pattern, name) for name in os.listdir(pattern))
+            sources += sorted(p for p in paths if p.lower().endswith(CSV_SUFFIXES) and os.path.isfile(p))
+        else:
+            sources += sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return list(dict.fromkeys(sources))
+
+
+def _open_source(source):
+    """``source`` as a binary file of plain CSV, inflating it if compressed."""
+    codec = upload_codec(source)
+    if codec == 'gzip':
+        return gzip.open(source, 'rb')
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError(f"'{source}' needs the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(open(source, 'rb'), read_across_frames=True, closefd=True)
+    return open(source, 'rb')
+
+
+def _hash_copy(src, dst, block_size=1024 * 1024):
+    hasher = hashlib.sha256()
+    for block in iter(lambda: src.read(block_size), b''):
+        hasher.update(block)
+        if dst is not None:
+            dst.write(block)
+    return hasher.hexdigest()
+
+
+def prepare_file(source):
+    """Worker: store ``source`` like an upload and summarize it.
+
+    Makes no database writes. ``summary`` is None when the content was
+    ingested before, and the Dataset can reuse that one's summary and rows.
+    """
+    if upload_codec(source):
+        # Inflate once into a temporary file, hashing on the way.
+        fh = tempfile.TemporaryFile()
+        with _open_source(source) as src:
+            digest = _hash_copy(src, fh)
+    else:
+        fh = open(source, 'rb')
+        digest = _hash_copy(fh, None)
+
+    with fh:
+        size = fh.seek(0, os.SEEK_END)
+        fh.seek(0)
+        path = store_upload(File(fh, name=os.path.basename(source)), digest)
+
+    result = {
+        'source': source,
+        'filename': plain_name(os.path.basename(source)),
+        'content_hash': digest,
+        'file_path': path,
+        'file_size': size,
+        'summary': None,
+        'anomalies': None,
+    }
+    if cached_dataset(digest) is None:
+        result['summary'] = summarize_stored(path)
+        result['anomalies'] = find_anomalies([path], result['summary']['type_stats'])
+    return result
+
+
+def write_batch(results):
+    """Create the Datasets for prepared files; returns ``(result, dataset or error)`` pairs.
+
+    All summary rows are inserted in one transaction. With per-row records
+    they start out incomplete, like an upload in progress, and are marked
+    complete together once their rows are in.
+    """
+    store_records = store_records_enabled()
+    try:
+        with transaction.atomic():
+            datasets = Dataset.objects.bulk_create([
+                Dataset(
+                    filename=r['filename'], content_hash=r['content_hash'],
+                    file_path=r['file_path'], file_size=r['file_size'],
+                    is_complete=not store_records, anomaly_count=r['anomalies'][0], **r['summary'],
+                )
+                for r in results
+            ])
+            for result, dataset in zip(results, datasets):
+                anomalies.save(dataset.pk, result['anomalies'][1])
+    except Exception as e:
+        if len(results) == 1:
+            return [(results[0], e)]
+        # Find the file(s) at fault; the others still go in.
+        return [outcome for result in results for outcome in write_batch([result])]
+
+    outcomes = list(zip(results, datasets))
+    if store_records:
+        for i, (result, dataset) in enumerate(outcomes):
+            try:
+                write_records(dataset, result['file_path'])
+            except Exception as e:
+                dataset.delete()
+                outcomes[i] = (result, e)
+        done = [d.pk for _, d in outcomes if isinstance(d, Dataset)]
+        with transaction.atomic():
+            Dataset.objects.filter(pk__in=done).update(is_complete=True)
+
+    # bulk_create and update() send no signals.
+    history.invalidate()
+    return outcomes
+
+
+def write_copy(result):
+    """Dataset for a file whose content was ingested before (or earlier in this run)."""
+    dataset = ingest_cached(result['content_hash'], result['filename'], result['file_path'], result['file_size'])
+    if dataset is None:
+        dataset = ingest_file(result['file_path'], result['filename'], result['content_hash'], result['file_size'])
+    return dataset
+
+
+def retention_overflow(sources, policy=None):
+    """The DATASET_RETENTION limits that ``sources`` alone exceed.
+
+    Backfilled datasets are the newest, but a sweep would still expire
+    some of them right away if there are more (or more bytes) than kept.
+    """
+    policy = policy or retention.get_policy()
+    exceeded = []
+    if policy['MAX_COUNT'] is not None and len(sources) > policy['MAX_COUNT']:
+        exceeded.append(f"MAX_COUNT={policy['MAX_COUNT']}")
+    # Compressed files only get bigger once stored.
+    if policy['MAX_TOTAL_BYTES'] is not None and sum(map(os.path.getsize, sources)) > policy['MAX_TOTAL_BYTES']:
+        exceeded.append(f"MAX_TOTAL_BYTES={policy['MAX_TOTAL_BYTES']}")
+    return exceeded
+
+
+def _prepare_all(sources, workers):
+    """``(source, prepared result or exception)`` for each file, as parsing finishes."""
+    if workers == 0:
+        for source in sources:
+            try:
+                yield source, prepare_file(source)
+            except Exception as e:
+                yield source, e
+        return
+
+    # Spawned, not forked: each worker sets Django up from scratch.
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+    ) as executor:
+        futures = {executor.submit(prepare_file, source): source for source in sources}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def backfill(sources, workers=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Ingest ``sources`` in parallel; ``progress(source, outcome)`` after each file.
+
+    ``outcome`` is the new Dataset or the exception that stopped the file.
+    With ``workers=0`` files are parsed in this process. Returns totals for
+    a throughput report.
+    """
+    started = time.perf_counter()
+    report = {'files': 0, 'failed': 0, 'rows': 0, 'bytes': 0}
+
+    def finish(source, outcome):
+        if isinstance(outcome, Dataset):
+            report['files'] += 1
+            report['rows'] += outcome.total_equipment
+            report['bytes'] += os.path.getsize(source)
+        else:
+            report['failed'] += 1
+        if progress:
+            progress(source, outcome)
+
+    batch, copies, seen = [], [], set()
+    for source, result in _prepare_all(sources, workers):
+        if isinstance(result, Exception):
+            finish(source, result)
+            continue
+        # Repeated content reuses its first Dataset, once that is written.
+        if result['summary'] is None or result['content_hash'] in seen:
+            copies.append(result)
+            continue
+        seen.add(result['content_hash'])
+        batch.append(result)
+        if len(batch) >= batch_size:
+            for r, outcome in write_batch(batch):
+                finish(r['source'], outcome)
+            batch = []
+
+    if batch:
+        for r, outcome in write_batch(batch):
+            finish(r['source'], outcome)
+    for result in copies:
+        try:
+            finish(result['source'], write_copy(result))
+        except Exception as e:
+            finish(result['source'], e)
+
+    report['seconds'] = time.perf_counter() - started
+    return report
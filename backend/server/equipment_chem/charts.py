@@ -0,0 +1,182 @@
+"""Plot-ready arrays for a dataset's charts.
+
+Everything is computed from the cached ColumnStore with whole-array NumPy
+operations, and long series and dense scatters are reduced to the requested
+point counts (see ``downsample.py``), so the payload stays a few thousand
+points no matter how many rows the dataset has. Views return the arrays as-is; the JSON renderer turns
+them into lists and ``NpzRenderer`` ships them as a compressed ``.npz``.
+"""
+import hashlib
+
+import numpy as np
+
+from . import downsample
+from .analytics import METRIC_FIELDS
+
+DEFAULT_SAMPLE = 2_000
+MAX_SAMPLE = 20_000
+DEFAULT_BINS = 48
+MAX_BINS = 256
+DEFAULT_POINTS = 500
+MAX_POINTS = 10_000
+
+CHARTS = ('scatter', 'hist2d', 'density', 'correlation', 'temperature')
+
+
+def _int_param(params, name, default, maximum):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if not 1 <= value <= maximum:
+        raise ValueError(f"'{name}' must be between 1 and {maximum}")
+    return value
+
+
+def parse_query(params):
+    """Target sizes per chart: ``sample`` scatter points, ``bins`` per histogram
+    axis and ``points`` per series, plus the series reduction and which
+    charts to include."""
+    charts = params.get('charts')
+    charts = [c.strip().lower() for c in charts.split(',')] if charts else list(CHARTS)
+    for chart in charts:
+        if chart not in CHARTS:
+            raise ValueError(f"Unknown chart '{chart}'")
+
+    method = (params.get('series') or 'lttb').lower()
+    if method not in downsample.SERIES_METHODS:
+        raise ValueError(f"'series' must be one of {', '.join(downsample.SERIES_METHODS)}")
+
+    return {
+        'charts': charts,
+        'sample': _int_param(params, 'sample', DEFAULT_SAMPLE, MAX_SAMPLE),
+        'bins': _int_param(params, 'bins', DEFAULT_BINS, MAX_BINS),
+        'points': _int_param(params, 'points', DEFAULT_POINTS, MAX_POINTS),
+        'series': method,
+    }
+
+
+def etag(dataset, query, fmt):
+    """Strong ETag for one rendering of a dataset's chart data.
+
+    A dataset's rows only change when a file is appended to it, and an
+    append also replaces its ``content_hash``, so the tag only depends on
+    that hash, the query and the response format.
+    """
+    parts = [str(dataset.pk), dataset.content_hash, fmt or 'json']
+    parts += [f'{name}={",".join(value) if name == "charts" else value}' for name, value in sorted(query.items())]
+    return '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def _valid_rows(*columns):
+    """Mask of rows with no missing cell, or None when nothing is missing."""
+    valid = None
+    for values in columns:
+        present = ~np.isnan(values)
+        valid = present if valid is None else valid & present
+    return None if valid is None or valid.all() else valid
+
+
+def scatter_sample(x, y, size, seed=0):
+    """Up to ``size`` random rows with both coordinates present."""
+    valid = _valid_rows(x, y)
+    rows = np.arange(len(x)) if valid is None else np.flatnonzero(valid)
+    if len(rows) > size:
+        # Seeded so the same dataset always shows the same points.
+        rows = np.sort(np.random.default_rng(seed).choice(rows, size, replace=False))
+    return x[rows], y[rows]
+
+
+def _bin_index(values, bins):
+    lo, hi = float(values.min()), float(values.max())
+    if hi <= lo:
+        hi = lo + 1.0
+    idx = values - lo
+    idx *= bins / (hi - lo)
+    idx = idx.astype(np.int64)
+    np.minimum(idx, bins - 1, out=idx)  # the maximum lands in the last bin
+    return idx, np.linspace(lo, hi, bins + 1)
+
+
+def histogram2d(x, y, bins):
+    """Row counts on a ``bins`` x ``bins`` grid spanning the data.
+
+    Bin indices are computed directly and counted with one ``bincount``,
+    which is several times faster than ``np.histogram2d`` on large inputs.
+    """
+    valid = _valid_rows(x, y)
+    if valid is not None:
+        x, y = x[valid], y[valid]
+    if not len(x):
+        return np.zeros((bins, bins), dtype=np.int64), np.zeros(bins + 1), np.zeros(bins + 1)
+
+    ix, x_edges = _bin_index(x, bins)
+    iy, y_edges = _bin_index(y, bins)
+    ix *= bins
+    ix += iy
+    counts = np.bincount(ix, minlength=bins * bins).reshape(bins, bins)
+    return counts, x_edges, y_edges
+
+
+def correlation(columns):
+    """Pearson correlation (``np.corrcoef``) over rows where every column is present.
+
+    Undefined entries (a constant or empty column) are reported as 0.
+    """
+    names = list(columns)
+    matrix = np.vstack([columns[name] for name in names])
+    valid = _valid_rows(*matrix)
+    if valid is not None:
+        matrix = matrix[:, valid]
+    if matrix.shape[1] < 2:
+        return names, np.eye(len(names))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = np.corrcoef(matrix)
+    return names, np.nan_to_num(corr, nan=0.0)
+
+
+def _memo(store, key, compute):
+    # Histograms, correlations and reduced series depend only on the data
+    # and the request's sizes, so they live as long as the cached store does.
+    if key not in store.derived:
+        store.derived[key] = compute()
+    return store.derived[key]
+
+
+def chart_data(store, dataset_id, charts=CHARTS, sample=DEFAULT_SAMPLE, bins=DEFAULT_BINS,
+               points=DEFAULT_POINTS, series='lttb'):
+    flow = store.columns['flowrate']
+    pressure = store.columns['pressure']
+    data = {'dataset': dataset_id, 'rows': len(store)}
+
+    if 'scatter' in charts:
+        x, y = scatter_sample(flow, pressure, sample, seed=dataset_id)
+        data['scatter'] = {'x': x, 'y': y}
+
+    if 'hist2d' in charts or 'density' in charts:
+        counts, x_edges, y_edges = _memo(store, ('hist2d', bins), lambda: histogram2d(flow, pressure, bins))
+        if 'hist2d' in charts:
+            data['hist2d'] = {'counts': counts, 'x_edges': x_edges, 'y_edges': y_edges}
+        if 'density' in charts:
+            # Scatter as at most bins x bins weighted points.
+            x, y, count = downsample.density_cells(counts, x_edges, y_edges)
+            data['density'] = {'x': x, 'y': y, 'count': count}
+
+    if 'correlation' in charts:
+        fields, corr = _memo(
+            store, 'correlation', lambda: correlation({name: store.columns[name] for name in METRIC_FIELDS})
+        )
+        data['correlation'] = {'fields': fields, 'matrix': corr}
+
+    if 'temperature' in charts:
+        values = store.row_ordered('temperature')
+        index = _memo(
+            store, ('series', 'temperature', series, points),
+            lambda: downsample.reduce_series(values, points, series),
+        )
+        data['temperature'] = {'index': index, 'values': values[index], 'method': series}
+
+    return data
@@ -0,0 +1,172 @@
+"""Resumable uploads: a file sent as numbered chunks, then assembled.
+
+A client opens an ``UploadSession``, PUTs chunks in any order (and in
+parallel), asks which ones the server has after a failure, and finally
+completes the session. Chunks are stored one file each under
+``uploads/sessions/<id>/``; a chunk counts as received once its file has
+the full expected length. Completion concatenates them, checks the
+declared SHA-256 and hands the result to the normal ingestion path.
+Sessions idle for longer than ``UPLOAD_SESSION_TTL`` are discarded by the
+retention sweeper.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import UploadSession
+from .uploads import UPLOAD_DIR
+
+SESSION_DIR = f'{UPLOAD_DIR}/sessions'
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+DEFAULT_SESSION_TTL = timedelta(hours=24)
+
+_CHUNK_NAME = re.compile(r'^(\d+)\.part$')
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def chunk_dir(session):
+    return f'{SESSION_DIR}/{session.pk}'
+
+
+def chunk_path(session, index):
+    return f'{chunk_dir(session)}/{index:06d}.part'
+
+
+def _positive_int(data, name):
+    try:
+        value = int(data.get(name))
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer")
+    if value < 1:
+        raise ValueError(f"'{name}' must be positive")
+    return value
+
+
+def open_session(data):
+    """Start a session for ``filename``/``size`` (and optional ``sha256``,
+    ``chunk_size``). Returns ``(session, created)``.
+
+    An open session for the same checksum and size is returned instead of a
+    new one, so a client that lost its session id can still resume.
+    """
+    filename = os.path.basename(str(data.get('filename') or ''))[:255]
+    if not filename:
+        raise ValueError("'filename' is required")
+    total_bytes = _positive_int(data, 'size')
+    sha256 = str(data.get('sha256') or '').lower()
+    if sha256 and not _SHA256.match(sha256):
+        raise ValueError("'sha256' must be 64 hex digits")
+
+    max_chunk = getattr(settings, 'UPLOAD_MAX_CHUNK_SIZE', DEFAULT_MAX_CHUNK_SIZE)
+    chunk_size = getattr(settings, 'UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    if data.get('chunk_size') not in (None, ''):
+        chunk_size = _positive_int(data, 'chunk_size')
+        if not MIN_CHUNK_SIZE <= chunk_size <= max_chunk:
+            raise ValueError(f"'chunk_size' must be between {MIN_CHUNK_SIZE} and {max_chunk}")
+
+    if sha256:
+        existing = UploadSession.objects.filter(
+            sha256=sha256, total_bytes=total_bytes, status=UploadSession.OPEN
+        ).order_by('-updated_at').first()
+        if existing is not None:
+            return existing, False
+
+    session = UploadSession.objects.create(
+        filename=filename, total_bytes=total_bytes, chunk_size=chunk_size, sha256=sha256
+    )
+    return session, True
+
+
+def received_chunks(session):
+    """Sorted indices of the chunks stored in full."""
+    directory = chunk_dir(session)
+    if not default_storage.exists(directory):
+        return []
+    _, names = default_storage.listdir(directory)
+    received = []
+    for name in names:
+        match = _CHUNK_NAME.match(name)
+        if not match:
+            continue
+        index = int(match.group(1))
+        # A chunk cut short by a dropped connection is not received.
+        if index < session.chunks and default_storage.size(f'{directory}/{name}') == session.chunk_length(index):
+            received.append(index)
+    return sorted(received)
+
+
+def save_chunk(session, index, stream, sha256=None):
+    """Store chunk ``index`` read from ``stream``, replacing an earlier copy."""
+    if not 0 <= index < session.chunks:
+        raise ValueError(f"Chunk index must be between 0 and {session.chunks - 1}")
+    expected = session.chunk_length(index)
+    data = stream.read(expected + 1) if stream is not None else b''
+    if len(data) != expected:
+        raise ValueError(f"Chunk {index} must be {expected} bytes, got {len(data)}")
+    if sha256 and hashlib.sha256(data).hexdigest() != sha256.lower():
+        raise ValueError(f"Chunk {index} does not match its checksum")
+
+    path = chunk_path(session, index)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(data))
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+
+def assemble(session):
+    """Concatenate the chunks into a temporary file.
+
+    Returns ``(file, digest)`` with the file rewound; ``digest`` is its
+    SHA-256. Raises ValueError if chunks are missing or the declared
+    checksum doesn't match.
+    """
+    missing = sorted(set(range(session.chunks)) - set(received_chunks(session)))
+    if missing:
+        shown = ', '.join(str(i) for i in missing[:10])
+        raise ValueError(f"Missing {len(missing)} chunk(s): {shown}")
+
+    out = tempfile.TemporaryFile()
+    hasher = hashlib.sha256()
+    for index in range(session.chunks):
+        with default_storage.open(chunk_path(session, index), 'rb') as part:
+            for block in part.chunks():
+                hasher.update(block)
+                out.write(block)
+    digest = hasher.hexdigest()
+    if session.sha256 and digest != session.sha256:
+        out.close()
+        raise ValueError("Assembled file does not match its checksum")
+    out.seek(0)
+    return File(out, name=session.filename), digest
+
+
+def discard(session):
+    """Delete a session and its stored chunks."""
+    directory = chunk_dir(session)
+    if default_storage.exists(directory):
+        _, names = default_storage.listdir(directory)
+        for name in names:
+            default_storage.delete(f'{directory}/{name}')
+        default_storage.delete(directory)
+    session.delete()
+
+
+def expire_sessions(ttl=None, now=None, dry_run=False):
+    """Discard sessions idle for longer than ``ttl``. Returns how many."""
+    ttl = ttl or getattr(settings, 'UPLOAD_SESSION_TTL', DEFAULT_SESSION_TTL)
+    now = now or timezone.now()
+    stale = list(UploadSession.objects.filter(updated_at__lt=now - ttl))
+    if not dry_run:
+        for session in stale:
+            discard(session)
+    return len(stale)
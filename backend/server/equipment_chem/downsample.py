@@ -0,0 +1,108 @@
+"""Reduce long series and dense scatters to a target number of points.
+
+All functions return row positions (or bin summaries), never interpolated
+values, so every plotted point is a real measurement.
+"""
+import numpy as np
+
+
+def _bucket_edges(start, stop, buckets):
+    return np.linspace(start, stop, buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: positions of ``threshold`` points.
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the next bucket's mean. The bucket walk is sequential by design, but each
+    step is one vectorized pass over its bucket, and bucket means are
+    computed up front with ``reduceat``.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return stride(n, threshold)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets over the interior, plus the last point on its own.
+    edges = np.append(_bucket_edges(1, n - 1, threshold - 2), n)
+    lengths = np.diff(edges)
+    mean_x = np.add.reduceat(x, edges[:-1]) / lengths
+    mean_y = np.add.reduceat(y, edges[:-1]) / lengths
+
+    out = np.empty(threshold, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area; the constant factor doesn't change argmax.
+        area = np.abs((ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def _first_match(values, targets, edges):
+    """Per bucket, the first position whose value equals the bucket's target."""
+    lengths = np.diff(edges)
+    hits = np.flatnonzero(values == np.repeat(targets, lengths))
+    bucket = np.searchsorted(edges, hits, side='right') - 1
+    _, first = np.unique(bucket, return_index=True)
+    return hits[first]
+
+
+def minmax(y, threshold):
+    """Positions of each bucket's minimum and maximum, in order.
+
+    Uses ``threshold // 2`` equal buckets, so spikes survive at any zoom
+    level. Fully vectorized: ``reduceat`` finds the extremes and one
+    comparison pass finds where they occur.
+    """
+    n = len(y)
+    buckets = threshold // 2
+    if threshold >= n:
+        return np.arange(n)
+    if buckets < 1:
+        # Too few points for a (min, max) pair.
+        return stride(n, threshold)
+
+    y = np.asarray(y, dtype=np.float64)
+    edges = _bucket_edges(0, n, buckets)
+    lows = np.minimum.reduceat(y, edges[:-1])
+    highs = np.maximum.reduceat(y, edges[:-1])
+    return np.union1d(_first_match(y, lows, edges), _first_match(y, highs, edges))
+
+
+def stride(n, threshold):
+    """Evenly spaced positions, the cheapest (and least faithful) reduction."""
+    if threshold >= n:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, threshold).astype(np.int64))
+
+
+SERIES_METHODS = ('lttb', 'minmax', 'stride')
+
+
+def reduce_series(values, threshold, method='lttb'):
+    """Positions of ``values`` (NaNs skipped) to plot with at most ``threshold`` points."""
+    present = np.flatnonzero(~np.isnan(values))
+    y = values[present]
+    if method == 'lttb':
+        keep = lttb(present.astype(np.float64), y, threshold)
+    elif method == 'minmax':
+        keep = minmax(y, threshold)
+    elif method == 'stride':
+        keep = stride(len(y), threshold)
+    else:
+        raise ValueError(f"Unknown series method '{method}'")
+    return present[keep]
+
+
+def density_cells(counts, x_edges, y_edges):
+    """Non-empty cells of a 2D histogram as ``(x_center, y_center, count)`` arrays."""
+    ix, iy = np.nonzero(counts)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_centers[ix], y_centers[iy], counts[ix, iy]
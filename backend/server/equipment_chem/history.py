@@ -0,0 +1,78 @@
+"""Cached, pre-rendered payload for the upload history endpoint.
+
+The serialized history is kept in Django's cache together with an ETag and
+a Last-Modified time, and dropped whenever a Dataset is saved or deleted
+(see ``signals.py``), by whichever process wrote it; the cache backend is
+shared between processes (see ``CACHES``). Polling clients revalidate with
+If-None-Match and get a 304 without touching the database or the
+serializer.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Dataset
+
+HISTORY_LIMIT = 5
+CACHE_KEY = 'equipment_chem:history'
+CHANGED_KEY = 'equipment_chem:history:changed_at'
+
+# Compact history rows; heavy JSON columns only when asked for.
+HISTORY_FIELDS = [
+    'id', 'uploaded_at', 'filename', 'total_equipment',
+    'avg_flowrate', 'avg_pressure', 'avg_temperature', 'anomaly_count',
+]
+OPTIONAL_FIELDS = {
+    'distribution': 'equipment_type_distribution',
+}
+
+
+def parse_include(value):
+    """``?include=distribution`` -> tuple of extra field names (sorted)."""
+    names = {name.strip() for name in (value or '').split(',') if name.strip()}
+    unknown = names - set(OPTIONAL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown include '{', '.join(sorted(unknown))}'")
+    return tuple(sorted(names))
+
+
+def _cache_key(include):
+    return ':'.join([CACHE_KEY, *include])
+
+
+def _build(include):
+    # .values() skips model instances and the serializer; DRF's encoder
+    # renders datetimes exactly as DatasetSerializer would.
+    fields = HISTORY_FIELDS + [OPTIONAL_FIELDS[name] for name in include]
+    rows = list(
+        Dataset.objects.filter(is_complete=True)
+        .order_by('-uploaded_at')
+        .values(*fields)[:HISTORY_LIMIT]
+    )
+    body = json.dumps(rows, cls=JSONEncoder, separators=(',', ':')).encode()
+
+    newest = max((row['uploaded_at'].timestamp() for row in rows), default=0)
+    changed_at = cache.get(CHANGED_KEY) or 0
+    return {
+        'body': body,
+        'etag': '"%s"' % hashlib.sha1(body).hexdigest(),
+        'last_modified': int(max(newest, changed_at)) or int(time.time()),
+    }
+
+
+def get_history(include=()):
+    key = _cache_key(include)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _build(include)
+        cache.set(key, entry, getattr(settings, 'HISTORY_CACHE_TIMEOUT', 300))
+    return entry
+
+
+def invalidate():
+    cache.set(CHANGED_KEY, time.time(), None)
+    cache.delete_many([CACHE_KEY] + [_cache_key((name,)) for name in OPTIONAL_FIELDS])
@@ -0,0 +1,353 @@
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Dataset, DatasetPart, EquipmentRecord
+from .parsing import SUMMARY_COLUMNS, read_csv_chunks
+from . import anomalies, retention, sidecar, stats
+from .anomalies import Detector, TypeStats
+from .sketches import DatasetSketches, combine
+from .records import RecordWriter, unshare
+
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+# CSV column -> API field name
+COLUMN_FIELDS = {col: col.lower() for col in NUMERIC_COLUMNS}
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+SUMMARY_FIELDS = [
+    'total_equipment', 'avg_flowrate', 'avg_pressure', 'avg_temperature',
+    'equipment_type_distribution', 'column_stats', 'sketches', 'type_stats',
+]
+
+
+class SummaryAggregator:
+    """Running aggregates over a stream of CSV chunks."""
+
+    def __init__(self):
+        self.total = 0
+        self.has_type = False
+        self.sums = {col: 0.0 for col in NUMERIC_COLUMNS}
+        self.counts = {col: 0 for col in NUMERIC_COLUMNS}
+        self.stats = {col: dict(stats.EMPTY) for col in NUMERIC_COLUMNS}
+        self.type_counts = Counter()
+        self.sketches = DatasetSketches.empty(COLUMN_FIELDS.values())
+        self.type_stats = TypeStats()
+
+    def update(self, chunk):
+        self.total += len(chunk)
+
+        for col in NUMERIC_COLUMNS:
+            values = chunk[col]
+            self.sums[col] += float(values.sum())
+            self.counts[col] += int(values.count())
+            self.stats[col] = stats.merge(self.stats[col], stats.describe(values.to_numpy()))
+        self.sketches.update(chunk, COLUMN_FIELDS, 'Equipment Name')
+        self.type_stats.update(chunk, COLUMN_FIELDS)
+
+        if 'Type' in chunk.columns:
+            self.has_type = True
+            types = chunk['Type']
+            counts = types.value_counts(sort=False)
+            # Walk values in order of first appearance so ties keep the
+            # same ordering a single value_counts() over the file would.
+            for name in types.dropna().unique():
+                self.type_counts[name] += int(counts[name])
+
+    def mean(self, col):
+        if not self.counts[col]:
+            return float('nan')
+        return self.sums[col] / self.counts[col]
+
+    def result(self):
+        """Field values for a Dataset row."""
+        return {
+            'total_equipment': self.total,
+            'avg_flowrate': self.mean('Flowrate'),
+            'avg_pressure': self.mean('Pressure'),
+            'avg_temperature': self.mean('Temperature'),
+            'equipment_type_distribution': (
+                dict(self.type_counts.most_common()) if self.has_type else {}
+            ),
+            'column_stats': {col.lower(): self.stats[col] for col in NUMERIC_COLUMNS},
+            'sketches': self.sketches.to_dict(),
+            'type_stats': self.type_stats.to_dict(),
+        }
+
+
+def get_chunk_size():
+    return getattr(settings, 'CSV_INGEST_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def _tell(fh):
+    try:
+        return fh.tell()
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def summarize_csv(fh, chunksize=None, engine=None, progress=None, sinks=(), columns=SUMMARY_COLUMNS):
+    """Summarize an open CSV file without loading it into memory at once.
+
+    Every parsed chunk is also handed to each callable in ``sinks``, and
+    ``progress(rows, bytes_read)`` is called after every chunk if given.
+    """
+    aggregator = SummaryAggregator()
+    for chunk in read_csv_chunks(fh, chunksize or get_chunk_size(), columns=columns, engine=engine):
+        aggregator.update(chunk)
+        for sink in sinks:
+            sink(chunk)
+        if progress:
+            progress(aggregator.total, _tell(fh))
+    return aggregator.result()
+
+
+def summarize_stored(file_path, progress=None):
+    """Summarize a stored upload and write its sidecar, without touching the database."""
+    writer = None
+    if sidecar.enabled() and not sidecar.sidecar_exists(file_path):
+        writer = sidecar.SidecarWriter(file_path)
+    try:
+        with default_storage.open(file_path) as fh:
+            summary = summarize_csv(fh, progress=progress, sinks=[writer] if writer else ())
+    except Exception:
+        if writer:
+            writer.abort()
+        raise
+    if writer:
+        writer.close()
+    return summary
+
+
+def write_records(dataset, file_path):
+    """Append a stored upload's rows to ``dataset``, read from its sidecar if it has one."""
+    writer = RecordWriter(dataset)
+    for chunk in sidecar.read_chunks(file_path, get_chunk_size()):
+        writer(chunk)
+
+
+def find_anomalies(file_paths, type_stats, offset=0):
+    """``(flagged rows, readings)`` in stored uploads, numbering rows from ``offset``."""
+    detector = Detector(TypeStats.from_dict(type_stats), COLUMN_FIELDS)
+    for path in file_paths:
+        for chunk in sidecar.read_chunks(path, get_chunk_size()):
+            detector(chunk, offset)
+            offset += len(chunk)
+    return detector.result()
+
+
+def store_records_enabled():
+    return getattr(settings, 'STORE_EQUIPMENT_RECORDS', True)
+
+
+def cached_dataset(content_hash):
+    """The newest complete Dataset computed from this content, if it can be reused."""
+    if not content_hash:
+        return None
+    cached = (
+        Dataset.objects.filter(content_hash=content_hash, is_complete=True)
+        .order_by('-uploaded_at')
+        .first()
+    )
+    if cached is None:
+        return None
+    if store_records_enabled() and not EquipmentRecord.objects.filter(dataset=cached.rows_id).exists():
+        return None
+    if not cached.type_stats:
+        # Ingested before anomaly detection; ingest the content afresh.
+        return None
+    return cached
+
+
+def ingest_cached(content_hash, filename, file_path, file_size=0):
+    """Record an upload we have already summarized, without re-parsing it.
+
+    The new Dataset shares the records and anomalies of the cached one
+    instead of copying them. Returns None if no Dataset was computed from
+    this content yet.
+    """
+    # Under the write lock, so the rows can't be handed over meanwhile.
+    with transaction.atomic():
+        cached = cached_dataset(content_hash)
+        if cached is None:
+            return None
+        dataset = Dataset.objects.create(
+            filename=filename,
+            content_hash=content_hash,
+            file_path=file_path,
+            file_size=file_size,
+            anomaly_count=cached.anomaly_count,
+            rows_owner_id=cached.rows_id,
+            **{field: getattr(cached, field) for field in SUMMARY_FIELDS},
+        )
+    retention.ensure_sweeper()
+    return dataset
+
+
+def ingest_file(file_path, filename, content_hash='', file_size=0, progress=None, on_created=None):
+    """Summarize a stored upload and record it as a Dataset.
+
+    The Dataset stays ``is_complete=False`` while its rows are written, and
+    is removed again if parsing fails part-way. ``on_created(dataset)`` is
+    called before the first row is written.
+    """
+    dataset = Dataset.objects.create(
+        filename=filename,
+        content_hash=content_hash,
+        file_path=file_path,
+        file_size=file_size,
+        is_complete=False,
+        total_equipment=0,
+        avg_flowrate=0.0,
+        avg_pressure=0.0,
+        avg_temperature=0.0,
+    )
+    if on_created:
+        on_created(dataset)
+
+    sinks = []
+    if store_records_enabled():
+        sinks.append(RecordWriter(dataset))
+    sidecar_writer = None
+    if sidecar.enabled() and not sidecar.sidecar_exists(file_path):
+        sidecar_writer = sidecar.SidecarWriter(file_path)
+        sinks.append(sidecar_writer)
+
+    try:
+        with default_storage.open(file_path) as fh:
+            summary = summarize_csv(fh, progress=progress, sinks=sinks)
+    except Exception:
+        if sidecar_writer:
+            sidecar_writer.abort()
+        dataset.delete()
+        raise
+    if sidecar_writer:
+        sidecar_writer.close()
+
+    try:
+        dataset.anomaly_count, readings = find_anomalies([file_path], summary['type_stats'])
+        anomalies.save(dataset.pk, readings)
+    except Exception:
+        dataset.delete()
+        raise
+
+    for field, value in summary.items():
+        setattr(dataset, field, value)
+    dataset.is_complete = True
+    dataset.save(update_fields=[*summary, 'anomaly_count', 'is_complete'])
+
+    retention.ensure_sweeper()
+    return dataset
+
+
+def merge_summary(dataset, delta):
+    """Fold the summary of new rows into ``dataset``'s fields, in place."""
+    total = dataset.total_equipment + delta['total_equipment']
+    merged = {
+        name: stats.merge(dataset.column_stats[name], delta['column_stats'][name])
+        for name in delta['column_stats']
+    }
+    for name, state in merged.items():
+        # Same value a fresh ingest of all rows stores: sum / count.
+        setattr(dataset, f'avg_{name}', state['sum'] / state['count'] if state['count'] else float('nan'))
+    distribution = Counter(dataset.equipment_type_distribution)
+    distribution.update(delta['equipment_type_distribution'])
+    dataset.total_equipment = total
+    dataset.column_stats = merged
+    dataset.sketches = combine([dataset.sketches, delta['sketches']]).to_dict()
+    dataset.type_stats = TypeStats.from_dict(dataset.type_stats).merge(
+        TypeStats.from_dict(delta['type_stats'])
+    ).to_dict()
+    dataset.equipment_type_distribution = dict(distribution.most_common())
+
+
+def stored_stats(dataset):
+    """``column_stats`` of a dataset ingested before they were recorded, from its columns."""
+    from . import analytics
+
+    store = analytics.column_cache.get(dataset)
+    return {name: stats.describe(values) for name, values in store.columns.items()}
+
+
+def _stored_paths(dataset):
+    return [dataset.file_path, *dataset.parts.values_list('file_path', flat=True)]
+
+
+def _stored_chunks(dataset, columns):
+    for path in _stored_paths(dataset):
+        yield from sidecar.read_chunks(path, get_chunk_size(), columns=columns)
+
+
+def stored_sketches(dataset):
+    """``sketches`` of a dataset ingested before they were recorded, from its rows."""
+    from . import analytics
+
+    store = analytics.column_cache.get(dataset)
+    sketches = DatasetSketches.empty(store.columns)
+    for name, values in store.columns.items():
+        sketches.columns[name].update(values)
+    for chunk in _stored_chunks(dataset, ['Equipment Name']):
+        sketches.names.update(chunk['Equipment Name'])
+    return sketches.to_dict()
+
+
+def stored_type_stats(dataset):
+    """``type_stats`` of a dataset ingested before they were recorded, from its rows."""
+    type_stats = TypeStats()
+    for chunk in _stored_chunks(dataset, ['Type', *NUMERIC_COLUMNS]):
+        type_stats.update(chunk, COLUMN_FIELDS)
+    return type_stats.to_dict()
+
+
+def ensure_sketches(dataset):
+    """``dataset.sketches``, built and saved once for datasets that predate them."""
+    if not dataset.sketches:
+        dataset.sketches = stored_sketches(dataset)
+        # Derived data only: no signals, the caches stay valid.
+        Dataset.objects.filter(pk=dataset.pk).update(sketches=dataset.sketches)
+    return dataset.sketches
+
+
+def append_file(dataset, file_path, filename, content_hash='', file_size=0):
+    """Append a stored upload's rows to ``dataset`` and merge its statistics.
+
+    Only the new file is read. Its summary (and sidecar) is computed first;
+    then the rows are inserted and the dataset updated in one transaction,
+    so readers see either none or all of the appended rows. The dataset's
+    ``content_hash`` becomes a hash of the chain of appended contents, which
+    keeps later uploads of the original file from deduplicating onto it.
+    """
+    delta = summarize_stored(file_path)
+    # Datasets from before these fields existed get them from their rows once.
+    legacy = {
+        'column_stats': None if dataset.column_stats else stored_stats(dataset),
+        'sketches': None if dataset.sketches else stored_sketches(dataset),
+        'type_stats': None if dataset.type_stats else stored_type_stats(dataset),
+    }
+
+    with transaction.atomic():
+        dataset = Dataset.objects.get(pk=dataset.pk)
+        for field, value in legacy.items():
+            if not getattr(dataset, field):
+                setattr(dataset, field, value)
+        # Datasets sharing the rows keep them as they were.
+        unshare(dataset)
+        if store_records_enabled():
+            write_records(dataset, file_path)
+        DatasetPart.objects.create(
+            dataset=dataset, filename=filename, content_hash=content_hash,
+            file_path=file_path, file_size=file_size, rows=delta['total_equipment'],
+        )
+        offset = dataset.total_equipment
+        merge_summary(dataset, delta)
+        # Only the new rows are checked, against the merged envelopes.
+        flagged, readings = find_anomalies([file_path], dataset.type_stats, offset)
+        anomalies.save(dataset.pk, readings)
+        dataset.anomaly_count += flagged
+        dataset.content_hash = hashlib.sha256(f'{dataset.content_hash}+{content_hash}'.encode()).hexdigest()
+        dataset.file_size += file_size
+        dataset.save()
+    return dataset
@@ -0,0 +1,129 @@
+"""In-process worker pool for asynchronous uploads.
+
+Jobs live in the ``IngestJob`` table, so no external broker is needed:
+the upload view inserts a row and hands its id to a local thread pool.
+Rows left ``pending`` (e.g. by a restart, or when ``INGEST_RUN_IN_PROCESS``
+is off) are picked up by ``manage.py process_ingest_jobs``.
+
+A running job reports progress after every parsed chunk. One that has been
+silent for ``INGEST_STALE_AFTER`` lost its worker: ``recover_stale_jobs``
+deletes its incomplete Dataset and puts it back in the queue, or fails it
+after ``INGEST_MAX_ATTEMPTS`` tries. It runs when a process starts its pool,
+from the retention sweeper and on every pass of ``process_ingest_jobs``.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .ingest import ingest_file
+from .models import Dataset, IngestJob
+
+DEFAULT_STALE_AFTER = timedelta(minutes=10)
+DEFAULT_MAX_ATTEMPTS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'INGEST_WORKERS', 2),
+                thread_name_prefix='ingest',
+            )
+            # Jobs a previous run of this server left behind.
+            _executor.submit(requeue_stale_jobs)
+        return _executor
+
+
+def enqueue(job):
+    """Schedule a job once the transaction that created it commits."""
+    if getattr(settings, 'INGEST_RUN_IN_PROCESS', True):
+        transaction.on_commit(lambda: get_executor().submit(run_job, job.pk))
+
+
+def run_job(job_id):
+    """Claim and run one pending job. Returns False if it was already taken."""
+    close_old_connections()
+    try:
+        claimed = IngestJob.objects.filter(pk=job_id, status=IngestJob.PENDING).update(
+            status=IngestJob.RUNNING, attempts=F('attempts') + 1, updated_at=timezone.now()
+        )
+        if not claimed:
+            return False
+
+        job = IngestJob.objects.get(pk=job_id)
+        # Updates only land while this attempt still owns the job.
+        this_attempt = IngestJob.objects.filter(pk=job_id, status=IngestJob.RUNNING, attempts=job.attempts)
+
+        def progress(rows, bytes_read):
+            this_attempt.update(rows_processed=rows, bytes_processed=bytes_read, updated_at=timezone.now())
+
+        try:
+            dataset = ingest_file(
+                job.file_path,
+                job.filename,
+                content_hash=job.content_hash,
+                file_size=job.total_bytes,
+                progress=progress,
+                on_created=lambda dataset: this_attempt.update(dataset=dataset, updated_at=timezone.now()),
+            )
+        except Exception as e:
+            this_attempt.update(status=IngestJob.FAILED, error=str(e), updated_at=timezone.now())
+        else:
+            this_attempt.update(
+                status=IngestJob.DONE,
+                dataset=dataset,
+                rows_processed=dataset.total_equipment,
+                bytes_processed=job.total_bytes,
+                updated_at=timezone.now(),
+            )
+        return True
+    finally:
+        # Worker threads own their DB connections; don't leak them.
+        connection.close()
+
+
+def recover_stale_jobs(now=None):
+    """Requeue (or fail) running jobs whose worker stopped reporting.
+
+    Deletes the incomplete Dataset each one was writing. Returns the ids of
+    the jobs put back in the queue.
+    """
+    now = now or timezone.now()
+    stale_after = getattr(settings, 'INGEST_STALE_AFTER', DEFAULT_STALE_AFTER)
+    max_attempts = getattr(settings, 'INGEST_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    requeued = []
+    for job in IngestJob.objects.filter(status=IngestJob.RUNNING, updated_at__lt=now - stale_after):
+        retry = job.attempts < max_attempts
+        with transaction.atomic():
+            # Unless the worker reported in meanwhile.
+            taken = IngestJob.objects.filter(pk=job.pk, status=IngestJob.RUNNING, updated_at=job.updated_at).update(
+                status=IngestJob.PENDING if retry else IngestJob.FAILED,
+                error='' if retry else 'Ingestion stopped before it finished',
+                rows_processed=0, bytes_processed=0, dataset=None, updated_at=now,
+            )
+            if taken and job.dataset_id:
+                Dataset.objects.filter(pk=job.dataset_id, is_complete=False).delete()
+        if taken and retry:
+            requeued.append(job.pk)
+    return requeued
+
+
+def requeue_stale_jobs():
+    """``recover_stale_jobs``, running the requeued jobs here when jobs run in process."""
+    try:
+        requeued = recover_stale_jobs()
+        if requeued and getattr(settings, 'INGEST_RUN_IN_PROCESS', True):
+            for job_id in requeued:
+                get_executor().submit(run_job, job_id)
+        return requeued
+    finally:
+        connection.close()
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from equipment_chem import chunked, retention
+
+
+class Command(BaseCommand):
+    help = "Delete datasets outside DATASET_RETENTION and reclaim their stored files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be removed.")
+        parser.add_argument(
+            '--orphans', action='store_true',
+            help="Also remove files in uploads/ that no dataset references.",
+        )
+        parser.add_argument(
+            '--sessions', action='store_true',
+            help="Also discard resumable uploads idle for longer than UPLOAD_SESSION_TTL.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        prefix = "Would remove" if dry_run else "Removed"
+
+        report = retention.enforce(dry_run=dry_run)
+        if dry_run:
+            self.stdout.write(f"{prefix} {report['datasets']} datasets")
+        else:
+            self.stdout.write(
+                f"{prefix} {report['datasets']} datasets, "
+                f"{report['files']} stored files ({report['bytes']} bytes)"
+            )
+
+        if options['orphans']:
+            report = retention.sweep_orphans(dry_run=dry_run)
+            self.stdout.write(f"{prefix} {report['files']} orphaned files ({report['bytes']} bytes)")
+
+        if options['sessions']:
+            expired = chunked.expire_sessions(dry_run=dry_run)
+            self.stdout.write(f"{prefix} {expired} idle upload sessions")
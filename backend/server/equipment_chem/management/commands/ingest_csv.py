@@ -0,0 +1,77 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment_chem import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest CSV exports from disk as datasets, parsing files in parallel processes. "
+        "DATASET_RETENTION still applies to the result: the command refuses to load more files "
+        "than it keeps unless --allow-expiry is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+',
+            help="Directories (their *.csv, *.csv.gz and *.csv.zst files) or glob patterns; quote globs.",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help="Parsing processes (default: one per CPU; 0 parses in this process).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=backfill.DEFAULT_BATCH_SIZE,
+            help="Datasets committed per transaction.",
+        )
+        parser.add_argument(
+            '--allow-expiry', action='store_true',
+            help="Ingest even if DATASET_RETENTION will expire some of the new datasets.",
+        )
+
+    def handle(self, *args, **options):
+        sources = backfill.find_sources(options['paths'])
+        if not sources:
+            raise CommandError("No CSV files found")
+        total = len(sources)
+        exceeded = backfill.retention_overflow(sources)
+        if exceeded:
+            message = (
+                f"{total} files exceed DATASET_RETENTION ({', '.join(exceeded)}); "
+                "the next retention sweep will delete some of the new datasets"
+            )
+            if not options['allow_expiry']:
+                raise CommandError(f"{message}. Raise the limits or pass --allow-expiry.")
+            self.stderr.write(self.style.WARNING(f"Warning: {message}."))
+        done = [0]
+        interactive = self.stdout.isatty()
+
+        def progress(source, outcome):
+            done[0] += 1
+            name = os.path.basename(source)
+            if isinstance(outcome, Exception):
+                if interactive:
+                    self.stdout.write('')
+                self.stderr.write(f"[{done[0]}/{total}] {name}: {outcome}")
+            elif interactive:
+                self.stdout.write(f"\r[{done[0]}/{total}] {name[:60]:<60}", ending='')
+                self.stdout.flush()
+            else:
+                self.stdout.write(f"[{done[0]}/{total}] {name}: dataset {outcome.pk}, {outcome.total_equipment} rows")
+
+        report = backfill.backfill(
+            sources, workers=options['workers'], batch_size=options['batch_size'], progress=progress,
+        )
+        if interactive:
+            self.stdout.write('')
+
+        seconds = max(report['seconds'], 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {report['files']} files ({report['rows']} rows, "
+            f"{report['bytes'] / 1e6:.1f} MB) in {report['seconds']:.1f}s: "
+            f"{report['files'] / seconds:.1f} files/s, {report['bytes'] / 1e6 / seconds:.1f} MB/s, "
+            f"{report['rows'] / seconds:,.0f} rows/s"
+        ))
+        if report['failed']:
+            raise CommandError(f"{report['failed']} of {total} files failed")
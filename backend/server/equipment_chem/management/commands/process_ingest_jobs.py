@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from equipment_chem.jobs import recover_stale_jobs, run_job
+from equipment_chem.models import IngestJob
+
+
+class Command(BaseCommand):
+    help = "Run pending asynchronous upload jobs (e.g. left over after a restart), retrying stalled ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Polling interval in seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = recover_stale_jobs()
+            if requeued:
+                self.stdout.write(f"Requeued stalled jobs: {', '.join(map(str, requeued))}")
+            pending = list(
+                IngestJob.objects.filter(status=IngestJob.PENDING)
+                .order_by('created_at')
+                .values_list('pk', flat=True)
+            )
+            for job_id in pending:
+                if run_job(job_id):
+                    job = IngestJob.objects.get(pk=job_id)
+                    self.stdout.write(f"Job {job_id} ({job.filename}): {job.status}")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0002_dataset_equipment_type_distribution_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('bytes_processed', models.BigIntegerField(default=0)),
+                ('rows_processed', models.BigIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('dataset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='equipment_chem.dataset')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0004_dataset_content_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='is_complete',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='EquipmentRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('type', models.CharField(blank=True, max_length=100)),
+                ('flowrate', models.FloatField(null=True)),
+                ('pressure', models.FloatField(null=True)),
+                ('temperature', models.FloatField(null=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='records', to='equipment_chem.dataset')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['dataset', 'id'], name='record_dataset_id_idx'),
+                    models.Index(fields=['dataset', 'type'], name='record_dataset_type_idx'),
+                    models.Index(fields=['dataset', 'flowrate'], name='record_dataset_flow_idx'),
+                    models.Index(fields=['dataset', 'pressure'], name='record_dataset_press_idx'),
+                    models.Index(fields=['dataset', 'temperature'], name='record_dataset_temp_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0005_dataset_is_complete_equipmentrecord'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dataset',
+            name='uploaded_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
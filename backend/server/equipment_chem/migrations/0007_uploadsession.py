@@ -0,0 +1,26 @@
+# Generated by Django 5.2.10 on 2026-10-18 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0006_alter_dataset_uploaded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_bytes', models.BigIntegerField()),
+                ('chunk_size', models.IntegerField()),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('assembling', 'Assembling')], default='open', max_length=10)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-18 02:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0007_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='column_stats',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.CreateModel(
+            name='DatasetPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appended_at', models.DateTimeField(auto_now_add=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('file_path', models.CharField(db_index=True, max_length=255)),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='equipment_chem.dataset')),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+    ]
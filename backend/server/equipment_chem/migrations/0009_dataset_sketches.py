@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0008_dataset_column_stats_datasetpart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='sketches',
+            field=models.JSONField(default=dict),
+        ),
+    ]
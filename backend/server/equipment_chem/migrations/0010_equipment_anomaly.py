@@ -0,0 +1,41 @@
+# Generated by Django 5.2.10 on 2026-10-18 02:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0009_dataset_sketches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='anomaly_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='type_stats',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.CreateModel(
+            name='EquipmentAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.BigIntegerField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('type', models.CharField(blank=True, max_length=100)),
+                ('field', models.CharField(max_length=20)),
+                ('value', models.FloatField()),
+                ('zscore', models.FloatField(null=True)),
+                ('rules', models.CharField(max_length=40)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='equipment_chem.dataset')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dataset', 'id'], name='anomaly_dataset_id_idx')],
+            },
+        ),
+    ]
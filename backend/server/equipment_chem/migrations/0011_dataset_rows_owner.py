@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 02:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0010_equipment_anomaly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='rows_owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='row_sharers', to='equipment_chem.dataset'),
+        ),
+    ]
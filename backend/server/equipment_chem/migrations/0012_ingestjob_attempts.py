@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_chem', '0011_dataset_rows_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 
 class Dataset(models.Model):
-    uploaded_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
     filename = models.CharField(max_length=255)
 
     total_equipment = models.IntegerField()
@@ -10,6 +10,165 @@ class Dataset(models.Model):
     avg_temperature = models.FloatField()
 
     equipment_type_distribution = models.JSONField(default=dict)
+    # Mergeable per-column statistics (see stats.py), keyed by API field name.
+    column_stats = models.JSONField(default=dict)
+    # Quantile and distinct-name sketches (see sketches.py).
+    sketches = models.JSONField(default=dict)
+    # Per-type statistics behind the anomaly envelopes (see anomalies.py).
+    type_stats = models.JSONField(default=dict)
+    # Rows with at least one reading flagged as anomalous.
+    anomaly_count = models.IntegerField(default=0)
+
+    # Content-addressed upload this summary was computed from.
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    file_path = models.CharField(max_length=255, blank=True)
+    file_size = models.BigIntegerField(default=0)
+    # A re-upload of known content shares the EquipmentRecord and
+    # EquipmentAnomaly rows of the dataset holding them (see records.py).
+    rows_owner = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.DO_NOTHING, related_name='row_sharers',
+    )
+
+    # False while rows are still being ingested; such datasets are hidden.
+    is_complete = models.BooleanField(default=True)
 
     def __str__(self):
         return f"{self.filename} ({self.uploaded_at})"
+
+    @property
+    def rows_id(self):
+        """Id of the dataset this dataset's records and anomalies are stored under."""
+        return self.rows_owner_id or self.pk
+
+
+class DatasetPart(models.Model):
+    """A later upload whose rows were appended to a dataset."""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='parts')
+    appended_at = models.DateTimeField(auto_now_add=True)
+    filename = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64)
+    file_path = models.CharField(max_length=255, db_index=True)
+    file_size = models.BigIntegerField(default=0)
+    rows = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['pk']
+
+    def __str__(self):
+        return f"{self.filename} -> dataset {self.dataset_id}"
+
+
+class EquipmentRecord(models.Model):
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='records')
+    name = models.CharField(max_length=255, blank=True)
+    type = models.CharField(max_length=100, blank=True)
+    flowrate = models.FloatField(null=True)
+    pressure = models.FloatField(null=True)
+    temperature = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [
+            # (dataset, id) serves keyset pagination within a dataset.
+            models.Index(fields=['dataset', 'id'], name='record_dataset_id_idx'),
+            models.Index(fields=['dataset', 'type'], name='record_dataset_type_idx'),
+            models.Index(fields=['dataset', 'flowrate'], name='record_dataset_flow_idx'),
+            models.Index(fields=['dataset', 'pressure'], name='record_dataset_press_idx'),
+            models.Index(fields=['dataset', 'temperature'], name='record_dataset_temp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.type})"
+
+
+class EquipmentAnomaly(models.Model):
+    """A reading outside its type's operating envelope or a threshold rule."""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='anomalies')
+    row = models.BigIntegerField()  # 0-based position of the row in the dataset
+    name = models.CharField(max_length=255, blank=True)
+    type = models.CharField(max_length=100, blank=True)
+    field = models.CharField(max_length=20)
+    value = models.FloatField()
+    zscore = models.FloatField(null=True)
+    rules = models.CharField(max_length=40)  # comma-separated: zscore, iqr, threshold
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset', 'id'], name='anomaly_dataset_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} {self.field}={self.value} ({self.rules})"
+
+
+class IngestJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+
+    total_bytes = models.BigIntegerField(default=0)
+    bytes_processed = models.BigIntegerField(default=0)
+    rows_processed = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # Times a worker has claimed the job; stalled jobs are retried up to
+    # INGEST_MAX_ATTEMPTS (see jobs.recover_stale_jobs).
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    # Set once the job's Dataset is created, so a stalled job's partial rows
+    # can be found; only shown to clients when the job is done.
+    dataset = models.ForeignKey(Dataset, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+
+    @property
+    def percent(self):
+        if self.status == self.DONE:
+            return 100.0
+        if not self.total_bytes:
+            return 0.0
+        return round(min(99.0, 100.0 * self.bytes_processed / self.total_bytes), 1)
+
+    def __str__(self):
+        return f"{self.filename} [{self.status}]"
+
+
+class UploadSession(models.Model):
+    """A file being uploaded as numbered chunks (see ``chunked.py``)."""
+    OPEN = 'open'
+    ASSEMBLING = 'assembling'
+    STATUS_CHOICES = [
+        (OPEN, 'Open'),
+        (ASSEMBLING, 'Assembling'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    filename = models.CharField(max_length=255)
+    total_bytes = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    # SHA-256 of the whole file as sent, if the client declared one.
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+
+    @property
+    def chunks(self):
+        return max(1, -(-self.total_bytes // self.chunk_size))
+
+    def chunk_length(self, index):
+        if index == self.chunks - 1:
+            return self.total_bytes - index * self.chunk_size
+        return self.chunk_size
+
+    def __str__(self):
+        return f"{self.filename} [{self.status}]"
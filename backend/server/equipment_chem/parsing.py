@@ -0,0 +1,103 @@
+import csv
+import io
+
+import pandas as pd
+from django.conf import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; the pandas C engine is the fallback
+    pa = None
+    pa_csv = None
+
+# Declared schema of an equipment export. Numeric columns stay float64 so
+# the stored averages are identical to pandas' default float parsing.
+SCHEMA = {
+    'Equipment Name': 'string',
+    'Type': 'category',
+    'Flowrate': 'float64',
+    'Pressure': 'float64',
+    'Temperature': 'float64',
+}
+
+# The name feeds the distinct-name sketch, so summaries read every column.
+SUMMARY_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+RECORD_COLUMNS = SUMMARY_COLUMNS
+REQUIRED_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+DEFAULT_PYARROW_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+class CSVSchemaError(ValueError):
+    pass
+
+
+def pyarrow_available():
+    return pa_csv is not None
+
+
+def resolve_engine(engine=None):
+    engine = engine or getattr(settings, 'CSV_PARSER_ENGINE', 'auto')
+    if engine == 'auto':
+        return 'pyarrow' if pyarrow_available() else 'c'
+    if engine == 'pyarrow' and not pyarrow_available():
+        raise ImportError("CSV_PARSER_ENGINE is 'pyarrow' but pyarrow is not installed")
+    return engine
+
+
+def read_header(fh):
+    """Return the column names of a CSV and rewind the file."""
+    line = fh.readline()
+    fh.seek(0)
+    if isinstance(line, bytes):
+        line = line.decode('utf-8-sig')
+    return next(csv.reader(io.StringIO(line)), [])
+
+
+def _arrow_type(dtype):
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype == 'string':
+        return pa.string()
+    return pa.from_numpy_dtype(dtype)
+
+
+def _read_pyarrow(fh, columns):
+    block_size = getattr(settings, 'CSV_PYARROW_BLOCK_SIZE', DEFAULT_PYARROW_BLOCK_SIZE)
+    reader = pa_csv.open_csv(
+        fh,
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={col: _arrow_type(SCHEMA[col]) for col in columns},
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _read_pandas(fh, columns, chunksize):
+    dtype = {col: ('object' if SCHEMA[col] == 'string' else SCHEMA[col]) for col in columns}
+    yield from pd.read_csv(fh, usecols=columns, dtype=dtype, chunksize=chunksize, engine='c')
+
+
+def read_csv_chunks(fh, chunksize, columns=SUMMARY_COLUMNS, engine=None):
+    """Yield DataFrame chunks holding only the requested schema columns.
+
+    Optional columns missing from the file (e.g. ``Type``) are skipped;
+    missing ``REQUIRED_COLUMNS`` raise ``CSVSchemaError``. The pandas engine
+    bounds chunks by ``chunksize`` rows, the pyarrow engine by
+    ``CSV_PYARROW_BLOCK_SIZE`` bytes.
+    """
+    header = read_header(fh)
+    missing = [col for col in REQUIRED_COLUMNS if col in columns and col not in header]
+    if missing:
+        raise CSVSchemaError(f"Missing required column(s): {', '.join(missing)}")
+    columns = [col for col in header if col in columns]
+
+    if resolve_engine(engine) == 'pyarrow':
+        yield from _read_pyarrow(fh, columns)
+    else:
+        yield from _read_pandas(fh, columns, chunksize)
@@ -0,0 +1,114 @@
+"""Bulk persistence of per-row equipment records, and sharing them between datasets."""
+from itertools import repeat
+
+from django.db import connection, transaction
+
+from . import anomalies
+from .models import Dataset, EquipmentAnomaly, EquipmentRecord
+
+# CSV column -> (EquipmentRecord field, value stored for missing cells)
+RECORD_FIELDS = {
+    'Equipment Name': ('name', ''),
+    'Type': ('type', ''),
+    'Flowrate': ('flowrate', None),
+    'Pressure': ('pressure', None),
+    'Temperature': ('temperature', None),
+}
+
+
+def _insert_columns():
+    opts = EquipmentRecord._meta
+    fields = ['dataset'] + [field for field, _ in RECORD_FIELDS.values()]
+    return [connection.ops.quote_name(opts.get_field(f).column) for f in fields]
+
+
+class RecordWriter:
+    """Chunk sink that appends rows to ``EquipmentRecord``.
+
+    Uses one ``executemany`` per chunk instead of ``bulk_create`` so no model
+    instances are built; each chunk commits on its own so the write lock is
+    never held for a whole upload.
+    """
+
+    def __init__(self, dataset):
+        self.dataset_id = dataset.pk
+        columns = _insert_columns()
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(EquipmentRecord._meta.db_table),
+            ', '.join(columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+
+    def __call__(self, chunk):
+        n = len(chunk)
+        values = [repeat(self.dataset_id, n)]
+        for col, (_, missing) in RECORD_FIELDS.items():
+            if col not in chunk.columns:
+                values.append(repeat(missing, n))
+                continue
+            series = chunk[col].astype(object)
+            values.append(series.where(series.notna(), missing).tolist())
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(self.sql, zip(*values))
+
+
+def copy_records(source_id, target_id):
+    """Duplicate one dataset's rows onto another with one INSERT ... SELECT."""
+    table = connection.ops.quote_name(EquipmentRecord._meta.db_table)
+    columns = _insert_columns()
+    sql = 'INSERT INTO {table} ({columns}) SELECT %s, {values} FROM {table} WHERE {fk} = %s ORDER BY {pk}'.format(
+        table=table,
+        columns=', '.join(columns),
+        values=', '.join(columns[1:]),
+        fk=columns[0],
+        pk=connection.ops.quote_name(EquipmentRecord._meta.pk.column),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [target_id, source_id])
+
+
+# Datasets re-uploaded from the same content share one set of records and
+# anomalies, stored under the ``rows_owner`` the others point to. Rows are
+# only moved or copied when the owner is deleted or a sharer is appended to.
+
+def _newest_sharer(owner_id, exclude=()):
+    sharers = Dataset.objects.filter(rows_owner=owner_id).exclude(pk__in=exclude)
+    return sharers.order_by('-uploaded_at', '-pk').values_list('pk', flat=True).first()
+
+
+def _promote(owner_id, heir_id):
+    Dataset.objects.filter(rows_owner=owner_id).exclude(pk=heir_id).update(rows_owner=heir_id)
+    Dataset.objects.filter(pk=heir_id).update(rows_owner=None)
+
+
+def hand_over(dataset, deleting=()):
+    """Before ``dataset`` is deleted, move its rows to the newest dataset sharing them.
+
+    Datasets in ``deleting`` go too and are passed over; with no sharer left
+    the rows are deleted along with ``dataset``.
+    """
+    heir = _newest_sharer(dataset.pk, deleting)
+    if heir is None:
+        return
+    EquipmentRecord.objects.filter(dataset=dataset.pk).update(dataset=heir)
+    EquipmentAnomaly.objects.filter(dataset=dataset.pk).update(dataset=heir)
+    _promote(dataset.pk, heir)
+
+
+def unshare(dataset):
+    """Make sure ``dataset``'s rows are its own before they change.
+
+    A sharer gets a copy of the rows; an owner copies them to its newest
+    sharer, which then owns them for the others.
+    """
+    if dataset.rows_owner_id:
+        source, target = dataset.rows_owner_id, dataset.pk
+        dataset.rows_owner = None
+    else:
+        source, target = dataset.pk, _newest_sharer(dataset.pk)
+        if target is None:
+            return
+        _promote(dataset.pk, target)
+    copy_records(source, target)
+    anomalies.copy_anomalies(source, target)
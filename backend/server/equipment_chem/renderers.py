@@ -0,0 +1,37 @@
+import io
+
+import numpy as np
+from rest_framework.renderers import BaseRenderer
+
+
+class NpzRenderer(BaseRenderer):
+    """Render a (nested) dict of arrays as a compressed NumPy ``.npz`` archive.
+
+    Nested keys are joined with dots, so ``{'scatter': {'x': ...}}`` is stored
+    as ``scatter.x``. Load with ``np.load(BytesIO(body))``; no pickling is
+    involved. Error responses fall back to a plain ``{'error': ...}`` archive.
+    Float arrays are stored in single precision, which is plenty for plotting.
+    """
+    media_type = 'application/x-npz'
+    format = 'npz'
+    charset = None
+    render_style = 'binary'
+    float_dtype = np.float32
+
+    def _flatten(self, data, prefix=''):
+        for key, value in data.items():
+            name = f'{prefix}{key}'
+            if isinstance(value, dict):
+                yield from self._flatten(value, f'{name}.')
+            else:
+                value = np.asarray(value)
+                if value.dtype == np.float64:
+                    value = value.astype(self.float_dtype)
+                yield name, value
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **dict(self._flatten(data)))
+        return buffer.getvalue()
@@ -0,0 +1,297 @@
+"""Chart images and PDF reports rendered on the server.
+
+Drawing runs in a small pool of worker processes (``RENDER_WORKERS``) with
+matplotlib's Agg backend, so a slow render never holds the GIL of a request
+thread and matplotlib's global state stays out of the server process. The
+request thread only prepares the reduced plot arrays (``charts.chart_data``,
+memoized on the cached ColumnStore) and ships them to a worker, which
+returns the encoded file.
+
+Output is cached on disk under ``MEDIA_ROOT/renders/<dataset id>/``, named
+by content hash, chart, size and theme. A dataset's directory is removed
+when the dataset is saved again or deleted (see ``signals.py``), and the
+content hash in each name keeps a stale file from ever matching.
+"""
+import io
+import multiprocessing
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+RENDER_DIR = 'renders'
+
+CHARTS = ('distribution', 'scatter', 'density', 'correlation', 'temperature')
+THEMES = {
+    'light': {
+        'bg': '#ffffff', 'fg': '#1a1f3a', 'grid': '#d5d9e0', 'cmap': 'viridis',
+        'accent': ['#0077b6', '#7c4dff', '#d81b60', '#00a152', '#f57c00', '#c62828'],
+    },
+    # The desktop app's palette.
+    'dark': {
+        'bg': '#0a0e27', 'fg': '#e0e6ed', 'grid': '#1a2332', 'cmap': 'magma',
+        'accent': ['#00e5ff', '#7c4dff', '#ff4081', '#00c853', '#ffab00', '#ff5252'],
+    },
+}
+DEFAULT_THEME = 'light'
+
+DEFAULT_WIDTH, DEFAULT_HEIGHT = 800, 500
+MIN_SIZE, MAX_SIZE = 100, 2400
+DPI = 100
+
+# Sizes of the arrays a worker plots from.
+SAMPLE = 5_000
+BINS = 64
+
+_executor = None
+_executor_lock = threading.Lock()
+# Cache path -> Future, so concurrent requests for one file render it once.
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: the server process has threads running.
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'RENDER_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def _reset_executor():
+    # A worker died (e.g. killed for memory); start a fresh pool next time.
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def parse_query(params):
+    """``width``/``height`` in pixels and ``theme`` from request params."""
+    theme = (params.get('theme') or DEFAULT_THEME).lower()
+    if theme not in THEMES:
+        raise ValueError(f"'theme' must be one of {', '.join(THEMES)}")
+    sizes = {}
+    for name, default in (('width', DEFAULT_WIDTH), ('height', DEFAULT_HEIGHT)):
+        raw = params.get(name)
+        try:
+            sizes[name] = default if raw in (None, '') else int(raw)
+        except ValueError:
+            raise ValueError(f"'{name}' must be an integer")
+        if not MIN_SIZE <= sizes[name] <= MAX_SIZE:
+            raise ValueError(f"'{name}' must be between {MIN_SIZE} and {MAX_SIZE}")
+    return {'theme': theme, **sizes}
+
+
+def dataset_dir(dataset_id):
+    return os.path.join(settings.MEDIA_ROOT, RENDER_DIR, str(dataset_id))
+
+
+def cache_path(dataset, name, size, theme, ext):
+    return os.path.join(
+        dataset_dir(dataset.pk), f'{dataset.content_hash[:16]}-{name}-{size}-{theme}.{ext}'
+    )
+
+
+def invalidate(dataset_id):
+    shutil.rmtree(dataset_dir(dataset_id), ignore_errors=True)
+
+
+def summary(dataset):
+    return {
+        'id': dataset.pk,
+        'filename': dataset.filename,
+        'uploaded_at': dataset.uploaded_at.strftime('%Y-%m-%d %H:%M UTC'),
+        'total_equipment': dataset.total_equipment,
+        'avg_flowrate': dataset.avg_flowrate,
+        'avg_pressure': dataset.avg_pressure,
+        'avg_temperature': dataset.avg_temperature,
+        'distribution': dataset.equipment_type_distribution or {},
+    }
+
+
+def _plot_data(dataset, points):
+    from . import analytics, charts
+
+    store = analytics.column_cache.get(dataset)
+    return charts.chart_data(
+        store, dataset.pk, charts=['scatter', 'hist2d', 'correlation', 'temperature'],
+        sample=SAMPLE, bins=BINS, points=points,
+    )
+
+
+def _cached(path, render, *args):
+    """Render into ``path`` in the pool, unless another request already is."""
+    with _pending_lock:
+        future = _pending.get(path)
+        if future is None:
+            future = _pending[path] = get_executor().submit(render, *args)
+    try:
+        try:
+            content = future.result(timeout=getattr(settings, 'RENDER_TIMEOUT', 120))
+        except BrokenProcessPool:
+            _reset_executor()
+            raise
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+    finally:
+        with _pending_lock:
+            if _pending.get(path) is future:
+                del _pending[path]
+    return path
+
+
+def chart_png(dataset, name, width, height, theme):
+    """Path of ``name`` rendered as a ``width`` x ``height`` PNG."""
+    path = cache_path(dataset, name, f'{width}x{height}', theme, 'png')
+    if os.path.exists(path):
+        return path
+    data = None if name == 'distribution' else _plot_data(dataset, points=width)
+    return _cached(path, render_chart, name, summary(dataset), data, width, height, theme)
+
+
+def report_pdf(dataset, theme):
+    """Path of the dataset's A4 PDF report."""
+    path = cache_path(dataset, 'report', 'a4', theme, 'pdf')
+    if os.path.exists(path):
+        return path
+    return _cached(path, render_report, summary(dataset), _plot_data(dataset, points=1000), theme)
+
+
+# Everything below runs in the worker processes.
+
+def _figure(width, height, colors):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(width / DPI, height / DPI), dpi=DPI, facecolor=colors['bg'])
+    ax = fig.add_subplot()
+    ax.set_facecolor(colors['bg'])
+    ax.tick_params(colors=colors['fg'], labelsize=9)
+    for spine in ax.spines.values():
+        spine.set_color(colors['grid'])
+    ax.grid(True, color=colors['grid'], linewidth=0.6)
+    ax.set_axisbelow(True)
+    return fig, ax
+
+
+def _draw(name, info, data, ax, colors):
+    accent = colors['accent']
+    title = {
+        'distribution': 'Equipment type distribution',
+        'scatter': 'Flowrate vs pressure',
+        'density': 'Flowrate vs pressure density',
+        'correlation': 'Parameter correlation',
+        'temperature': 'Temperature by row',
+    }[name]
+    ax.set_title(title, color=colors['fg'], fontsize=12, fontweight='bold')
+
+    if name == 'distribution':
+        types = sorted(info['distribution'], key=info['distribution'].get, reverse=True)
+        counts = [info['distribution'][t] for t in types]
+        ax.bar(types, counts, color=[accent[i % len(accent)] for i in range(len(types))])
+        ax.set_ylabel('Units', color=colors['fg'])
+    elif name == 'scatter':
+        ax.scatter(data['scatter']['x'], data['scatter']['y'], s=4, alpha=0.5, color=accent[0], linewidths=0)
+        ax.set_xlabel('Flowrate', color=colors['fg'])
+        ax.set_ylabel('Pressure', color=colors['fg'])
+    elif name == 'density':
+        hist = data['hist2d']
+        x, y = hist['x_edges'], hist['y_edges']
+        mesh = ax.pcolormesh(x, y, hist['counts'].T, cmap=colors['cmap'])
+        ax.figure.colorbar(mesh, ax=ax).ax.tick_params(colors=colors['fg'], labelsize=8)
+        ax.set_xlabel('Flowrate', color=colors['fg'])
+        ax.set_ylabel('Pressure', color=colors['fg'])
+        ax.grid(False)
+    elif name == 'correlation':
+        labels = [f.capitalize() for f in data['correlation']['fields']]
+        matrix = data['correlation']['matrix']
+        ax.imshow(matrix, cmap='coolwarm', vmin=-1, vmax=1)
+        ax.set_xticks(range(len(labels)), labels)
+        ax.set_yticks(range(len(labels)), labels)
+        for i in range(len(labels)):
+            for j in range(len(labels)):
+                ax.text(j, i, f'{matrix[i, j]:.2f}', ha='center', va='center', color='black', fontsize=9)
+        ax.grid(False)
+    elif name == 'temperature':
+        from matplotlib.ticker import EngFormatter
+
+        series = data['temperature']
+        ax.plot(series['index'], series['values'], color=accent[2], linewidth=0.8)
+        ax.xaxis.set_major_formatter(EngFormatter(sep=''))
+        ax.set_xlabel('Row', color=colors['fg'])
+        ax.set_ylabel('Temperature', color=colors['fg'])
+
+
+def render_chart(name, info, data, width, height, theme, scale=1):
+    """PNG bytes; ``scale`` multiplies the pixel size, keeping the layout."""
+    colors = THEMES[theme]
+    fig, ax = _figure(width, height, colors)
+    _draw(name, info, data, ax, colors)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=DPI * scale, facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+
+def render_report(info, data, theme):
+    from reportlab.lib import colors as pdf_colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    # Paragraph text is reportlab markup; table cells and the title are not.
+    filename = escape(info['filename'])
+    styles = getSampleStyleSheet()
+    rows = [
+        ['Parameter', 'Value'],
+        ['Total equipment', f"{info['total_equipment']:,}"],
+        ['Average flowrate', f"{info['avg_flowrate']:.2f}"],
+        ['Average pressure', f"{info['avg_pressure']:.2f}"],
+        ['Average temperature', f"{info['avg_temperature']:.2f}"],
+    ]
+    rows += [[f'Type: {name}', f'{count:,}'] for name, count in sorted(info['distribution'].items())]
+    table = Table(rows, colWidths=[7 * cm, 5 * cm])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), pdf_colors.HexColor('#1a1f3a')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), pdf_colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.5, pdf_colors.HexColor('#d5d9e0')),
+    ]))
+
+    story = [
+        Paragraph(f'Equipment report: {filename}', styles['Title']),
+        Paragraph(f"Dataset #{info['id']}, uploaded {escape(str(info['uploaded_at']))}", styles['Normal']),
+        Spacer(1, 0.5 * cm),
+        table,
+    ]
+    width, height = 17 * cm, 9 * cm
+    for name in CHARTS:
+        png = render_chart(name, info, data, 680, 360, theme, scale=2)
+        story += [Spacer(1, 0.5 * cm), Image(io.BytesIO(png), width=width, height=height)]
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(
+        buffer, pagesize=A4, title=f"Equipment report: {info['filename']}",
+        leftMargin=2 * cm, rightMargin=2 * cm, topMargin=2 * cm, bottomMargin=2 * cm,
+    ).build(story)
+    return buffer.getvalue()
@@ -0,0 +1,188 @@
+"""Dataset retention: expire datasets by count, age and total size.
+
+Policies come from ``settings.DATASET_RETENTION``. Expired datasets are
+selected with a single windowed query and deleted together; their stored
+CSVs (including appended parts) and derived files are then removed unless
+another dataset (or a queued upload job) still points at the same
+content-addressed blob.
+
+Enforcement runs from ``manage.py enforce_retention`` or from a per-process
+background sweeper, never on the upload request path. The sweeper also
+discards idle resumable-upload sessions and recovers stalled upload jobs.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum, Window
+from django.db.models.functions import RowNumber
+from django.db.models.expressions import RowRange
+from django.utils import timezone
+
+from . import chunked, sidecar
+from .models import Dataset, DatasetPart, IngestJob
+from .uploads import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'MAX_COUNT': 5,
+    'MAX_AGE': None,
+    'MAX_TOTAL_BYTES': None,
+    'SWEEP_INTERVAL': 300,
+    'ORPHAN_GRACE': timedelta(hours=1),
+}
+
+
+def get_policy():
+    return {**DEFAULT_POLICY, **getattr(settings, 'DATASET_RETENTION', {})}
+
+
+def expired_datasets(policy=None, now=None):
+    """Queryset of ``(pk, file_path)`` for every dataset outside the policy."""
+    policy = policy or get_policy()
+    now = now or timezone.now()
+    newest_first = [F('uploaded_at').desc(), F('pk').desc()]
+
+    datasets = Dataset.objects.filter(is_complete=True).annotate(
+        newer_rank=Window(RowNumber(), order_by=newest_first),
+        bytes_through=Window(
+            Sum('file_size'), order_by=newest_first, frame=RowRange(start=None, end=0)
+        ),
+    )
+
+    expired = Q()
+    if policy['MAX_COUNT'] is not None:
+        expired |= Q(newer_rank__gt=policy['MAX_COUNT'])
+    if policy['MAX_AGE'] is not None:
+        expired |= Q(uploaded_at__lt=now - policy['MAX_AGE'])
+    if policy['MAX_TOTAL_BYTES'] is not None:
+        # Keep the newest datasets whose combined size fits in the budget.
+        expired |= Q(bytes_through__gt=policy['MAX_TOTAL_BYTES'])
+    if not expired:
+        return Dataset.objects.none().values_list('pk', 'file_path')
+    return datasets.filter(expired).values_list('pk', 'file_path')
+
+
+def artifact_paths(file_path):
+    """Storage paths derived from a stored upload."""
+    return [file_path, sidecar.sidecar_name(file_path)]
+
+
+def _referenced_paths(paths):
+    used = set(Dataset.objects.filter(file_path__in=paths).values_list('file_path', flat=True))
+    used |= set(DatasetPart.objects.filter(file_path__in=paths).values_list('file_path', flat=True))
+    used |= set(
+        IngestJob.objects.filter(
+            file_path__in=paths, status__in=[IngestJob.PENDING, IngestJob.RUNNING]
+        ).values_list('file_path', flat=True)
+    )
+    return used
+
+
+def _delete_files(paths):
+    freed = 0
+    for path in paths:
+        for artifact in artifact_paths(path):
+            if default_storage.exists(artifact):
+                freed += default_storage.size(artifact)
+                default_storage.delete(artifact)
+    return freed
+
+
+def enforce(policy=None, dry_run=False):
+    """Apply the retention policy. Returns a small report dict."""
+    victims = list(expired_datasets(policy))
+    paths = {path for _, path in victims if path}
+    report = {'datasets': len(victims), 'files': 0, 'bytes': 0}
+    if dry_run or not victims:
+        return report
+
+    # Files appended to a dataset go with it.
+    paths |= set(
+        DatasetPart.objects.filter(dataset__in=[pk for pk, _ in victims]).values_list('file_path', flat=True)
+    )
+    with transaction.atomic():
+        Dataset.objects.filter(pk__in=[pk for pk, _ in victims]).delete()
+
+    unreferenced = paths - _referenced_paths(paths)
+    report['files'] = len(unreferenced)
+    report['bytes'] = _delete_files(unreferenced)
+    return report
+
+
+def sweep_orphans(policy=None, dry_run=False):
+    """Remove files under uploads/ that no dataset or queued job references.
+
+    Files younger than ``ORPHAN_GRACE`` are left alone, since an upload may
+    have been stored but not yet recorded.
+    """
+    policy = policy or get_policy()
+    report = {'files': 0, 'bytes': 0}
+    if not default_storage.exists(UPLOAD_DIR):
+        return report
+    cutoff = timezone.now() - policy['ORPHAN_GRACE']
+    _, files = default_storage.listdir(UPLOAD_DIR)
+
+    candidates = {}
+    for name in files:
+        path = f'{UPLOAD_DIR}/{name}'
+        if default_storage.get_modified_time(path) >= cutoff:
+            continue
+        # A sidecar belongs to the CSV it was derived from.
+        stem, ext = os.path.splitext(path)
+        candidates.setdefault(f'{stem}.csv' if ext == '.parquet' else path, []).append(path)
+
+    used = _referenced_paths(list(candidates))
+    for owner, paths in candidates.items():
+        if owner in used:
+            continue
+        for path in paths:
+            report['files'] += 1
+            report['bytes'] += default_storage.size(path)
+            if not dry_run:
+                default_storage.delete(path)
+    return report
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            report = enforce()
+            if report['datasets']:
+                logger.info("Retention removed %(datasets)d datasets, %(files)d files, %(bytes)d bytes", report)
+            expired = chunked.expire_sessions()
+            if expired:
+                logger.info("Retention discarded %d idle upload sessions", expired)
+            from .jobs import requeue_stale_jobs
+            requeued = requeue_stale_jobs()
+            if requeued:
+                logger.info("Requeued %d stalled upload jobs", len(requeued))
+        except Exception:
+            logger.exception("Retention sweep failed")
+        finally:
+            connection.close()
+
+
+def ensure_sweeper():
+    """Start this process's background retention thread if configured."""
+    global _sweeper
+    interval = get_policy()['SWEEP_INTERVAL']
+    if not interval or _sweeper is not None:
+        return
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(
+                target=_sweep_forever, args=(interval,), name='retention-sweeper', daemon=True
+            )
+            _sweeper.start()
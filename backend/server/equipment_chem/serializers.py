@@ -1,7 +1,59 @@
 from rest_framework import serializers
-from .models import Dataset
+from . import chunked
+from .models import Dataset, EquipmentAnomaly, EquipmentRecord, IngestJob, UploadSession
 
 class DatasetSerializer(serializers.ModelSerializer):
     class Meta:
         model = Dataset
-        fields = '__all__'
+        fields = [
+            'id', 'uploaded_at', 'filename', 'total_equipment',
+            'avg_flowrate', 'avg_pressure', 'avg_temperature',
+            'equipment_type_distribution', 'anomaly_count', 'file_size',
+        ]
+
+
+class IngestJobSerializer(serializers.ModelSerializer):
+    percent = serializers.FloatField(read_only=True)
+    dataset = DatasetSerializer(read_only=True)
+
+    class Meta:
+        model = IngestJob
+        fields = [
+            'id', 'status', 'filename', 'created_at', 'updated_at',
+            'rows_processed', 'bytes_processed', 'total_bytes', 'percent',
+            'error', 'dataset',
+        ]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.status != IngestJob.DONE:
+            # A running job's Dataset is still incomplete.
+            data['dataset'] = None
+        return data
+
+
+class EquipmentRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EquipmentRecord
+        fields = ['id', 'name', 'type', 'flowrate', 'pressure', 'temperature']
+
+
+class EquipmentAnomalySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EquipmentAnomaly
+        fields = ['id', 'row', 'name', 'type', 'field', 'value', 'zscore', 'rules']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunks = serializers.IntegerField(read_only=True)
+    received = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'status', 'filename', 'total_bytes', 'chunk_size', 'chunks',
+            'received', 'sha256', 'created_at', 'updated_at',
+        ]
+
+    def get_received(self, obj):
+        return chunked.received_chunks(obj)
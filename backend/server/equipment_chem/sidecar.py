@@ -0,0 +1,102 @@
+"""Columnar Parquet copies of stored uploads.
+
+Every ingested CSV gets a zstd-compressed Parquet file next to it
+(``uploads/<sha256>.parquet``), written chunk by chunk during ingestion.
+Later reads memory-map that file instead of re-parsing CSV text.
+"""
+import os
+import uuid
+
+import pandas as pd
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .parsing import RECORD_COLUMNS, pa, read_csv_chunks
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def enabled():
+    return pq is not None and getattr(settings, 'WRITE_PARQUET_SIDECAR', True)
+
+
+def sidecar_name(file_path):
+    return os.path.splitext(file_path)[0] + '.parquet'
+
+
+def sidecar_exists(file_path):
+    return pq is not None and bool(file_path) and default_storage.exists(sidecar_name(file_path))
+
+
+def _schema():
+    return pa.schema([
+        ('Equipment Name', pa.string()),
+        ('Type', pa.string()),
+        ('Flowrate', pa.float64()),
+        ('Pressure', pa.float64()),
+        ('Temperature', pa.float64()),
+    ])
+
+
+class SidecarWriter:
+    """Chunk sink that appends each chunk as a Parquet row group.
+
+    Writes to a temporary name and renames on ``close()``, so readers never
+    see a half-written sidecar.
+    """
+
+    def __init__(self, file_path):
+        self.path = default_storage.path(sidecar_name(file_path))
+        # Unique per writer: two requests may ingest the same content at once.
+        self.tmp_path = f'{self.path}.{uuid.uuid4().hex}.tmp'
+        self.schema = _schema()
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression='zstd')
+
+    def __call__(self, chunk):
+        n = len(chunk)
+        arrays = []
+        for field in self.schema:
+            if field.name in chunk.columns:
+                values = chunk[field.name]
+                if field.type == pa.string():
+                    values = values.astype(object)
+                arrays.append(pa.array(values, type=field.type, from_pandas=True))
+            else:
+                arrays.append(pa.nulls(n, type=field.type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def read_table(file_path, columns=RECORD_COLUMNS):
+    """Memory-map the sidecar of ``file_path``; ``Type`` comes back dictionary-encoded."""
+    return pq.read_table(
+        default_storage.path(sidecar_name(file_path)),
+        columns=columns,
+        memory_map=True,
+        read_dictionary=['Type'] if 'Type' in columns else None,
+    )
+
+
+def read_chunks(file_path, chunksize, columns=RECORD_COLUMNS):
+    """DataFrame chunks of a stored upload, from its sidecar when there is one."""
+    if sidecar_exists(file_path):
+        # Names stay Arrow-backed: making a Python string of every one would
+        # be most of the cost of a read.
+        strings = {pa.string(): pd.ArrowDtype(pa.string())}.get
+        for batch in read_table(file_path, columns).to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas(types_mapper=strings)
+    else:
+        with default_storage.open(file_path) as fh:
+            yield from read_csv_chunks(fh, chunksize, columns=columns)
+
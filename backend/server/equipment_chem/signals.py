@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import analytics, history, records, rendering
+from .models import Dataset
+
+
+def _drop_derived(dataset_id):
+    analytics.column_cache.invalidate(dataset_id)
+    rendering.invalidate(dataset_id)
+
+
+# Caches are dropped once the change is committed, so a request running
+# meanwhile can't reload and keep the old state.
+
+@receiver(post_save, sender=Dataset)
+def dataset_saved(sender, instance, created, **kwargs):
+    transaction.on_commit(history.invalidate)
+    if not created:
+        pk = instance.pk
+        transaction.on_commit(lambda: _drop_derived(pk))
+
+
+@receiver(post_delete, sender=Dataset)
+def dataset_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(history.invalidate)
+    transaction.on_commit(lambda: _drop_derived(pk))
+
+
+@receiver(pre_delete, sender=Dataset)
+def dataset_deleting(sender, instance, origin=None, **kwargs):
+    # Rows shared with datasets that stay are handed over before the
+    # cascade deletes this dataset's.
+    deleting = origin.values('pk') if isinstance(origin, QuerySet) and origin.model is Dataset else ()
+    records.hand_over(instance, deleting)
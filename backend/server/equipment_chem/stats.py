@@ -0,0 +1,57 @@
+"""Mergeable summary statistics of one numeric column.
+
+A column's state is a dict of ``count``, ``sum``, ``mean``, ``m2`` (the sum
+of squared deviations from the mean), ``min`` and ``max``. Two states merge
+exactly with Chan et al.'s pairwise update, so statistics can be built up
+chunk by chunk, or extended by an appended file, without revisiting rows
+that were already counted. Missing cells are left out; an empty column has
+``count`` 0 and None for the value fields, so states are JSON-safe.
+"""
+import numpy as np
+
+EMPTY = {'count': 0, 'sum': 0.0, 'mean': None, 'm2': 0.0, 'min': None, 'max': None}
+
+
+def describe(values):
+    """State of a single array of values."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if not n:
+        return dict(EMPTY)
+    total = float(values.sum())
+    mean = total / n
+    deviations = values - mean
+    return {
+        'count': n,
+        'sum': total,
+        'mean': mean,
+        'm2': float(deviations @ deviations),
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+
+
+def merge(a, b):
+    """State of the rows of ``a`` and ``b`` together."""
+    if not b['count']:
+        return dict(a)
+    if not a['count']:
+        return dict(b)
+    n = a['count'] + b['count']
+    total = a['sum'] + b['sum']
+    delta = b['mean'] - a['mean']
+    return {
+        'count': n,
+        'sum': total,
+        'mean': total / n,
+        'm2': a['m2'] + b['m2'] + delta * delta * a['count'] * b['count'] / n,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+    }
+
+
+def variance(state, ddof=1):
+    """Sample variance (``ddof=1``), or None with too few values."""
+    n = state['count']
+    return state['m2'] / (n - ddof) if n > ddof else None
@@ -0,0 +1,1076 @@
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import struct
+import tempfile
+from datetime import timedelta
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock, skipIf
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import backfill, downsample, jobs, rendering, retention, sidecar, sketches, stats
+from .ingest import summarize_csv
+from .models import Dataset, EquipmentRecord, IngestJob
+from .parsing import CSVSchemaError, pyarrow_available, read_csv_chunks
+from .uploads import zstandard
+
+TYPES = ['Pump', 'Valve', 'Reactor', 'Compressor']
+
+
+def make_csv(rows=200, seed=0, missing=0):
+    """Equipment CSV text; ``missing`` cells of each numeric column left empty."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'Equipment Name': [f'EQ-{seed}-{i}' for i in range(rows)],
+        'Type': [TYPES[i % len(TYPES)] for i in range(rows)],
+        'Flowrate': rng.normal(120, 15, rows).round(2),
+        'Pressure': rng.normal(6, 0.8, rows).round(2),
+        'Temperature': rng.normal(110, 10, rows).round(1),
+    })
+    for column in ['Flowrate', 'Pressure', 'Temperature']:
+        frame.loc[rng.choice(rows, missing, replace=False), column] = np.nan
+    return frame.to_csv(index=False)
+
+
+class IngestTestCase(APITestCase):
+    """Runs against a throwaway MEDIA_ROOT, with no background sweeper."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        test_settings = override_settings(
+            MEDIA_ROOT=media_root,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            DATASET_RETENTION={'SWEEP_INTERVAL': None},
+            UPLOAD_ASYNC=False,
+        )
+        test_settings.enable()
+        self.addCleanup(test_settings.disable)
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_user('tester', password='secret'))
+
+    def upload(self, text, name='plant.csv'):
+        return self.client.post('/api/upload/', {'file': SimpleUploadedFile(name, text.encode())}, format='multipart')
+
+
+class StreamedIngestTests(IngestTestCase):
+    def test_chunked_summary_matches_whole_file(self):
+        text = make_csv(rows=503, missing=20)
+        summary = summarize_csv(io.BytesIO(text.encode()), chunksize=37)
+        frame = pd.read_csv(io.StringIO(text))
+
+        self.assertEqual(summary['total_equipment'], 503)
+        self.assertAlmostEqual(summary['avg_flowrate'], frame['Flowrate'].mean())
+        self.assertAlmostEqual(summary['avg_pressure'], frame['Pressure'].mean())
+        self.assertAlmostEqual(summary['avg_temperature'], frame['Temperature'].mean())
+        self.assertEqual(summary['equipment_type_distribution'], frame['Type'].value_counts().to_dict())
+
+    def test_upload_returns_summary(self):
+        response = self.upload(make_csv(rows=120))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_equipment'], 120)
+        self.assertEqual(response.data['equipment_type_distribution'], {name: 30 for name in TYPES})
+        self.assertTrue(Dataset.objects.get(pk=response.data['id']).is_complete)
+
+    def test_upload_without_file(self):
+        response = self.client.post('/api/upload/', {}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unparseable_upload_leaves_no_dataset(self):
+        response = self.upload('Equipment Name,Type\nP-1,Pump\n')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Dataset.objects.exists())
+
+
+class ParsingTests(SimpleTestCase):
+    def read(self, text, engine, **kwargs):
+        chunks = read_csv_chunks(io.BytesIO(text.encode()), 100, engine=engine, **kwargs)
+        return pd.concat(list(chunks), ignore_index=True)
+
+    @skipIf(not pyarrow_available(), 'pyarrow is not installed')
+    def test_engines_agree(self):
+        text = make_csv(rows=500, seed=3, missing=10)
+
+        arrow, pandas_c = self.read(text, 'pyarrow'), self.read(text, 'c')
+
+        # Category order follows first appearance per engine; values must match.
+        pd.testing.assert_frame_equal(arrow, pandas_c, check_categorical=False)
+        self.assertEqual(list(pandas_c.columns), ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'])
+        self.assertEqual(pandas_c['Flowrate'].isna().sum(), 10)
+
+    def test_optional_columns_may_be_missing(self):
+        text = make_csv(rows=50).replace('Equipment Name,Type,', 'Tag,Kind,', 1)
+        for engine in ['c'] + (['pyarrow'] if pyarrow_available() else []):
+            frame = self.read(text, engine)
+            self.assertEqual(list(frame.columns), ['Flowrate', 'Pressure', 'Temperature'], engine)
+
+    def test_missing_required_column(self):
+        text = 'Equipment Name,Type,Flowrate,Temperature\nP-1,Pump,1.0,2.0\n'
+        for engine in ['c'] + (['pyarrow'] if pyarrow_available() else []):
+            with self.assertRaisesMessage(CSVSchemaError, 'Pressure'):
+                self.read(text, engine)
+
+
+@override_settings(INGEST_RUN_IN_PROCESS=False, INGEST_MAX_ATTEMPTS=2)
+class AsyncUploadTests(IngestTestCase):
+    """Jobs are run by calling ``jobs.run_job`` here, as the worker command would."""
+
+    def upload_async(self, text, name='plant.csv'):
+        return self.client.post(
+            '/api/upload/?async=1', {'file': SimpleUploadedFile(name, text.encode())}, format='multipart'
+        )
+
+    def stall(self, job_id, minutes=30):
+        """Make a finished job look like its worker died part-way through."""
+        job = IngestJob.objects.get(pk=job_id)
+        Dataset.objects.filter(pk=job.dataset_id).update(is_complete=False)
+        IngestJob.objects.filter(pk=job_id).update(
+            status=IngestJob.RUNNING, updated_at=timezone.now() - timedelta(minutes=minutes)
+        )
+        return job.dataset_id
+
+    def test_async_upload_returns_job_location(self):
+        response = self.upload_async(make_csv(rows=90))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], IngestJob.PENDING)
+        self.assertEqual(response['Location'], f"/api/jobs/{response.data['id']}/")
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_job_status_reports_finished_dataset(self):
+        job_id = self.upload_async(make_csv(rows=90)).data['id']
+
+        self.assertTrue(jobs.run_job(job_id))
+        self.assertFalse(jobs.run_job(job_id))
+        data = self.client.get(f'/api/jobs/{job_id}/').data
+        self.assertEqual(data['status'], IngestJob.DONE)
+        self.assertEqual(data['percent'], 100.0)
+        self.assertEqual(data['rows_processed'], 90)
+        self.assertEqual(data['dataset']['total_equipment'], 90)
+        self.assertTrue(Dataset.objects.get(pk=data['dataset']['id']).is_complete)
+
+    def test_failed_job_reports_error(self):
+        job_id = self.upload_async('Equipment Name,Type\nP-1,Pump\n').data['id']
+
+        jobs.run_job(job_id)
+
+        data = self.client.get(f'/api/jobs/{job_id}/').data
+        self.assertEqual(data['status'], IngestJob.FAILED)
+        self.assertTrue(data['error'])
+        self.assertIsNone(data['dataset'])
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/jobs/999/').status_code, 404)
+
+    def test_stalled_job_is_requeued_without_its_partial_rows(self):
+        job_id = self.upload_async(make_csv(rows=90)).data['id']
+        jobs.run_job(job_id)
+        partial = self.stall(job_id)
+
+        self.assertEqual(jobs.recover_stale_jobs(), [job_id])
+
+        job = IngestJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, IngestJob.PENDING)
+        self.assertIsNone(job.dataset_id)
+        self.assertFalse(Dataset.objects.filter(pk=partial).exists())
+        self.assertFalse(EquipmentRecord.objects.exists())
+
+        self.assertTrue(jobs.run_job(job_id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (IngestJob.DONE, 2))
+        self.assertEqual(EquipmentRecord.objects.count(), 90)
+
+    def test_stalled_job_fails_after_max_attempts(self):
+        job_id = self.upload_async(make_csv(rows=90)).data['id']
+        jobs.run_job(job_id)
+        IngestJob.objects.filter(pk=job_id).update(attempts=2)
+        self.stall(job_id)
+
+        self.assertEqual(jobs.recover_stale_jobs(), [])
+
+        data = self.client.get(f'/api/jobs/{job_id}/').data
+        self.assertEqual(data['status'], IngestJob.FAILED)
+        self.assertTrue(data['error'])
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_running_job_that_reports_progress_is_left_alone(self):
+        job_id = self.upload_async(make_csv(rows=90)).data['id']
+        jobs.run_job(job_id)
+        dataset_id = self.stall(job_id, minutes=1)
+
+        self.assertEqual(jobs.recover_stale_jobs(), [])
+        self.assertEqual(IngestJob.objects.get(pk=job_id).status, IngestJob.RUNNING)
+        self.assertTrue(Dataset.objects.filter(pk=dataset_id).exists())
+
+
+@skipIf(not sidecar.enabled(), 'pyarrow is not installed')
+class SidecarTests(IngestTestCase):
+    def test_sidecar_reads_back_as_the_csv(self):
+        text = make_csv(rows=700, seed=8, missing=15)
+        file_path = Dataset.objects.get(pk=self.upload(text).data['id']).file_path
+        self.assertTrue(sidecar.sidecar_exists(file_path))
+
+        frame = pd.concat(list(sidecar.read_chunks(file_path, 256)), ignore_index=True)
+
+        expected = pd.read_csv(io.StringIO(text))
+        self.assertEqual(list(frame.columns), list(expected.columns))
+        self.assertEqual(frame['Equipment Name'].astype(str).tolist(), expected['Equipment Name'].tolist())
+        self.assertEqual(frame['Type'].astype(str).tolist(), expected['Type'].tolist())
+        for column in ['Flowrate', 'Pressure', 'Temperature']:
+            np.testing.assert_array_equal(frame[column].to_numpy(), expected[column].to_numpy())
+
+    def test_concurrent_writers_of_one_sidecar(self):
+        file_path = Dataset.objects.get(pk=self.upload(make_csv(rows=30, seed=9)).data['id']).file_path
+        os.remove(default_storage.path(sidecar.sidecar_name(file_path)))
+        chunk = pd.read_csv(io.StringIO(make_csv(rows=30, seed=9)))
+
+        first, second = sidecar.SidecarWriter(file_path), sidecar.SidecarWriter(file_path)
+        self.assertNotEqual(first.tmp_path, second.tmp_path)
+        first(chunk)
+        second(chunk)
+        # One writer giving up must not disturb the other's file.
+        second.abort()
+        self.assertFalse(sidecar.sidecar_exists(file_path))
+        first.close()
+
+        self.assertEqual(sidecar.read_table(file_path).num_rows, 30)
+        leftovers = [name for name in os.listdir(os.path.dirname(first.path)) if name.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+
+
+class DeduplicationTests(IngestTestCase):
+    def test_duplicate_upload_reuses_summary_and_rows(self):
+        text = make_csv(rows=150, seed=1)
+        first = self.upload(text, 'first.csv').data
+        second = self.upload(text, 'second.csv').data
+
+        self.assertNotEqual(first['id'], second['id'])
+        self.assertEqual(second['filename'], 'second.csv')
+        self.assertEqual(second['avg_pressure'], first['avg_pressure'])
+        # The copy shares the original's records rather than duplicating them.
+        self.assertEqual(EquipmentRecord.objects.count(), 150)
+        self.assertEqual(Dataset.objects.get(pk=second['id']).rows_owner_id, first['id'])
+        records = self.client.get(f"/api/datasets/{second['id']}/records/", {'page_size': 500}).data
+        self.assertEqual(len(records['results']), 150)
+
+    def test_other_content_is_ingested_afresh(self):
+        self.upload(make_csv(rows=150, seed=1))
+        self.upload(make_csv(rows=150, seed=2))
+
+        self.assertEqual(EquipmentRecord.objects.count(), 300)
+        self.assertFalse(Dataset.objects.filter(rows_owner__isnull=False).exists())
+
+    def test_deleting_the_original_hands_rows_to_a_copy(self):
+        text = make_csv(rows=80, seed=3)
+        first, second, third = (self.upload(text).data['id'] for _ in range(3))
+
+        Dataset.objects.filter(pk__in=[first, second]).delete()
+
+        self.assertEqual(EquipmentRecord.objects.filter(dataset=third).count(), 80)
+        self.assertIsNone(Dataset.objects.get(pk=third).rows_owner_id)
+        Dataset.objects.get(pk=third).delete()
+        self.assertFalse(EquipmentRecord.objects.exists())
+
+
+class HistoryCacheTests(IngestTestCase):
+    def history(self, **headers):
+        return self.client.get('/api/history/', **headers)
+
+    def test_revalidation_returns_not_modified(self):
+        self.upload(make_csv(rows=40, seed=1))
+        first = self.history()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'])
+        self.assertTrue(first['Last-Modified'])
+        with self.assertNumQueries(0):
+            again = self.history(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_upload_and_delete_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first_id = self.upload(make_csv(rows=40, seed=1)).data['id']
+        before = self.history()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second_id = self.upload(make_csv(rows=40, seed=2)).data['id']
+        after_upload = self.history(HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after_upload.status_code, 200)
+        self.assertEqual([row['id'] for row in after_upload.json()], [second_id, first_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Dataset.objects.get(pk=second_id).delete()
+        after_delete = self.history(HTTP_IF_NONE_MATCH=after_upload['ETag'])
+        self.assertEqual(after_delete.status_code, 200)
+        self.assertEqual([row['id'] for row in after_delete.json()], [first_id])
+
+
+class HistoryPayloadTests(IngestTestCase):
+    def test_compact_rows_for_the_newest_datasets(self):
+        ids = [self.upload(make_csv(rows=20, seed=seed)).data['id'] for seed in range(7)]
+
+        rows = self.client.get('/api/history/').json()
+
+        self.assertEqual([row['id'] for row in rows], ids[::-1][:5])
+        self.assertEqual(set(rows[0]), {
+            'id', 'uploaded_at', 'filename', 'total_equipment',
+            'avg_flowrate', 'avg_pressure', 'avg_temperature', 'anomaly_count',
+        })
+
+    def test_include_distribution(self):
+        self.upload(make_csv(rows=20))
+
+        rows = self.client.get('/api/history/', {'include': 'distribution'}).json()
+
+        self.assertEqual(rows[0]['equipment_type_distribution'], {name: 5 for name in TYPES})
+
+    def test_unknown_include(self):
+        response = self.client.get('/api/history/', {'include': 'records'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('records', response.data['error'])
+
+
+class RecordPaginationTests(IngestTestCase):
+    def setUp(self):
+        super().setUp()
+        self.text = make_csv(rows=150, seed=4, missing=5)
+        self.url = f"/api/datasets/{self.upload(self.text).data['id']}/records/"
+
+    def walk(self, **params):
+        """Every row reached by following ``next`` links from the first page."""
+        rows, response = [], self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            rows += response.data['results']
+            if not response.data['next']:
+                return rows
+            response = self.client.get(response.data['next'])
+
+    def test_pages_cover_every_row_once_in_file_order(self):
+        rows = self.walk(page_size=40)
+        frame = pd.read_csv(io.StringIO(self.text))
+        self.assertEqual([row['name'] for row in rows], list(frame['Equipment Name']))
+
+    def test_ordering_by_a_reading_skips_missing_values(self):
+        rows = self.walk(page_size=25, ordering='-pressure')
+        frame = pd.read_csv(io.StringIO(self.text)).dropna(subset=['Pressure'])
+        expected = frame.sort_values('Pressure', ascending=False, kind='stable')
+        self.assertEqual(len(rows), 145)
+        self.assertEqual([row['pressure'] for row in rows], list(expected['Pressure']))
+        self.assertEqual(len({row['id'] for row in rows}), 145)
+
+    def test_filters(self):
+        rows = self.walk(type='Pump', pressure__gte=6)
+        self.assertTrue(rows)
+        self.assertTrue(all(row['type'] == 'Pump' and row['pressure'] >= 6 for row in rows))
+
+    def test_unknown_ordering(self):
+        self.assertEqual(self.client.get(self.url, {'ordering': 'colour'}).status_code, 400)
+
+
+class RetentionTests(IngestTestCase):
+    def policy(self, **limits):
+        return {**retention.get_policy(), 'MAX_COUNT': None, **limits}
+
+    def upload_seeds(self, *seeds):
+        return [Dataset.objects.get(pk=self.upload(make_csv(rows=50, seed=seed)).data['id']) for seed in seeds]
+
+    def test_keeps_the_newest_datasets_and_removes_their_files(self):
+        old, older, kept, newest = self.upload_seeds(10, 11, 12, 13)
+
+        report = retention.enforce(self.policy(MAX_COUNT=2))
+
+        self.assertEqual(report['datasets'], 2)
+        self.assertEqual(set(Dataset.objects.values_list('pk', flat=True)), {kept.pk, newest.pk})
+        for dataset in (old, older):
+            self.assertFalse(any(default_storage.exists(p) for p in retention.artifact_paths(dataset.file_path)))
+        self.assertTrue(default_storage.exists(kept.file_path))
+        self.assertEqual(EquipmentRecord.objects.count(), 100)
+
+    def test_dry_run_changes_nothing(self):
+        datasets = self.upload_seeds(10, 11, 12)
+
+        report = retention.enforce(self.policy(MAX_COUNT=1), dry_run=True)
+
+        self.assertEqual(report['datasets'], 2)
+        self.assertEqual(Dataset.objects.count(), 3)
+        self.assertTrue(all(default_storage.exists(d.file_path) for d in datasets))
+
+    def test_size_budget(self):
+        datasets = self.upload_seeds(10, 11, 12)
+        budget = datasets[-1].file_size + datasets[-2].file_size
+
+        retention.enforce(self.policy(MAX_TOTAL_BYTES=budget))
+
+        self.assertEqual(set(Dataset.objects.values_list('pk', flat=True)), {d.pk for d in datasets[-2:]})
+
+    def test_blob_and_rows_shared_with_a_kept_dataset_survive(self):
+        text = make_csv(rows=50, seed=20)
+        original = self.upload(text).data['id']
+        self.upload_seeds(21)
+        duplicate = Dataset.objects.get(pk=self.upload(text).data['id'])
+
+        retention.enforce(self.policy(MAX_COUNT=2))
+
+        self.assertFalse(Dataset.objects.filter(pk=original).exists())
+        self.assertTrue(default_storage.exists(duplicate.file_path))
+        self.assertEqual(EquipmentRecord.objects.filter(dataset=duplicate.pk).count(), 50)
+
+
+class AggregateTests(IngestTestCase):
+    def aggregate(self, dataset_id, **params):
+        return self.client.get(f'/api/datasets/{dataset_id}/aggregate/', params)
+
+    def test_grouped_metrics_match_pandas(self):
+        text = make_csv(rows=2000, seed=4, missing=40)
+        dataset_id = self.upload(text).data['id']
+
+        data = self.aggregate(
+            dataset_id, group_by='type', type='Pump,Valve', pressure__gte='5.5',
+            metrics='count,mean,std,p50,p95',
+        ).data
+
+        frame = pd.read_csv(io.StringIO(text))
+        frame = frame[frame['Type'].isin(['Pump', 'Valve']) & (frame['Pressure'] >= 5.5)]
+        self.assertEqual(data['rows_matched'], len(frame))
+        self.assertEqual([row['type'] for row in data['results']], ['Pump', 'Valve'])
+        for row in data['results']:
+            group = frame[frame['Type'] == row['type']]
+            self.assertEqual(row['rows'], len(group))
+            for field, column in [('flowrate', 'Flowrate'), ('pressure', 'Pressure'), ('temperature', 'Temperature')]:
+                values = group[column]
+                self.assertEqual(row[field]['count'], values.count())
+                self.assertAlmostEqual(row[field]['mean'], values.mean())
+                self.assertAlmostEqual(row[field]['std'], values.std())
+                self.assertAlmostEqual(row[field]['p50'], values.quantile(0.5))
+                self.assertAlmostEqual(row[field]['p95'], values.quantile(0.95))
+
+    def test_std_of_small_spread_around_a_large_mean(self):
+        rng = np.random.default_rng(5)
+        frame = pd.DataFrame({
+            'Equipment Name': [f'EQ-{i}' for i in range(1000)],
+            'Type': 'Pump',
+            'Flowrate': 1e9 + rng.normal(0, 0.01, 1000).round(4),
+            'Pressure': 6.0,
+            'Temperature': 100.0,
+        })
+        text = frame.to_csv(index=False)
+        dataset_id = self.upload(text).data['id']
+
+        data = self.aggregate(dataset_id, fields='flowrate', metrics='std').data
+
+        expected = pd.read_csv(io.StringIO(text))['Flowrate'].std()
+        self.assertAlmostEqual(data['results'][0]['flowrate']['std'], expected, delta=expected * 1e-6)
+
+
+class ChartDataTests(IngestTestCase):
+    QUERY = {'charts': 'scatter,hist2d,correlation,temperature', 'sample': 300, 'bins': 16, 'points': 100}
+
+    def setUp(self):
+        super().setUp()
+        self.text = make_csv(rows=1500, seed=10, missing=25)
+        self.dataset_id = self.upload(self.text).data['id']
+        self.url = f'/api/datasets/{self.dataset_id}/chart-data/'
+
+    def test_npz_matches_json(self):
+        data = self.client.get(self.url, self.QUERY).json()
+        response = self.client.get(self.url, {**self.QUERY, 'format': 'npz'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-npz')
+        archive = np.load(io.BytesIO(response.content))
+        self.assertEqual(
+            set(archive.files),
+            {'dataset', 'rows', 'scatter.x', 'scatter.y', 'hist2d.counts', 'hist2d.x_edges', 'hist2d.y_edges',
+             'correlation.fields', 'correlation.matrix', 'temperature.index', 'temperature.values',
+             'temperature.method'},
+        )
+        self.assertEqual(int(archive['rows']), 1500)
+        self.assertEqual(len(data['scatter']['x']), 300)
+        for name in archive.files:
+            chart, _, key = name.partition('.')
+            expected = data[chart][key] if key else data[chart]
+            if archive[name].dtype.kind == 'f':
+                np.testing.assert_allclose(archive[name], expected, rtol=1e-6)
+            else:
+                self.assertEqual(archive[name].tolist(), expected, name)
+        # The histogram counts rows with both a flowrate and a pressure.
+        complete = pd.read_csv(io.StringIO(self.text))[['Flowrate', 'Pressure']].notna().all(axis=1)
+        self.assertEqual(np.sum(data['hist2d']['counts']), complete.sum())
+
+    def test_correlation_matrix(self):
+        data = self.client.get(self.url, {'charts': 'correlation'}).data
+
+        frame = pd.read_csv(io.StringIO(self.text))[['Flowrate', 'Pressure', 'Temperature']].dropna()
+        self.assertEqual(list(data['correlation']['fields']), ['flowrate', 'pressure', 'temperature'])
+        np.testing.assert_allclose(data['correlation']['matrix'], frame.corr().to_numpy(), atol=1e-12)
+
+    def test_revalidation(self):
+        first = self.client.get(self.url, self.QUERY)
+        self.assertTrue(first['ETag'])
+
+        self.assertEqual(self.client.get(self.url, self.QUERY, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        other_query = self.client.get(self.url, {**self.QUERY, 'bins': 32}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other_query.status_code, 200)
+        npz = self.client.get(self.url, {**self.QUERY, 'format': 'npz'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(npz.status_code, 200)
+
+    def test_unknown_chart(self):
+        self.assertEqual(self.client.get(self.url, {'charts': 'pie'}).status_code, 400)
+
+
+def reference_lttb(x, y, threshold):
+    """Textbook Largest-Triangle-Three-Buckets, one point at a time."""
+    every = (len(x) - 2) / (threshold - 2)
+    kept, a = [0], 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        following = range(end, min(int((i + 2) * every) + 1, len(x)))
+        mean_x = sum(x[j] for j in following) / len(following)
+        mean_y = sum(y[j] for j in following) / len(following)
+        areas = [abs((x[a] - mean_x) * (y[j] - y[a]) - (x[a] - x[j]) * (mean_y - y[a])) for j in range(start, end)]
+        a = start + areas.index(max(areas))
+        kept.append(a)
+    return kept + [len(x) - 1]
+
+
+class DownsampleTests(IngestTestCase):
+    def test_lttb_matches_reference(self):
+        y = np.random.default_rng(5).normal(size=1002).cumsum()
+        x = np.arange(len(y), dtype=np.float64)
+        self.assertEqual(downsample.lttb(x, y, 102).tolist(), reference_lttb(x.tolist(), y.tolist(), 102))
+
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        y = np.zeros(5000)
+        y[437] = 50
+        keep = downsample.lttb(np.arange(5000.0), y, 20)
+
+        self.assertEqual(len(keep), 20)
+        self.assertEqual((keep[0], keep[-1]), (0, 4999))
+        self.assertIn(437, keep)
+        self.assertTrue((np.diff(keep) > 0).all())
+
+    def test_short_series_is_kept_whole(self):
+        self.assertEqual(downsample.lttb(np.arange(10.0), np.ones(10), 50).tolist(), list(range(10)))
+
+    def test_minmax_keeps_every_buckets_extremes(self):
+        y = np.random.default_rng(6).normal(size=1000)
+        keep = downsample.minmax(y, 20)
+        self.assertIn(int(y.argmin()), keep)
+        self.assertIn(int(y.argmax()), keep)
+        self.assertLessEqual(len(keep), 20)
+
+    def test_minmax_stays_within_tiny_budgets(self):
+        y = np.random.default_rng(6).normal(size=3000)
+        self.assertLessEqual(len(downsample.minmax(y, 1)), 2)
+        self.assertLessEqual(len(downsample.minmax(y, 3)), 3)
+
+    def test_chart_data_series_respects_one_point(self):
+        dataset = self.upload(make_csv(rows=300, seed=7)).data['id']
+
+        response = self.client.get(
+            f'/api/datasets/{dataset}/chart-data/', {'charts': 'temperature', 'points': 1, 'series': 'minmax'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.data['temperature']['index']), 2)
+
+    def test_chart_data_series_skips_missing_readings(self):
+        text = make_csv(rows=300, seed=7, missing=10)
+        dataset = self.upload(text).data['id']
+
+        response = self.client.get(f'/api/datasets/{dataset}/chart-data/', {'charts': 'temperature', 'points': 40})
+
+        self.assertEqual(response.status_code, 200)
+        series = response.data['temperature']
+        temperature = pd.read_csv(io.StringIO(text))['Temperature']
+        self.assertEqual(len(series['index']), 40)
+        self.assertEqual(list(series['values']), list(temperature[list(series['index'])]))
+        self.assertFalse(temperature[list(series['index'])].isna().any())
+
+
+class CompressedUploadTests(IngestTestCase):
+    def upload_bytes(self, data, name):
+        return self.client.post('/api/upload/', {'file': SimpleUploadedFile(name, data)}, format='multipart')
+
+    def assert_same_as_plain(self, response, text):
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['filename'], 'plant.csv')
+        self.assertEqual(response.data['total_equipment'], 300)
+        dataset = Dataset.objects.get(pk=response.data['id'])
+        self.assertEqual(dataset.content_hash, hashlib.sha256(text.encode()).hexdigest())
+        self.assertEqual(EquipmentRecord.objects.filter(dataset=dataset).count(), 300)
+
+    def test_gzip_upload_is_inflated(self):
+        text = make_csv(rows=300, seed=6)
+        self.assert_same_as_plain(self.upload_bytes(gzip.compress(text.encode()), 'plant.csv.gz'), text)
+
+    @skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_upload_is_inflated(self):
+        text = make_csv(rows=300, seed=7)
+        data = zstandard.ZstdCompressor().compress(text.encode())
+        self.assert_same_as_plain(self.upload_bytes(data, 'plant.csv.zst'), text)
+
+    def test_truncated_gzip_is_rejected(self):
+        data = gzip.compress(make_csv(rows=300, seed=8).encode())
+
+        response = self.upload_bytes(data[:len(data) // 2], 'plant.csv.gz')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Dataset.objects.exists())
+
+    @skipIf(zstandard is None, 'zstandard is not installed')
+    def test_corrupt_zstd_is_rejected(self):
+        data = bytearray(zstandard.ZstdCompressor().compress(make_csv(rows=300, seed=9).encode()))
+        data[:4] = b'junk'
+
+        response = self.upload_bytes(bytes(data), 'plant.csv.zst')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Dataset.objects.exists())
+
+
+class ResumableUploadTests(IngestTestCase):
+    chunk_size = 64 * 1024
+
+    def setUp(self):
+        super().setUp()
+        self.body = make_csv(rows=5000, seed=8).encode()
+        self.sha256 = hashlib.sha256(self.body).hexdigest()
+        self.chunks = [self.body[i:i + self.chunk_size] for i in range(0, len(self.body), self.chunk_size)]
+
+    def open_session(self):
+        return self.client.post('/api/uploads/', {
+            'filename': 'big.csv', 'size': len(self.body), 'sha256': self.sha256, 'chunk_size': self.chunk_size,
+        })
+
+    def put(self, session, index, data=None, **headers):
+        data = self.chunks[index] if data is None else data
+        return self.client.put(
+            f'/api/uploads/{session}/chunks/{index}/', data, content_type='application/octet-stream', headers=headers,
+        )
+
+    def test_upload_resumes_after_reopening_the_session(self):
+        created = self.open_session()
+        self.assertEqual(created.status_code, 201)
+        session = created.data['id']
+        self.assertEqual(created.data['chunks'], len(self.chunks))
+        for index in (2, 0):
+            self.assertEqual(self.put(session, index).status_code, 204)
+
+        resumed = self.open_session()
+        self.assertEqual((resumed.status_code, resumed.data['id']), (200, session))
+        self.assertEqual(resumed.data['received'], [0, 2])
+
+        for index in range(len(self.chunks)):
+            if index not in resumed.data['received']:
+                self.put(session, index)
+        response = self.client.post(f'/api/uploads/{session}/complete/')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_equipment'], 5000)
+        self.assertEqual(response.data['filename'], 'big.csv')
+        self.assertEqual(Dataset.objects.get(pk=response.data['id']).content_hash, self.sha256)
+
+    def test_short_or_corrupt_chunks_are_rejected(self):
+        session = self.open_session().data['id']
+
+        self.assertEqual(self.put(session, 0, self.chunks[0][:-1]).status_code, 400)
+        self.assertEqual(self.put(session, 0, **{'X-Chunk-SHA256': '0' * 64}).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/uploads/{session}/').data['received'], [])
+
+    def test_completing_with_missing_chunks_keeps_the_session_open(self):
+        session = self.open_session().data['id']
+        self.put(session, 0)
+
+        response = self.client.post(f'/api/uploads/{session}/complete/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Missing', response.data['error'])
+        self.assertEqual(self.client.get(f'/api/uploads/{session}/').data['status'], 'open')
+        self.assertFalse(Dataset.objects.exists())
+
+
+class StatsMergeTests(SimpleTestCase):
+    def test_merged_parts_match_the_whole(self):
+        values = np.random.default_rng(9).normal(1e6, 3, 1000)
+        values[::17] = np.nan
+        state = stats.EMPTY
+        for part in np.split(values, [1, 250, 251, 700]):
+            state = stats.merge(state, stats.describe(part))
+
+        present = values[~np.isnan(values)]
+        self.assertEqual(state['count'], len(present))
+        self.assertAlmostEqual(state['mean'], present.mean(), places=6)
+        self.assertAlmostEqual(stats.variance(state), present.var(ddof=1), places=6)
+        self.assertEqual((state['min'], state['max']), (present.min(), present.max()))
+
+    def test_empty_states(self):
+        self.assertEqual(stats.describe([np.nan]), stats.EMPTY)
+        self.assertEqual(stats.merge(stats.EMPTY, stats.describe([2.0])), stats.describe([2.0]))
+        self.assertIsNone(stats.variance(stats.describe([2.0])))
+
+
+class AppendTests(IngestTestCase):
+    def append(self, dataset, text, name='more.csv'):
+        return self.client.post(
+            f'/api/datasets/{dataset}/append/', {'file': SimpleUploadedFile(name, text.encode())}, format='multipart',
+        )
+
+    def test_append_merges_statistics(self):
+        first, second = make_csv(rows=120, seed=10, missing=4), make_csv(rows=80, seed=11)
+        dataset = self.upload(first).data['id']
+
+        response = self.append(dataset, second)
+
+        self.assertEqual(response.status_code, 200)
+        frame = pd.concat([pd.read_csv(io.StringIO(text)) for text in (first, second)])
+        self.assertEqual(response.data['total_equipment'], 200)
+        self.assertAlmostEqual(response.data['avg_flowrate'], frame['Flowrate'].mean())
+        self.assertEqual(response.data['equipment_type_distribution'], frame['Type'].value_counts().to_dict())
+        pressure = Dataset.objects.get(pk=dataset).column_stats['pressure']
+        self.assertAlmostEqual(stats.variance(pressure), frame['Pressure'].var())
+        self.assertEqual(EquipmentRecord.objects.filter(dataset=dataset).count(), 200)
+
+    def test_appended_dataset_no_longer_matches_its_first_upload(self):
+        text = make_csv(rows=60, seed=12)
+        dataset = self.upload(text).data['id']
+        self.append(dataset, make_csv(rows=10, seed=13))
+
+        again = self.upload(text).data
+
+        self.assertEqual(again['total_equipment'], 60)
+        self.assertIsNone(Dataset.objects.get(pk=again['id']).rows_owner_id)
+
+    def test_append_to_a_duplicate_leaves_the_original_alone(self):
+        text = make_csv(rows=60, seed=14)
+        original = self.upload(text).data['id']
+        duplicate = self.upload(text).data['id']
+
+        self.append(duplicate, make_csv(rows=10, seed=15))
+
+        self.assertEqual(EquipmentRecord.objects.filter(dataset=original).count(), 60)
+        self.assertEqual(EquipmentRecord.objects.filter(dataset=duplicate).count(), 70)
+        self.assertEqual(Dataset.objects.get(pk=original).total_equipment, 60)
+
+    def test_unparseable_append_changes_nothing(self):
+        dataset = self.upload(make_csv(rows=30, seed=16)).data
+
+        response = self.append(dataset['id'], 'Equipment Name,Type\nP-1,Pump\n')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Dataset.objects.get(pk=dataset['id']).total_equipment, 30)
+        self.assertEqual(EquipmentRecord.objects.count(), 30)
+
+
+def with_outliers(text, rows):
+    """``text`` with the flowrate of each of ``rows`` (0-based) pushed far out."""
+    frame = pd.read_csv(io.StringIO(text))
+    frame.loc[rows, 'Flowrate'] = 900.0
+    return frame.to_csv(index=False)
+
+
+class AnomalyTests(IngestTestCase):
+    def anomalies(self, dataset, **params):
+        return self.client.get(f'/api/datasets/{dataset}/anomalies/', {'page_size': 5000, **params})
+
+    def test_outliers_are_flagged_by_their_types_envelope(self):
+        dataset = self.upload(with_outliers(make_csv(rows=2000, seed=17), [100, 901])).data
+
+        response = self.anomalies(dataset['id'], field='flowrate')
+
+        self.assertEqual(response.status_code, 200)
+        flagged = {row['row']: row for row in response.data['results']}
+        self.assertEqual((flagged[100]['type'], flagged[901]['type']), ('Pump', 'Valve'))
+        self.assertEqual(flagged[100]['rules'], 'zscore,iqr')
+        self.assertGreater(flagged[100]['zscore'], 4)
+        self.assertGreaterEqual(dataset['anomaly_count'], 2)
+        self.assertEqual(response.data['flagged_rows'], dataset['anomaly_count'])
+        self.assertIn('z_high', response.data['envelopes']['Pump']['flowrate'])
+
+    @override_settings(ANOMALY_DETECTION={'Z_SCORE': 100, 'IQR_FACTOR': 100, 'THRESHOLDS': {'Pump': {'pressure': [None, 6.5]}}})
+    def test_threshold_rules(self):
+        text = make_csv(rows=400, seed=18)
+        dataset = self.upload(text).data
+
+        results = self.anomalies(dataset['id'], rule='threshold').data['results']
+
+        frame = pd.read_csv(io.StringIO(text))
+        expected = frame.index[(frame['Type'] == 'Pump') & (frame['Pressure'] > 6.5)]
+        self.assertEqual([row['row'] for row in results], list(expected))
+        self.assertTrue(all(row['field'] == 'pressure' and row['rules'] == 'threshold' for row in results))
+        self.assertEqual(dataset['anomaly_count'], len(expected))
+
+    def test_appended_rows_are_checked_and_numbered_after_the_existing_ones(self):
+        dataset = self.upload(make_csv(rows=1000, seed=19)).data
+        before = {row['row'] for row in self.anomalies(dataset['id']).data['results']}
+
+        self.client.post(f"/api/datasets/{dataset['id']}/append/", {
+            'file': SimpleUploadedFile('more.csv', with_outliers(make_csv(rows=50, seed=20), [7]).encode()),
+        }, format='multipart')
+
+        after = {row['row'] for row in self.anomalies(dataset['id']).data['results']}
+        self.assertIn(1007, after - before)
+        self.assertTrue(before <= after)
+
+    def test_duplicate_upload_shares_flags(self):
+        text = with_outliers(make_csv(rows=500, seed=21), [3])
+        first = self.upload(text).data
+        second = self.upload(text).data
+
+        self.assertEqual(second['anomaly_count'], first['anomaly_count'])
+        self.assertEqual(self.anomalies(second['id']).data['results'], self.anomalies(first['id']).data['results'])
+
+    def test_unknown_rule(self):
+        dataset = self.upload(make_csv(rows=50, seed=22)).data
+        self.assertEqual(self.anomalies(dataset['id'], rule='spike').status_code, 400)
+
+
+class BackfillTests(IngestTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir, ignore_errors=True)
+
+    def write_sources(self, *seeds, rows=60):
+        for seed in seeds:
+            with open(os.path.join(self.source_dir, f'export-{seed}.csv'), 'w') as fh:
+                fh.write(make_csv(rows=rows, seed=seed))
+
+    def ingest_csv(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('ingest_csv', self.source_dir, '--workers', '0', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_backfills_a_directory(self):
+        self.write_sources(1, 2, 3)
+        # Same content as export-1.csv, compressed.
+        with gzip.open(os.path.join(self.source_dir, 'again.csv.gz'), 'wt') as fh:
+            fh.write(make_csv(rows=60, seed=1))
+
+        self.ingest_csv('--batch-size', '2')
+
+        self.assertEqual(Dataset.objects.filter(is_complete=True).count(), 4)
+        self.assertEqual(sorted(Dataset.objects.values_list('filename', flat=True)),
+                         ['again.csv', 'export-1.csv', 'export-2.csv', 'export-3.csv'])
+        # The repeated content is stored once.
+        self.assertEqual(EquipmentRecord.objects.count(), 180)
+        first, again = Dataset.objects.get(filename='export-1.csv'), Dataset.objects.get(filename='again.csv')
+        self.assertEqual(first.rows_id, again.rows_id)
+        self.assertEqual(again.total_equipment, 60)
+
+    def test_failed_batch_only_fails_its_bad_file(self):
+        self.write_sources(1, 2, 3)
+        save = backfill.anomalies.save
+
+        def failing_save(dataset_id, readings):
+            if Dataset.objects.get(pk=dataset_id).filename == 'export-2.csv':
+                raise RuntimeError('disk full')
+            save(dataset_id, readings)
+
+        with mock.patch.object(backfill.anomalies, 'save', side_effect=failing_save):
+            with self.assertRaisesMessage(CommandError, '1 of 3 files failed'):
+                self.ingest_csv()
+
+        self.assertEqual(sorted(Dataset.objects.values_list('filename', flat=True)), ['export-1.csv', 'export-3.csv'])
+        self.assertEqual(EquipmentRecord.objects.count(), 120)
+
+    @override_settings(DATASET_RETENTION={'SWEEP_INTERVAL': None, 'MAX_COUNT': 2})
+    def test_refuses_more_files_than_retention_keeps(self):
+        self.write_sources(1, 2, 3)
+
+        with self.assertRaisesMessage(CommandError, 'MAX_COUNT=2'):
+            self.ingest_csv()
+        self.assertFalse(Dataset.objects.exists())
+
+        _, err = self.ingest_csv('--allow-expiry')
+        self.assertIn('MAX_COUNT=2', err)
+        self.assertEqual(Dataset.objects.count(), 3)
+
+
+@override_settings(RENDER_WORKERS=1)
+class RenderingTests(IngestTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        if rendering._executor is not None:
+            rendering._executor.shutdown()
+            rendering._reset_executor()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dataset_id = self.upload(make_csv(rows=400, seed=23)).data['id']
+
+    def fetch(self, url, params=None, **headers):
+        response = self.client.get(url, params, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_chart_png(self):
+        response, body = self.fetch(f'/api/datasets/{self.dataset_id}/charts/scatter.png', {'width': 400, 'height': 300})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(body[:8], b'\x89PNG\r\n\x1a\n')
+        self.assertEqual(struct.unpack('>II', body[16:24]), (400, 300))
+
+    def test_report_pdf(self):
+        response, body = self.fetch(f'/api/datasets/{self.dataset_id}/report.pdf')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('plant-report.pdf', response['Content-Disposition'])
+        self.assertTrue(body.startswith(b'%PDF'))
+
+    def test_cached_render_is_served_without_the_pool(self):
+        url = f'/api/datasets/{self.dataset_id}/charts/distribution.png'
+        first, body = self.fetch(url)
+
+        with mock.patch.object(rendering, 'get_executor', side_effect=AssertionError('rendered again')):
+            again, cached = self.fetch(url)
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(cached, body)
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_append_invalidates_renders(self):
+        url = f'/api/datasets/{self.dataset_id}/charts/distribution.png'
+        first, _ = self.fetch(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/datasets/{self.dataset_id}/append/', {
+                'file': SimpleUploadedFile('more.csv', make_csv(rows=40, seed=24).encode()),
+            }, format='multipart')
+        self.assertFalse(os.path.exists(rendering.dataset_dir(self.dataset_id)))
+
+        second, _ = self.fetch(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_unknown_chart(self):
+        response = self.client.get(f'/api/datasets/{self.dataset_id}/charts/pie.png')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('pie', response.json()['error'])
+
+    def test_broken_pool(self):
+        pool = mock.Mock()
+        pool.submit.return_value.result.side_effect = BrokenProcessPool()
+
+        with mock.patch.object(rendering, 'get_executor', return_value=pool), \
+                mock.patch.object(rendering, '_reset_executor') as reset:
+            response = self.client.get(f'/api/datasets/{self.dataset_id}/charts/scatter.png')
+
+        self.assertEqual(response.status_code, 503)
+        reset.assert_called_once()
+
+
+def rank_errors(sorted_values, estimates, qs):
+    """How far each estimate's true rank fraction is from the one asked for."""
+    ranks = np.searchsorted(sorted_values, estimates, side='right') / len(sorted_values)
+    return np.abs(ranks - np.asarray(qs))
+
+
+class SketchTests(SimpleTestCase):
+    # Both sketches are randomized; these bounds are about twice the worst
+    # error seen over many seeds.
+    RANK_TOLERANCE = 0.025
+    DISTINCT_TOLERANCE = 0.03
+    QS = np.linspace(0.01, 0.99, 99)
+
+    def test_kll_rank_error(self):
+        values = np.random.default_rng(0).lognormal(3, 1, 100_000)
+        sketch = sketches.KLLSketch()
+        for chunk in np.array_split(values, 100):
+            sketch.update(chunk)
+
+        self.assertEqual(sketch.n, len(values))
+        self.assertLess(sum(len(level) for level in sketch.levels), 1000)
+        errors = rank_errors(np.sort(values), sketch.quantiles(self.QS), self.QS)
+        self.assertLess(errors.max(), self.RANK_TOLERANCE)
+        self.assertEqual(sketch.quantiles([0, 1]), [values.min(), values.max()])
+
+    def test_kll_merge_summarizes_both_inputs(self):
+        rng = np.random.default_rng(1)
+        low, high = rng.normal(10, 2, 40_000), rng.normal(50, 5, 60_000)
+        left, right = sketches.KLLSketch(), sketches.KLLSketch()
+        left.update(low)
+        right.update(np.append(high, np.nan))
+
+        merged = sketches.KLLSketch.from_dict(left.to_dict()).merge(right)
+
+        self.assertEqual(merged.n, 100_000)
+        self.assertEqual((merged.min, merged.max), (low.min(), high.max()))
+        errors = rank_errors(np.sort(np.concatenate([low, high])), merged.quantiles(self.QS), self.QS)
+        self.assertLess(errors.max(), self.RANK_TOLERANCE)
+
+    def test_hll_distinct_count(self):
+        names = [f'EQ-{i}' for i in range(4000)]
+        hll = sketches.HyperLogLog()
+        hll.update(names * 3)
+
+        self.assertAlmostEqual(hll.count(), 4000, delta=4000 * self.DISTINCT_TOLERANCE)
+
+    def test_hll_merge_counts_the_union(self):
+        left, right = sketches.HyperLogLog(), sketches.HyperLogLog()
+        left.update([f'EQ-{i}' for i in range(0, 30_000)])
+        right.update([f'EQ-{i}' for i in range(20_000, 50_000)])
+
+        merged = sketches.HyperLogLog.from_dict(left.to_dict()).merge(right)
+
+        self.assertAlmostEqual(merged.count(), 50_000, delta=50_000 * self.DISTINCT_TOLERANCE)
+
+    def test_empty_sketches(self):
+        self.assertEqual(sketches.KLLSketch().quantiles([0.5]), [None])
+        self.assertEqual(sketches.HyperLogLog().count(), 0)
+
+
+class QuantilesTests(IngestTestCase):
+    def test_quantiles_across_datasets(self):
+        texts = [make_csv(rows=3000, seed=25), make_csv(rows=2000, seed=26, missing=50)]
+        ids = [self.upload(text).data['id'] for text in texts]
+
+        data = self.client.get('/api/quantiles/', {
+            'datasets': ','.join(map(str, ids)), 'fields': 'pressure', 'q': '0.1,0.5,0.95',
+        }).data
+
+        frame = pd.concat([pd.read_csv(io.StringIO(text)) for text in texts])
+        pressure = np.sort(frame['Pressure'].dropna().to_numpy())
+        result = data['results']['pressure']
+        self.assertEqual(data['rows'], 5000)
+        self.assertEqual(result['count'], len(pressure))
+        self.assertEqual(list(result['quantiles']), ['0.1', '0.5', '0.95'])
+        errors = rank_errors(pressure, list(result['quantiles'].values()), [0.1, 0.5, 0.95])
+        self.assertLess(errors.max(), SketchTests.RANK_TOLERANCE)
+        distinct = frame['Equipment Name'].nunique()
+        self.assertAlmostEqual(data['distinct_names'], distinct, delta=distinct * SketchTests.DISTINCT_TOLERANCE)
+
+    def test_unknown_dataset(self):
+        dataset_id = self.upload(make_csv(rows=50)).data['id']
+
+        response = self.client.get('/api/quantiles/', {'datasets': f'{dataset_id},999'})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('999', response.data['error'])
+
+    def test_bad_query(self):
+        for params in [{}, {'datasets': 'a'}, {'datasets': '1', 'q': '1.5'}, {'datasets': '1', 'fields': 'depth'}]:
+            self.assertEqual(self.client.get('/api/quantiles/', params).status_code, 400, params)
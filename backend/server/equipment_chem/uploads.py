@@ -0,0 +1,160 @@
+"""Content-addressed storage for uploaded CSVs."""
+import hashlib
+import zlib
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler, MemoryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; only .zst uploads need it
+    zstandard = None
+
+UPLOAD_DIR = 'uploads'
+
+# Upload codecs by file suffix and by part Content-Type.
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+COMPRESSION_TYPES = {
+    'application/gzip': 'gzip',
+    'application/x-gzip': 'gzip',
+    'application/zstd': 'zstd',
+}
+
+
+def upload_codec(file_name, content_type=None):
+    """``'gzip'``, ``'zstd'`` or None for an uploaded file."""
+    for suffix, codec in COMPRESSION_SUFFIXES.items():
+        if (file_name or '').lower().endswith(suffix):
+            return codec
+    return COMPRESSION_TYPES.get((content_type or '').lower())
+
+
+def plain_name(file_name):
+    """The upload's name without a compression suffix (``a.csv.gz`` -> ``a.csv``)."""
+    for suffix in COMPRESSION_SUFFIXES:
+        if file_name.lower().endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+def _gzip_decompressor():
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def _zstd_decompressor():
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+DECOMPRESSORS = {'gzip': _gzip_decompressor, 'zstd': _zstd_decompressor}
+DECOMPRESS_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard else ())
+
+
+class _Inflater:
+    """Incremental decompression of a stream of concatenated gzip members
+    or zstd frames, which ``gzip -d`` and ``zstd -d`` also accept."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.decompressor = factory()
+
+    def decompress(self, data):
+        out = []
+        while data:
+            out.append(self.decompressor.decompress(data))
+            data = self.decompressor.unused_data
+            if data:
+                self.decompressor = self.factory()
+        return b''.join(out)
+
+    @property
+    def eof(self):
+        return self.decompressor.eof
+
+
+class DecompressingUploadHandler(FileUploadHandler):
+    """Inflate ``.gz``/``.zst`` uploads while their chunks stream in.
+
+    Must run first: every handler after it (hashing, storage) sees the plain
+    CSV, so a compressed upload hashes, dedupes and parses exactly like the
+    uncompressed file. Other uploads pass through untouched.
+    """
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+        codec = upload_codec(file_name, content_type)
+        if codec == 'zstd' and zstandard is None:
+            raise MultiPartParserError('zstd uploads need the zstandard package on the server')
+        self.stream = _Inflater(DECOMPRESSORS[codec]) if codec else None
+        if self.stream is not None and self.request is not None:
+            # The compressed size says nothing about the inflated size, so
+            # never hold an inflated upload in memory; spool it to disk.
+            for handler in self.request.upload_handlers:
+                if isinstance(handler, MemoryFileUploadHandler):
+                    handler.activated = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.stream is None:
+            return raw_data
+        try:
+            return self.stream.decompress(raw_data)
+        except DECOMPRESS_ERRORS as e:
+            raise MultiPartParserError(f"Could not decompress '{self.file_name}': {e}")
+
+    def file_complete(self, file_size):
+        if self.stream is not None and not self.stream.eof:
+            raise MultiPartParserError(f"'{self.file_name}' is truncated")
+        return None
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Hash each uploaded file while its chunks stream in.
+
+    Runs ahead of Django's memory/temporary-file handlers and passes every
+    chunk through untouched; the digest lands in ``request.upload_hashes``
+    keyed by form field name.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.request is not None:
+            if not hasattr(self.request, 'upload_hashes'):
+                self.request.upload_hashes = {}
+            self.request.upload_hashes[self.field_name] = self.hasher.hexdigest()
+        return None
+
+
+def upload_digest(request, field_name, file):
+    """SHA-256 of an uploaded file, computed by the upload handler if possible."""
+    digest = getattr(request, 'upload_hashes', {}).get(field_name)
+    if digest:
+        return digest
+
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def blob_path(digest):
+    return f'{UPLOAD_DIR}/{digest}.csv'
+
+
+def store_upload(file, digest):
+    """Store one copy of the upload under its content hash and return its path."""
+    path = blob_path(digest)
+    if not default_storage.exists(path):
+        saved = default_storage.save(path, file)
+        if saved != path:
+            # Another request stored the same bytes first; keep theirs.
+            default_storage.delete(saved)
+    return path
+
@@ -1,7 +1,24 @@
 from django.urls import path
-from .views import UploadCSVView, DatasetHistoryView
+from .views import (
+    UploadCSVView, DatasetHistoryView, DatasetRecordsView, DatasetAggregateView, DatasetChartDataView,
+    JobStatusView, UploadSessionCreateView, UploadSessionView, UploadChunkView, UploadSessionCompleteView,
+    DatasetChartImageView, DatasetReportView, DatasetAppendView, QuantilesView, DatasetAnomaliesView,
+)
 
 urlpatterns = [
     path("upload/", UploadCSVView.as_view(), name="upload_csv"),
+    path("uploads/", UploadSessionCreateView.as_view(), name="upload_session_create"),
+    path("uploads/<int:pk>/", UploadSessionView.as_view(), name="upload_session"),
+    path("uploads/<int:pk>/chunks/<int:index>/", UploadChunkView.as_view(), name="upload_chunk"),
+    path("uploads/<int:pk>/complete/", UploadSessionCompleteView.as_view(), name="upload_session_complete"),
     path("history/", DatasetHistoryView.as_view(), name="dataset_history"),
+    path("quantiles/", QuantilesView.as_view(), name="quantiles"),
+    path("jobs/<int:pk>/", JobStatusView.as_view(), name="job_status"),
+    path("datasets/<int:pk>/append/", DatasetAppendView.as_view(), name="dataset_append"),
+    path("datasets/<int:pk>/records/", DatasetRecordsView.as_view(), name="dataset_records"),
+    path("datasets/<int:pk>/anomalies/", DatasetAnomaliesView.as_view(), name="dataset_anomalies"),
+    path("datasets/<int:pk>/aggregate/", DatasetAggregateView.as_view(), name="dataset_aggregate"),
+    path("datasets/<int:pk>/chart-data/", DatasetChartDataView.as_view(), name="dataset_chart_data"),
+    path("datasets/<int:pk>/charts/<str:name>.png", DatasetChartImageView.as_view(), name="dataset_chart_image"),
+    path("datasets/<int:pk>/report.pdf", DatasetReportView.as_view(), name="dataset_report"),
 ]
@@ -1,12 +1,70 @@
-import pandas as pd
+import os
+from concurrent.futures.process import BrokenProcessPool
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
-from django.core.files.storage import default_storage
-from rest_framework.permissions import IsAuthenticated 
+from rest_framework import generics, status
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.pagination import CursorPagination
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+
+from . import analytics, anomalies, charts, chunked, history, jobs, rendering, sketches
+from .ingest import append_file, ensure_sketches, ingest_cached, ingest_file
+from .models import Dataset, EquipmentAnomaly, EquipmentRecord, IngestJob, UploadSession
+from .renderers import NpzRenderer
+from .serializers import (
+    DatasetSerializer, EquipmentAnomalySerializer, EquipmentRecordSerializer, IngestJobSerializer,
+    UploadSessionSerializer,
+)
+from .uploads import plain_name, store_upload, upload_digest
+
+
+def wants_async(request):
+    value = request.query_params.get('async')
+    if value is None:
+        return getattr(settings, 'UPLOAD_ASYNC', False)
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def ingest_upload(request, filename, digest, file_path, file_size):
+    """Response for a stored upload: a cached summary, a queued job or a fresh ingest."""
+    dataset = ingest_cached(digest, filename, file_path, file_size)
+    if dataset is not None:
+        return Response(
+            DatasetSerializer(dataset).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    if wants_async(request):
+        job = IngestJob.objects.create(
+            filename=filename,
+            file_path=file_path,
+            content_hash=digest,
+            total_bytes=file_size,
+        )
+        jobs.enqueue(job)
+        return Response(
+            IngestJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('job_status', args=[job.pk])},
+        )
 
-from .models import Dataset
-from .serializers import DatasetSerializer
+    try:
+        dataset = ingest_file(file_path, filename, content_hash=digest, file_size=file_size)
+    except ValueError as e:
+        return Response({'error': f'Could not parse CSV: {e}'}, status=400)
+
+    return Response(
+        DatasetSerializer(dataset).data,
+        status=status.HTTP_201_CREATED
+    )
 
 
 class UploadCSVView(APIView):
@@ -17,39 +75,333 @@ class UploadCSVView(APIView):
         if not file:
             return Response({'error': 'No file uploaded'}, status=400)
 
-        file_path = default_storage.save(f'uploads/{file.name}', file)
-        df = pd.read_csv(default_storage.open(file_path))
+        # Compressed uploads arrive inflated (DecompressingUploadHandler).
+        filename = plain_name(file.name)
+        digest = upload_digest(request, 'file', file)
+        file_path = store_upload(file, digest)
+        return ingest_upload(request, filename, digest, file_path, file.size or 0)
 
-       
-        equipment_type_distribution = (
-            df['Type']
-            .value_counts()
-            .to_dict()
-            if 'Type' in df.columns
-            else {}
-        )
 
-        dataset = Dataset.objects.create(
-            filename=file.name,
-            total_equipment=len(df),
-            avg_flowrate=df['Flowrate'].mean(),
-            avg_pressure=df['Pressure'].mean(),
-            avg_temperature=df['Temperature'].mean(),
-            equipment_type_distribution=equipment_type_distribution,  
-        )
+class DatasetAppendView(APIView):
+    """Append a CSV's rows to an existing dataset; only the new file is read."""
+    permission_classes = [IsAuthenticated]
+    def post(self, request, pk):
+        dataset = get_object_or_404(Dataset, pk=pk, is_complete=True)
+        file = request.FILES.get('file')
+
+        if not file:
+            return Response({'error': 'No file uploaded'}, status=400)
 
-       
-        if Dataset.objects.count() > 5:
-            Dataset.objects.order_by('uploaded_at').first().delete()
+        digest = upload_digest(request, 'file', file)
+        file_path = store_upload(file, digest)
+        try:
+            dataset = append_file(dataset, file_path, plain_name(file.name), content_hash=digest, file_size=file.size or 0)
+        except ValueError as e:
+            return Response({'error': f'Could not parse CSV: {e}'}, status=400)
+        return Response(DatasetSerializer(dataset).data)
 
+
+class UploadSessionCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            session, created = chunked.open_session(request.data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
         return Response(
-            DatasetSerializer(dataset).data,
-            status=status.HTTP_201_CREATED
+            UploadSessionSerializer(session).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class UploadSessionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk)
+        return Response(UploadSessionSerializer(session).data)
+
+    def delete(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk, status=UploadSession.OPEN)
+        chunked.discard(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadChunkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, pk, index):
+        session = get_object_or_404(UploadSession, pk=pk, status=UploadSession.OPEN)
+        try:
+            # The raw body is the chunk; it is never parsed as form data.
+            chunked.save_chunk(session, index, request.stream, request.headers.get('X-Chunk-SHA256'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk)
+        # Only one request may assemble a session.
+        claimed = UploadSession.objects.filter(pk=pk, status=UploadSession.OPEN).update(
+            status=UploadSession.ASSEMBLING
         )
+        if not claimed:
+            return Response({'error': 'Upload is already being completed'}, status=409)
+
+        try:
+            file, digest = chunked.assemble(session)
+        except ValueError as e:
+            UploadSession.objects.filter(pk=pk).update(status=UploadSession.OPEN)
+            return Response({'error': str(e)}, status=400)
+
+        with file:
+            file_path = store_upload(file, digest)
+            file_size = file.size
+        chunked.discard(session)
+        return ingest_upload(request, session.filename, digest, file_path, file_size)
+
+
+class JobStatusView(APIView):
+    def get(self, request, pk):
+        job = get_object_or_404(IngestJob, pk=pk)
+        return Response(IngestJobSerializer(job).data)
+
+
+# ?ordering= values for records; each is served by a (dataset, column) index.
+# Not type: with a handful of distinct values the cursor would degrade into
+# an OFFSET within each type.
+RECORD_ORDERINGS = ('id', *analytics.METRIC_FIELDS)
+
+
+def parse_record_ordering(value):
+    """``(column, 'id')`` for ``?ordering=`` such as ``-pressure``; ``id`` breaks ties."""
+    value = (value or 'id').strip().lower()
+    field = value.lstrip('-')
+    if field not in RECORD_ORDERINGS:
+        raise ValueError(f"ordering must be one of: {', '.join(RECORD_ORDERINGS)}")
+    prefix = '-' if value.startswith('-') else ''
+    return (value,) if field == 'id' else (value, f'{prefix}id')
+
+
+class RecordCursorPagination(CursorPagination):
+    # Keyset pagination: each page is an indexed range scan
+    # (dataset_id, column > cursor) rather than an OFFSET.
+    ordering = 'id'
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'ordering', None) or (self.ordering,)
+
+
+class DatasetRecordsView(generics.ListAPIView):
+    serializer_class = EquipmentRecordSerializer
+    pagination_class = RecordCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        try:
+            self.ordering = parse_record_ordering(request.query_params.get('ordering'))
+            self.filters = analytics.parse_filters(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        dataset = get_object_or_404(Dataset, pk=self.kwargs['pk'], is_complete=True)
+        records = EquipmentRecord.objects.filter(dataset=dataset.rows_id)
+        types = analytics.parse_types(self.request.query_params)
+        if types:
+            records = records.filter(type__in=types)
+        for field, op, value in self.filters:
+            records = records.filter(**{f'{analytics.METRIC_FIELDS[field]}__{op}': value})
+        field = self.ordering[0].lstrip('-')
+        if field in analytics.METRIC_FIELDS:
+            # A cursor can't point at a NULL, so rows without a reading are
+            # left out of a listing sorted by that reading.
+            records = records.filter(**{f'{analytics.METRIC_FIELDS[field]}__isnull': False})
+        return records
+
+
+class DatasetAnomaliesView(generics.ListAPIView):
+    """Flagged readings in row order, with the per-type envelopes they were checked against."""
+    serializer_class = EquipmentAnomalySerializer
+    pagination_class = RecordCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        self.dataset = get_object_or_404(Dataset, pk=self.kwargs['pk'], is_complete=True)
+        field = request.query_params.get('field')
+        if field and field not in analytics.METRIC_FIELDS:
+            return Response({'error': f"Unknown field '{field}'"}, status=400)
+        rule = request.query_params.get('rule')
+        if rule and rule not in anomalies.RULES.values():
+            return Response({'error': f"rule must be one of: {', '.join(anomalies.RULES.values())}"}, status=400)
+
+        response = super().list(request, *args, **kwargs)
+        envelopes = anomalies.TypeStats.from_dict(self.dataset.type_stats).envelopes(anomalies.get_rules())
+        response.data = {
+            'dataset': self.dataset.pk,
+            'flagged_rows': self.dataset.anomaly_count,
+            'envelopes': envelopes,
+            **response.data,
+        }
+        return response
+
+    def get_queryset(self):
+        flagged = EquipmentAnomaly.objects.filter(dataset=self.dataset.rows_id)
+        types = analytics.parse_types(self.request.query_params)
+        if types:
+            flagged = flagged.filter(type__in=types)
+        field = self.request.query_params.get('field')
+        if field:
+            flagged = flagged.filter(field=field)
+        rule = self.request.query_params.get('rule')
+        if rule:
+            flagged = flagged.filter(rules__contains=rule)
+        return flagged
+
+
+class DatasetAggregateView(APIView):
+    def get(self, request, pk):
+        dataset = get_object_or_404(Dataset, pk=pk, is_complete=True)
+        try:
+            query = analytics.parse_query(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        store = analytics.column_cache.get(dataset)
+        result = analytics.aggregate(store, **query)
+        return Response({'dataset': dataset.pk, 'group_by': 'type' if query['group_by_type'] else None, **result})
+
+
+class QuantilesView(APIView):
+    """Approximate percentiles and distinct names over one or more datasets, from their sketches."""
+    def get(self, request):
+        try:
+            query = sketches.parse_query(request.query_params, analytics.METRIC_FIELDS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        datasets = list(Dataset.objects.filter(pk__in=query['datasets'], is_complete=True))
+        missing = set(query['datasets']) - {dataset.pk for dataset in datasets}
+        if missing:
+            return Response({'error': f"Unknown dataset(s): {', '.join(map(str, sorted(missing)))}"}, status=404)
+
+        combined = sketches.combine(ensure_sketches(dataset) for dataset in datasets)
+        results = {}
+        for field in query['fields']:
+            sketch = combined.columns[field]
+            values = sketch.quantiles(query['quantiles'])
+            results[field] = {
+                'count': sketch.n,
+                'quantiles': {f'{q:g}': value for q, value in zip(query['quantiles'], values)},
+            }
+        return Response({
+            'datasets': query['datasets'],
+            'rows': sum(dataset.total_equipment for dataset in datasets),
+            'distinct_names': combined.names.count(),
+            'results': results,
+        })
+
+
+class DatasetChartDataView(APIView):
+    # JSON by default; ?format=npz (or Accept: application/x-npz) for binary.
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NpzRenderer]
+
+    def get(self, request, pk):
+        dataset = get_object_or_404(Dataset, pk=pk, is_complete=True)
+        try:
+            query = charts.parse_query(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        tag = charts.etag(dataset, query, request.accepted_renderer.format)
+        response = get_conditional_response(request, etag=tag)
+        if response is None:
+            store = analytics.column_cache.get(dataset)
+            response = Response(charts.chart_data(store, dataset.pk, **query))
+        response['ETag'] = tag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class DatasetHistoryView(APIView):
     def get(self, request):
-        datasets = Dataset.objects.order_by('-uploaded_at')[:5]
-        serializer = DatasetSerializer(datasets, many=True)
-        return Response(serializer.data)
+        try:
+            include = history.parse_include(request.query_params.get('include'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        entry = history.get_history(include)
+        response = get_conditional_response(
+            request, etag=entry['etag'], last_modified=entry['last_modified']
+        )
+        if response is None:
+            response = HttpResponse(entry['body'], content_type='application/json')
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class FileContentNegotiation(BaseContentNegotiation):
+    """Ignore ``Accept``: these views answer with a file, and errors as JSON."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def rendered_file(request, path, content_type, filename=None):
+    # Cached renders are named by content, so the name is a strong ETag.
+    tag = '"%s"' % os.path.basename(path)
+    response = get_conditional_response(request, etag=tag)
+    if response is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type, filename=filename)
+    response['ETag'] = tag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class DatasetChartImageView(APIView):
+    content_negotiation_class = FileContentNegotiation
+
+    def get(self, request, pk, name):
+        dataset = get_object_or_404(Dataset, pk=pk, is_complete=True)
+        if name not in rendering.CHARTS:
+            return Response(
+                {'error': f"Unknown chart '{name}'; one of {', '.join(rendering.CHARTS)}"}, status=404
+            )
+        try:
+            query = rendering.parse_query(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        try:
+            path = rendering.chart_png(dataset, name, **query)
+        except (BrokenProcessPool, TimeoutError):
+            return Response({'error': 'Rendering failed, try again'}, status=503)
+        return rendered_file(request, path, 'image/png')
+
+
+class DatasetReportView(APIView):
+    content_negotiation_class = FileContentNegotiation
+
+    def get(self, request, pk):
+        dataset = get_object_or_404(Dataset, pk=pk, is_complete=True)
+        try:
+            theme = rendering.parse_query(request.query_params)['theme']
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        try:
+            path = rendering.report_pdf(dataset, theme)
+        except (BrokenProcessPool, TimeoutError):
+            return Response({'error': 'Rendering failed, try again'}, status=503)
+        stem = os.path.splitext(dataset.filename)[0] or 'dataset'
+        return rendered_file(request, path, 'application/pdf', filename=f'{stem}-report.pdf')
@@ -63,6 +63,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Concurrent uploads each write records chunk by chunk; wait for
+            # the write lock instead of failing, and take it up front so a
+            # transaction never has to upgrade from a read lock.
+            'timeout': 30,
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -80,10 +87,83 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Inflate .gz/.zst uploads, then hash them while they stream in so duplicates
+# are detected without a re-read.
+FILE_UPLOAD_HANDLERS = [
+    'equipment_chem.uploads.DecompressingUploadHandler',
+    'equipment_chem.uploads.HashingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# ---------------- RESUMABLE UPLOADS ----------------
+# Large files may be sent as numbered chunks via /api/uploads/ and resumed
+# after a failure; idle sessions are discarded by the retention sweeper.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024       # default bytes per chunk
+UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024  # largest chunk a client may choose
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+
+# ---------------- CSV INGESTION ----------------
+CSV_INGEST_CHUNK_SIZE = 100_000  # rows parsed per chunk; bounds peak memory per upload
+CSV_PARSER_ENGINE = 'auto'       # 'pyarrow' when installed, else pandas' 'c' engine
+CSV_PYARROW_BLOCK_SIZE = 16 * 1024 * 1024  # bytes per pyarrow chunk
+STORE_EQUIPMENT_RECORDS = True   # keep per-row EquipmentRecord rows for each upload
+WRITE_PARQUET_SIDECAR = True     # zstd Parquet copy of each upload for fast re-reads (needs pyarrow)
+COLUMN_CACHE_MAX_DATASETS = 8    # datasets kept as in-memory NumPy columns for /aggregate/
+
+# ---------------- RENDERING ----------------
+# Chart PNGs and PDF reports are drawn in worker processes and cached under
+# MEDIA_ROOT/renders/.
+RENDER_WORKERS = 2    # processes per server process
+RENDER_TIMEOUT = 120  # seconds a request waits for a render
+
+# ---------------- ASYNC UPLOADS ----------------
+UPLOAD_ASYNC = False           # default for /api/upload/ when ?async= is not given
+INGEST_WORKERS = 2             # threads per server process running upload jobs
+INGEST_RUN_IN_PROCESS = True   # False: leave jobs to `manage.py process_ingest_jobs --loop`
+INGEST_STALE_AFTER = timedelta(minutes=10)  # running jobs silent this long lost their worker
+INGEST_MAX_ATTEMPTS = 2        # ... and are retried until claimed this many times, then failed
+
+# ---------------- ANOMALY DETECTION ----------------
+# Checked for every reading during ingestion; see equipment_chem/anomalies.py.
+ANOMALY_DETECTION = {
+    'Z_SCORE': 4.0,             # flag readings this many type std devs from the type mean
+    'IQR_FACTOR': 3.0,          # ... or beyond Q1/Q3 -/+ this many interquartile ranges
+    'MIN_ROWS': 30,             # smaller types only get THRESHOLDS
+    'THRESHOLDS': {},           # e.g. {'Pump': {'pressure': [None, 12.0]}, '*': {'temperature': [-20, 400]}}
+    'MAX_STORED': 10_000,       # most extreme readings kept per dataset
+}
+
+# ---------------- RETENTION ----------------
+# Enforced by a background sweeper in each server process and by
+# `manage.py enforce_retention` (e.g. from cron); None disables a limit.
+DATASET_RETENTION = {
+    'MAX_COUNT': 5,             # newest datasets kept
+    'MAX_AGE': None,            # e.g. timedelta(days=30)
+    'MAX_TOTAL_BYTES': None,    # e.g. 10 * 1024 ** 3
+    'SWEEP_INTERVAL': 300,      # seconds between background sweeps; None = command only
+}
+
+# ---------------- CACHE ----------------
+# Holds the rendered /api/history/ payload. Datasets are also written outside
+# the serving process (other server workers, `process_ingest_jobs` when
+# INGEST_RUN_IN_PROCESS is False, `ingest_csv` backfills), and each writer
+# invalidates the entry itself, so the cache must be shared between them:
+# a per-process LocMemCache would keep serving the old history. Use a
+# shared server cache (Redis, DatabaseCache) when they run on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+}
+HISTORY_CACHE_TIMEOUT = 300  # seconds; uploads and deletes invalidate it immediately
+
 # ---------------- CORS ----------------
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React frontend
 ]
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
 
 # ---------------- REST FRAMEWORK ----------------
 REST_FRAMEWORK = {
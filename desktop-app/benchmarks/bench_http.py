@@ -0,0 +1,72 @@
+"""Request latency with and without connection reuse.
+
+Usage (from desktop-app, with the backend running):
+
+    python benchmarks/bench_http.py --user axara --password backend -n 200
+
+Times ``GET /api/history/`` issued with bare ``requests.get`` (a new TCP
+connection per call) against the pooled keep-alive session that
+``ChemicalAPIClient`` uses, sequentially and from several threads.
+
+Point ``--base`` at a production-style server (gunicorn etc.). Django's
+``runserver`` does not set TCP_NODELAY, so on a reused connection each
+response stalls ~40 ms on delayed ACKs and the pooled numbers look worse
+than they are. On loopback the saving per request is about a millisecond;
+over a VPN it is one or more round trips (TCP, plus TLS for https).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from services import api_client  # noqa: E402
+from services.api_client import ChemicalAPIClient  # noqa: E402
+
+
+def timed(call):
+    start = time.perf_counter()
+    response = call()
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+def run(label, call, n, threads):
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.perf_counter()
+        samples = sorted(pool.map(lambda _: timed(call), range(n)))
+        wall = time.perf_counter() - start
+    p50 = statistics.median(samples) * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    print(f"{label:<28} threads={threads:<2} p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  {n / wall:7.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base', default=api_client.API_BASE, help='API root URL')
+    parser.add_argument('--user', default='axara')
+    parser.add_argument('--password', default='backend')
+    parser.add_argument('-n', type=int, default=200, help='requests per run')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    api_client.API_BASE = args.base
+    client = ChemicalAPIClient()
+    if not client.login(args.user, args.password):
+        sys.exit('login failed')
+    url = f"{args.base}/history/"
+    headers = client.get_headers()
+
+    for threads in args.threads:
+        run('new connection per request', lambda: requests.get(url, headers=headers), args.n, threads)
+        run('pooled session', lambda: client.session.get(url, headers=headers), args.n, threads)
+
+
+if __name__ == '__main__':
+    main()
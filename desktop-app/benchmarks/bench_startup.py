@@ -0,0 +1,113 @@
+"""Cold-start time of the desktop app: process launch to first paint.
+
+Usage (from desktop-app):
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --eager   # also import ui.charts up front
+
+Each run starts a fresh interpreter with ``-X importtime``. The child builds
+``MainWindow`` exactly as ``main.py`` does and stops at the first paint,
+before the session starts (no login dialog, no network). The report gives
+the median time to first paint against the 500 ms target and the slowest
+top-level imports from the importtime log. ``--eager`` restores the old
+import order, where matplotlib and NumPy load before the window exists.
+Runs offscreen unless ``--platform`` names a real Qt platform.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET_MS = 500
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def child(spawned_at, eager):
+    sys.path.insert(0, APP_DIR)
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    if eager:
+        import ui.charts  # noqa: F401
+    from ui.main_window import MainWindow
+
+    events = {}
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and 'paint' not in events:
+                events['paint'] = time.time()
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    # The session (login, cache, charts warm-up) is not part of first paint;
+    # only record when it would have started.
+    MainWindow.start_session = lambda self: events.setdefault('session', time.time())
+
+    app = QApplication(sys.argv)
+    paint_filter = FirstPaint()
+    app.installEventFilter(paint_filter)
+    window = MainWindow()
+    window.show()
+    app.exec_()
+
+    paint = events['paint'] - spawned_at
+    session_first = events.get('session', float('inf')) < events['paint']
+    print(f"FIRST_PAINT {paint * 1000:.1f} {int(session_first)} {int('matplotlib' in sys.modules)}")
+
+
+def top_imports(log, limit):
+    """Slowest top-level imports as ``(cumulative_us, name)``."""
+    totals = []
+    for line in log.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            totals.append((int(match.group(2)), match.group(4)))
+    return sorted(totals, reverse=True)[:limit]
+
+
+def run(eager, platform):
+    env = {**os.environ, 'QT_QPA_PLATFORM': platform} if platform else dict(os.environ)
+    cmd = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', repr(time.time())]
+    if eager:
+        cmd.append('--eager')
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=APP_DIR, check=True)
+    line = next(line for line in proc.stdout.splitlines() if line.startswith('FIRST_PAINT'))
+    _, paint_ms, session_first, matplotlib_loaded = line.split()
+    return float(paint_ms), session_first == '1', matplotlib_loaded == '1', proc.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--eager', action='store_true', help='import ui.charts before the window')
+    parser.add_argument('--platform', default='offscreen', help="Qt platform ('' for the default)")
+    parser.add_argument('--top', type=int, default=8, help='slowest imports to list')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(float(args.child), args.eager)
+        return
+
+    results = [run(args.eager, args.platform) for _ in range(args.runs)]
+    paints = [paint for paint, _, _, _ in results]
+    median = statistics.median(paints)
+    verdict = 'OK' if median < TARGET_MS else 'OVER TARGET'
+    print(f"first paint: median {median:.0f} ms, min {min(paints):.0f}, max {max(paints):.0f} "
+          f"over {args.runs} runs (target {TARGET_MS} ms: {verdict})")
+    if any(session_first for _, session_first, _, _ in results):
+        print("warning: the session started before the first paint")
+    print(f"matplotlib loaded before first paint: {'yes' if results[-1][2] else 'no'}")
+
+    print("\nslowest top-level imports (last run, cumulative):")
+    for micros, name in top_imports(results[-1][3], args.top):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
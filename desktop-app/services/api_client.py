@@ -1,17 +1,97 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from services.multipart import MultipartFile
 
 API_BASE = "http://127.0.0.1:8000/api"
 
+# (connect, read) seconds. Uploads wait for the server to parse the CSV.
+TIMEOUT = (5, 30)
+UPLOAD_TIMEOUT = (5, 600)
+
+# One pooled connection per concurrent worker thread, kept alive between calls.
+POOL_SIZE = 8
+
+# Files larger than this go through the resumable chunked upload API.
+RESUMABLE_UPLOAD_SIZE = 32 * 1024 * 1024
+CHUNK_WORKERS = 4
+
+# Refresh the access token this many seconds before it expires.
+REFRESH_MARGIN = 30
+
+
+def build_session(retries=3, backoff=0.3, pool_size=POOL_SIZE):
+    """A keep-alive ``requests.Session`` with a connection pool and retries.
+
+    Connection errors and 502/503/504 answers are retried with exponential
+    backoff for idempotent methods only, so an upload is never sent twice.
+    ``requests`` already asks for gzip responses and decodes them.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def token_expiry(token):
+    """Expiry (epoch seconds) read from a JWT's payload, or None."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))["exp"]
+    except (AttributeError, IndexError, KeyError, ValueError):
+        return None
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
 class ChemicalAPIClient:
-    def __init__(self):
+    def __init__(self, session=None, cache=None):
+        self.session = session or build_session()
+        # Optional services.cache.LocalCache for revalidation and offline use.
+        self.cache = cache
+        # True once the server could not be reached; reads then come from the cache.
+        self.offline = False
         self.access_token = None
         self.refresh_token = None
+        # Worker threads share the tokens; only one may rotate them at a time.
+        self._token_lock = threading.Lock()
 
     def login(self, username, password):
         """Authenticates and stores JWT tokens."""
         url = f"{API_BASE}/token/"
-        response = requests.post(url, json={"username": username, "password": password})
-        
+        try:
+            response = self.session.post(url, json={"username": username, "password": password}, timeout=TIMEOUT)
+        except requests.exceptions.ConnectionError:
+            print("Login failed: server unreachable")
+            self.offline = True
+            return False
+        self.offline = False
+
         if response.status_code == 200:
             data = response.json()
             self.access_token = data['access']
@@ -28,37 +108,229 @@ class ChemicalAPIClient:
             return {}
         return {"Authorization": f"Bearer {self.access_token}"}
 
-    def upload_csv(self, file_path):
-        """Uploads a CSV file using the JWT token."""
+    def refresh(self, stale_token=None):
+        """Exchanges the refresh token for a new access token.
+
+        If another thread already replaced ``stale_token``, its result is
+        reused. Returns True when a usable access token is in place.
+        """
+        with self._token_lock:
+            if stale_token is not None and self.access_token != stale_token:
+                return True
+            if not self.refresh_token:
+                return False
+            response = self.session.post(
+                f"{API_BASE}/token/refresh/", json={"refresh": self.refresh_token}, timeout=TIMEOUT
+            )
+            if response.status_code != 200:
+                return False
+            data = response.json()
+            self.access_token = data['access']
+            # The server rotates refresh tokens.
+            self.refresh_token = data.get('refresh', self.refresh_token)
+            return True
+
+    def _authorized(self, send):
+        """Calls ``send(headers)`` with a fresh access token.
+
+        The token is refreshed shortly before it expires, and once more if
+        the server still answers 401, after which the request is re-sent.
+        """
+        expiry = token_expiry(self.access_token)
+        if expiry is not None and expiry - time.time() < REFRESH_MARGIN:
+            self.refresh(self.access_token)
+
+        token = self.access_token
+        response = send(self.get_headers())
+        if response.status_code == 401 and self.refresh(token):
+            response = send(self.get_headers())
+        return response
+
+    def _get(self, path, **kwargs):
+        return self._authorized(
+            lambda headers: self.session.get(f"{API_BASE}{path}", headers=headers, timeout=TIMEOUT, **kwargs)
+        )
+
+    def upload_csv(self, file_path, progress=None, compress="gzip"):
+        """Uploads a CSV file using the JWT token.
+
+        The file is streamed from disk, compressed with ``compress`` ("gzip",
+        "zstd" or None; the server inflates it on arrival), and
+        ``progress(bytes_sent, total_bytes)`` is called as it goes out.
+        """
         url = f"{API_BASE}/upload/"
+
+        def send(headers):
+            # A streamed body can't be rewound, so every attempt opens its own.
+            with MultipartFile(file_path, progress=progress, compress=compress) as body:
+                headers = {**headers, "Content-Type": body.content_type}
+                return self.session.post(url, data=body, headers=headers, timeout=UPLOAD_TIMEOUT)
+
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(url, files=files, headers=self.get_headers())
-                response.raise_for_status()
-                return response.json()
+            response = self._authorized(send)
+            response.raise_for_status()
+            return response.json()
         except requests.exceptions.HTTPError as e:
             return f"Upload error: {e.response.text}"
 
-    def fetch_history(self):
-        """Fetches history using the JWT token."""
-        url = f"{API_BASE}/history/"
+    def upload_csv_resumable(self, file_path, progress=None, chunk_size=None, workers=CHUNK_WORKERS):
+        """Uploads a CSV in numbered chunks, ``workers`` at a time.
+
+        If the upload fails part-way, calling this again with the same file
+        resumes it: the server finds the open session by the file's checksum
+        and only the missing chunks are sent.
+        """
+        body = {
+            "filename": os.path.basename(file_path),
+            "size": os.path.getsize(file_path),
+            "sha256": file_sha256(file_path),
+        }
+        if chunk_size:
+            body["chunk_size"] = chunk_size
         try:
-            response = requests.get(url, headers=self.get_headers())
+            response = self._authorized(lambda headers: self.session.post(
+                f"{API_BASE}/uploads/", json=body, headers=headers, timeout=TIMEOUT
+            ))
+            response.raise_for_status()
+            upload = response.json()
+
+            self._send_chunks(file_path, upload, progress, workers)
+
+            response = self._authorized(lambda headers: self.session.post(
+                f"{API_BASE}/uploads/{upload['id']}/complete/", headers=headers, timeout=UPLOAD_TIMEOUT
+            ))
             response.raise_for_status()
             return response.json()
+        except requests.exceptions.HTTPError as e:
+            return f"Upload error: {e.response.text}"
+
+    def _send_chunks(self, file_path, upload, progress, workers):
+        chunk_size, total = upload["chunk_size"], upload["total_bytes"]
+        received = set(upload["received"])
+        missing = [index for index in range(upload["chunks"]) if index not in received]
+        sent = [total - sum(min(chunk_size, total - index * chunk_size) for index in missing)]
+        lock = threading.Lock()
+        if progress:
+            progress(sent[0], total)
+
+        def send(index):
+            with open(file_path, "rb") as f:
+                f.seek(index * chunk_size)
+                data = f.read(chunk_size)
+            url = f"{API_BASE}/uploads/{upload['id']}/chunks/{index}/"
+            extra = {
+                "Content-Type": "application/octet-stream",
+                "X-Chunk-SHA256": hashlib.sha256(data).hexdigest(),
+            }
+            response = self._authorized(lambda headers: self.session.put(
+                url, data=data, headers={**headers, **extra}, timeout=UPLOAD_TIMEOUT
+            ))
+            response.raise_for_status()
+            with lock:
+                sent[0] += len(data)
+                if progress:
+                    progress(sent[0], total)
+
+        # Every chunk is attempted even if one fails, so a retry has less to
+        # send; the first failure is raised afterwards.
+        with ThreadPoolExecutor(workers) as pool:
+            futures = [pool.submit(send, index) for index in missing]
+        for future in futures:
+            future.result()
+
+    def _get_cached(self, path, key, dataset_id=None, params=None):
+        """GET ``path`` and return its body, revalidating a cached copy.
+
+        A cached body is sent as ``If-None-Match`` and reused on a 304, and
+        returned as-is when the server can't be reached (``self.offline``).
+        """
+        cached = self.cache.get(key) if self.cache else None
+        extra = {"If-None-Match": cached[1]} if cached and cached[1] else {}
+        try:
+            response = self._authorized(lambda headers: self.session.get(
+                f"{API_BASE}{path}", params=params, headers={**headers, **extra}, timeout=TIMEOUT
+            ))
+        except requests.exceptions.ConnectionError:
+            self.offline = True
+            if cached is None:
+                raise
+            return cached[0]
+        self.offline = False
+
+        if response.status_code == 304 and cached is not None:
+            return cached[0]
+        response.raise_for_status()
+        if self.cache:
+            self.cache.put(key, response.content, response.headers.get("ETag"), dataset_id)
+        return response.content
+
+    def fetch_history(self):
+        """Fetches history using the JWT token.
+
+        Entries include the type distribution, so each one is a complete
+        dataset summary that can be shown from the cache.
+        """
+        try:
+            return json.loads(self._get_cached("/history/", "history", params={"include": "distribution"}))
         except requests.exceptions.HTTPError as e:
             return f"Fetch error: {e.response.text}"
 
-# --- Example Usage ---
-client = ChemicalAPIClient()
-
-# 1. You MUST login first to get the token
-if client.login("axara", "backend"):
-    # 2. Now you can fetch data
-    history = client.fetch_history()
-    print(history)
-    
-    # 3. And upload files
-    # result = client.upload_csv("data.csv")
-    # print(result)
\ No newline at end of file
+    def fetch_chart_data(self, dataset_id, sample=2000, bins=48, points=500, series="lttb"):
+        """Fetches plot-ready arrays for a dataset as a dict of numpy arrays.
+
+        Keys are flattened, e.g. ``scatter.x`` or ``correlation.matrix``. The
+        server reduces the temperature series to ``points`` with ``series``
+        (lttb, minmax or stride). Returns None if it could not provide them.
+        """
+        params = chart_params(sample, bins, points, series)
+        try:
+            body = self._get_cached(
+                f"/datasets/{dataset_id}/chart-data/", chart_key(dataset_id, params), dataset_id, params
+            )
+        except requests.exceptions.RequestException as e:
+            print(f"Chart data error: {e}")
+            return None
+        return load_npz(body)
+
+    def fetch_records(self, dataset_id=None, params=None, url=None):
+        """Fetches one page of per-row records.
+
+        The first page is requested with ``params`` (``ordering``, ``type``,
+        ``page_size`` and range filters such as ``pressure__gte``); later
+        pages by the page's ``next`` URL, which carries the cursor.
+        """
+        url = url or f"{API_BASE}/datasets/{dataset_id}/records/"
+        response = self._authorized(lambda headers: self.session.get(
+            url, params=None if "?" in url else params, headers=headers, timeout=TIMEOUT
+        ))
+        response.raise_for_status()
+        return response.json()
+
+    # Cache-only reads: no network, None when nothing is cached.
+
+    def cached_history(self):
+        entry = self.cache.get("history") if self.cache else None
+        return json.loads(entry[0]) if entry else None
+
+    def cached_chart_data(self, dataset_id, sample=2000, bins=48, points=500, series="lttb"):
+        key = chart_key(dataset_id, chart_params(sample, bins, points, series))
+        entry = self.cache.get(key) if self.cache else None
+        return load_npz(entry[0]) if entry else None
+
+
+def chart_params(sample, bins, points, series):
+    return {
+        "format": "npz", "charts": "scatter,hist2d,correlation,temperature",
+        "sample": sample, "bins": bins, "points": points, "series": series,
+    }
+
+
+def chart_key(dataset_id, params):
+    return f"chart:{dataset_id}:" + "&".join(f"{name}={params[name]}" for name in sorted(params))
+
+
+def load_npz(body):
+    import numpy as np  # only chart data needs it; keeps startup light
+
+    with np.load(io.BytesIO(body)) as archive:
+        return {key: archive[key] for key in archive.files}
@@ -0,0 +1,81 @@
+"""Local cache of API responses, so the app starts with the last known state
+and keeps working read-only while the server is unreachable.
+
+Responses are stored as raw bodies in a SQLite file under ``~/.chemviz``,
+with their ETag for conditional revalidation and the dataset id they
+belong to. The total size is bounded; the least recently used entries are
+evicted first. One connection is shared by all worker threads behind a lock.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".chemviz")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    dataset_id INTEGER,
+    etag TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_dataset ON entries (dataset_id);
+"""
+
+
+class LocalCache:
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "cache.sqlite3")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def get(self, key):
+        """``(body, etag)`` for ``key``, or None. Marks the entry as used."""
+        with self._lock:
+            row = self._db.execute("SELECT body, etag FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def put(self, key, body, etag=None, dataset_id=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, dataset_id, etag, body, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, dataset_id, etag, body, len(body), time.time()),
+            )
+            self._evict()
+
+    def drop_dataset(self, dataset_id):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE dataset_id = ?", (dataset_id,))
+
+    def size(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
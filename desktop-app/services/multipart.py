@@ -0,0 +1,131 @@
+"""Stream a file upload as multipart/form-data without loading it into memory.
+
+``requests`` reads the whole file when given ``files=``. Passing a
+``MultipartFile`` as ``data=`` instead lets it send the body in blocks
+(with a known Content-Length) and report progress as each block goes out.
+
+With ``compress="gzip"`` or ``"zstd"`` the file is compressed block by block
+into a spooled temporary file first and that is what gets sent. The server
+needs the body's length up front (Django does not accept chunked request
+bodies), so compression cannot be interleaved with sending.
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import uuid
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; gzip is always available
+    zstandard = None
+
+# Report progress at most this often (bytes), and at least every 1%.
+PROGRESS_STEP = 256 * 1024
+
+BLOCK_SIZE = 1024 * 1024
+# Compressed bodies below this size never touch the disk.
+SPOOL_SIZE = 16 * 1024 * 1024
+
+COMPRESSION = {
+    # codec: (filename suffix, part Content-Type, level)
+    "gzip": (".gz", "application/gzip", 6),
+    "zstd": (".zst", "application/zstd", 3),
+}
+
+
+def quote_param(value):
+    """``value`` as a quoted header parameter, e.g. a Content-Disposition filename."""
+    # Line breaks can't appear in a header; quotes and backslashes are escaped.
+    value = value.replace("\r", " ").replace("\n", " ")
+    return '"%s"' % value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def compress_file(path, codec):
+    """``path`` compressed with ``codec`` into a rewound temporary file."""
+    level = COMPRESSION[codec][2]
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    with open(path, "rb") as src:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstd compression needs the zstandard package")
+            zstandard.ZstdCompressor(level=level).copy_stream(src, out, read_size=BLOCK_SIZE)
+        else:
+            # mtime=0 keeps the output identical for identical files.
+            with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=level, mtime=0) as gz:
+                shutil.copyfileobj(src, gz, BLOCK_SIZE)
+    out.seek(0)
+    return out
+
+
+class MultipartFile:
+    """File-like multipart body holding a single file field."""
+
+    def __init__(self, path, field="file", filename=None, content_type="text/csv", progress=None,
+                 compress=None):
+        self.boundary = uuid.uuid4().hex
+        filename = filename or os.path.basename(path)
+        if compress:
+            suffix, content_type, _ = COMPRESSION[compress]
+            filename += suffix
+            source = compress_file(path, compress)
+            self.file_size = source.seek(0, os.SEEK_END)
+            source.seek(0)
+        else:
+            source = open(path, 'rb')
+            self.file_size = os.path.getsize(path)
+        head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name={quote_param(field)}; filename={quote_param(filename)}\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{self.boundary}--\r\n'.encode()
+
+        self.len = len(head) + self.file_size + len(tail)  # requests reads .len for Content-Length
+        self.progress = progress
+        self._parts = [head, source, tail]
+        self._sent = 0
+        self._reported = 0
+        self._step = min(PROGRESS_STEP, max(self.len // 100, 1))
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+        chunks = []
+        while size > 0 and self._parts:
+            part = self._parts[0]
+            if isinstance(part, bytes):
+                chunk, self._parts[0] = part[:size], part[size:]
+                if not self._parts[0]:
+                    self._parts.pop(0)
+            else:
+                chunk = part.read(size)
+                if len(chunk) < size:
+                    part.close()
+                    self._parts.pop(0)
+            chunks.append(chunk)
+            size -= len(chunk)
+
+        data = b''.join(chunks)
+        self._sent += len(data)
+        if self.progress and (self._sent - self._reported >= self._step or self._sent == self.len):
+            if self._sent != self._reported:
+                self._reported = self._sent
+                self.progress(self._sent, self.len)
+        return data
+
+    def close(self):
+        for part in self._parts:
+            if not isinstance(part, bytes):
+                part.close()
+        self._parts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,71 @@
+"""Run blocking API calls off the Qt GUI thread.
+
+``Worker`` wraps any callable in a ``QRunnable`` for ``QThreadPool``.
+Its ``signals`` are emitted from the pool thread and delivered to slots on
+the GUI thread through Qt's queued connections, so handlers may touch
+widgets directly.
+"""
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class WorkerSignals(QObject):
+    started = pyqtSignal()
+    progress = pyqtSignal(object, object)  # done, total (bytes may exceed 2**31)
+    finished = pyqtSignal(object)          # the callable's return value
+    error = pyqtSignal(str)
+
+
+class Worker(QRunnable):
+    """Call ``fn(*args, **kwargs)`` on a pool thread.
+
+    With ``report_progress=True`` the callable also receives
+    ``progress=callback(done, total)``, which forwards to ``signals.progress``.
+    """
+
+    def __init__(self, fn, *args, report_progress=False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        if report_progress:
+            self.kwargs['progress'] = self.signals.progress.emit
+
+    @pyqtSlot()
+    def run(self):
+        self.signals.started.emit()
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+class WorkerPool:
+    """A ``QThreadPool`` that keeps each worker alive until it reports back."""
+
+    def __init__(self, max_threads=4):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self._active = set()
+
+    def start(self, fn, *args, on_result=None, on_error=None, on_progress=None, **kwargs):
+        worker = Worker(fn, *args, report_progress=on_progress is not None, **kwargs)
+        if on_result:
+            worker.signals.finished.connect(on_result)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        if on_progress:
+            worker.signals.progress.connect(on_progress)
+        worker.signals.finished.connect(lambda _: self._active.discard(worker))
+        worker.signals.error.connect(lambda _: self._active.discard(worker))
+        self._active.add(worker)
+        self.pool.start(worker)
+        return worker
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
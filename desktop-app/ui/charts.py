@@ -1,7 +1,9 @@
 import numpy as np
+from matplotlib import patheffects
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+from matplotlib.patches import Wedge
+from matplotlib.ticker import EngFormatter
 
 # Professional chemical engineering color palette
 NEON_COLORS = ['#00e5ff', '#7c4dff', '#ff4081', '#00c853', '#ffab00', '#ff5252']
@@ -9,29 +11,86 @@ BG_COLOR = '#0a0e27'
 GRID_COLOR = '#1a2332'
 TEXT_COLOR = '#e0e6ed'
 
+# Pie geometry (matches the old ax.pie(radius=1.55, explode=0.05) layout)
+PIE_RADIUS = 1.55
+PIE_EXPLODE = 0.05
+PIE_START_ANGLE = 140
+PIE_LIMIT = 2.3
+
+CORR_LABELS = ["Flowrate", "Pressure", "Temperature"]
+
+
+def _nice_range(lo, hi, steps=5):
+    """Widen ``(lo, hi)`` outward to multiples of a 1/2/5 step.
+
+    Similar datasets then land on identical axis ranges, so switching
+    between them can blit instead of redrawing ticks and grid.
+    """
+    lo, hi = float(lo), float(hi)
+    if hi <= lo:
+        lo, hi = lo - 1, hi + 1
+    raw = (hi - lo) / steps
+    magnitude = 10 ** np.floor(np.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    return np.floor(lo / step) * step, np.ceil(hi / step) * step
+
+
 class ChartsCanvas(FigureCanvas):
-    def __init__(self, dataset, parent=None):
+    """Six-panel dashboard, built once and updated in place.
+
+    The figure, axes and all their styling are created in ``__init__``.
+    ``update_dataset`` only changes artist data (``set_data``,
+    ``set_offsets``, bar heights, text) and then redraws by blitting the
+    changed artists over a cached copy of the static background. A full
+    redraw (which refreshes that cache) only happens when an axis range has
+    to change.
+
+    ``chart_data`` is the dict returned by ``ChemicalAPIClient.fetch_chart_data``:
+    a row sample, a 2D histogram, the correlation matrix and a temperature
+    series, all computed server-side so plotting cost does not grow with the
+    dataset. Row-based panels show a placeholder without it.
+    """
+
+    def __init__(self, dataset=None, chart_data=None, parent=None):
         # Much larger figure for better readability - scrollable area will handle overflow
         self.fig = Figure(figsize=(18, 10), facecolor=BG_COLOR)
         super().__init__(self.fig)
         self.setStyleSheet(f"background-color: {BG_COLOR};")
-        self.dataset = dataset
-        self.plot_all_charts()
+        self.dataset = None
+        self.chart_data = None
+
+        self._animated = []
+        self._background = None
+        self._drawn_limits = None
+        self._build_axes()
+        self.mpl_connect('draw_event', self._on_draw)
+
+        if dataset is not None:
+            self.update_dataset(dataset, chart_data)
+
+    # ------------------------------------------------------------------ setup
 
-    def plot_all_charts(self):
-        self.fig.clear()
-        ds = self.dataset
-        total = int(ds.get("total_equipment", 10))
+    def _animate(self, artist):
+        """Mark ``artist`` as dynamic: skipped by full draws, blitted on updates."""
+        artist.set_animated(True)
+        self._animated.append(artist)
+        return artist
 
+    def _placeholder(self, ax):
+        return self._animate(ax.text(0.5, 0.5, "No row data available", ha='center', va='center',
+                                     color=TEXT_COLOR, fontsize=11, transform=ax.transAxes,
+                                     visible=False))
+
+    def _build_axes(self):
         # Create 2x3 grid with generous spacing for readability
         self.fig.subplots_adjust(left=0.05, right=0.98, top=0.85, bottom=0.06, hspace=0.75, wspace=0.25)
-        
-        ax1 = self.fig.add_subplot(2, 3, 1)  # PIE - Equipment Distribution
-        ax2 = self.fig.add_subplot(2, 3, 2)  # BAR - Average Metrics
-        ax3 = self.fig.add_subplot(2, 3, 3)  # SCATTER - Flowrate vs Pressure
-        ax4 = self.fig.add_subplot(2, 3, 4)  # HEATMAP - Correlation
-        ax5 = self.fig.add_subplot(2, 3, 5)  # GAUGE - System Health
-        ax6 = self.fig.add_subplot(2, 3, 6)  # LINE - Temperature Trend
+
+        self.ax1 = ax1 = self.fig.add_subplot(2, 3, 1)  # PIE - Equipment Distribution
+        self.ax2 = ax2 = self.fig.add_subplot(2, 3, 2)  # BAR - Average Metrics
+        self.ax3 = ax3 = self.fig.add_subplot(2, 3, 3)  # SCATTER - Flowrate vs Pressure
+        self.ax4 = ax4 = self.fig.add_subplot(2, 3, 4)  # HEATMAP - Correlation
+        self.ax5 = ax5 = self.fig.add_subplot(2, 3, 5)  # GAUGE - System Health
+        self.ax6 = ax6 = self.fig.add_subplot(2, 3, 6)  # LINE - Temperature Trend
 
         # Apply dark theme to all axes
         for ax in [ax1, ax2, ax3, ax4, ax5, ax6]:
@@ -42,159 +101,280 @@ class ChartsCanvas(FigureCanvas):
             ax.tick_params(colors=TEXT_COLOR, labelsize=10)
 
         # ========== 1. PIE CHART - Equipment Type Distribution ==========
-        types = ds.get("equipment_type_distribution", {"Reactor": 3, "Heat Exchanger": 2, "Pump": 2, "Valve": 3})
-        labels = list(types.keys())
-        sizes = list(types.values())
-        
-        wedges, texts, autotexts = ax1.pie(
-            sizes, 
-            labels=labels, 
-            autopct='%1.1f%%', 
-            startangle=140, 
-            colors=NEON_COLORS[:len(labels)],
-            shadow=True,
-            radius=1.55,
-            explode=[0.05] * len(labels),
-            textprops={'color': TEXT_COLOR, 'fontsize': 9, 'fontweight': 'bold'}
-        )
-        
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(5)
-        
-        ax1.set_title("Equipment Type Distribution", 
+        ax1.set_aspect('equal')
+        ax1.set_xlim(-PIE_LIMIT, PIE_LIMIT)
+        ax1.set_ylim(-PIE_LIMIT, PIE_LIMIT)
+        ax1.axis('off')
+        ax1.set_title("Equipment Type Distribution",
                      color=NEON_COLORS[0], fontsize=13, fontweight='bold', pad=15)
+        self.pie_wedges, self.pie_labels, self.pie_pcts = [], [], []
 
         # ========== 2. BAR CHART - Average Operating Metrics ==========
-        metrics = ["avg_flowrate", "avg_pressure", "avg_temperature"]
         metric_labels = ["Flowrate\n(L/min)", "Pressure\n(atm)", "Temp\n(K)"]
-        values = [ds.get(m, 0) for m in metrics]
-        
-        bars = ax2.bar(metric_labels, values, color=NEON_COLORS[:3], 
-                      edgecolor='white', linewidth=1, alpha=0.9, width=0.5)
-        
-        # Add value labels on bars
-        for bar, val in zip(bars, values):
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:.1f}',
-                    ha='center', va='bottom', color=TEXT_COLOR, 
-                    fontweight='bold', fontsize=11)
-        
+        self.bars = ax2.bar(metric_labels, [0, 0, 0], color=NEON_COLORS[:3],
+                            edgecolor='white', linewidth=1, alpha=0.9, width=0.5)
+        self.bar_texts = []
+        for bar in self.bars:
+            self._animate(bar)
+            self.bar_texts.append(self._animate(ax2.text(
+                bar.get_x() + bar.get_width() / 2., 0, '', ha='center', va='bottom',
+                color=TEXT_COLOR, fontweight='bold', fontsize=11)))
+
         ax2.set_ylabel("Value", color=TEXT_COLOR, fontsize=11)
-        ax2.set_title("Average Operating Metrics", 
+        ax2.set_title("Average Operating Metrics",
                      color=NEON_COLORS[1], fontsize=13, fontweight='bold', pad=12)
         ax2.grid(axis='y', alpha=0.3, color=GRID_COLOR, linestyle='--', linewidth=1.5)
         ax2.tick_params(axis='x', labelsize=9)
 
         # ========== 3. SCATTER PLOT - Flowrate vs Pressure ==========
-        base_flow = ds.get("avg_flowrate", 100)
-        base_pressure = ds.get("avg_pressure", 5)
-        
-        x = np.array([base_flow + np.random.uniform(-15, 15) for _ in range(total)])
-        y = np.array([base_pressure + np.random.uniform(-2, 2) for _ in range(total)])
-        
-        scatter = ax3.scatter(x, y, c=NEON_COLORS[0], s=120, alpha=0.7, 
-                            edgecolor=NEON_COLORS[1], linewidth=2)
-        
-        # Add trend line
-        if len(x) > 1:
-            z = np.polyfit(x, y, 1)
-            p = np.poly1d(z)
-            x_sorted = np.sort(x)
-            ax3.plot(x_sorted, p(x_sorted), "--", color=NEON_COLORS[2], 
-                    linewidth=2.5, alpha=0.8, label='Trend Line')
-        
+        # Density of every row underneath, a fixed-size row sample on top.
+        self.density = self._animate(ax3.imshow(
+            np.ma.masked_all((1, 1)), cmap="magma", alpha=0.8, origin='lower',
+            aspect='auto', interpolation='nearest', extent=(0, 1, 0, 1)))
+        self.scatter = self._animate(ax3.scatter(
+            np.empty(0), np.empty(0), c=NEON_COLORS[0], s=10, alpha=0.5, linewidths=0, label='rows'))
+        self.trend, = ax3.plot([], [], "--", color=NEON_COLORS[2],
+                               linewidth=2.5, alpha=0.8, label='Trend Line')
+        self._animate(self.trend)
+        self.scatter_legend = self._animate(ax3.legend(
+            loc='upper left', fontsize=9, facecolor=BG_COLOR, edgecolor=GRID_COLOR, labelcolor=TEXT_COLOR))
+        self.scatter_empty = self._placeholder(ax3)
+
         ax3.set_xlabel("Flowrate (L/min)", color=TEXT_COLOR, fontsize=11, fontweight='bold')
         ax3.set_ylabel("Pressure (atm)", color=TEXT_COLOR, fontsize=11, fontweight='bold')
-        ax3.set_title("Flowrate vs Pressure Correlation", 
+        ax3.set_title("Flowrate vs Pressure Correlation",
                      color=NEON_COLORS[0], fontsize=13, fontweight='bold', pad=12)
         ax3.grid(True, alpha=0.3, color=GRID_COLOR, linestyle='--', linewidth=1.5)
-        ax3.legend(loc='best', fontsize=9, facecolor=BG_COLOR, 
-                  edgecolor=GRID_COLOR, labelcolor=TEXT_COLOR)
 
         # ========== 4. HEATMAP - Parameter Correlation ==========
-        params = ["avg_flowrate", "avg_pressure", "avg_temperature"]
-        param_labels = ["Flowrate", "Pressure", "Temperature"]
-        
-        # Create correlation matrix
-        corr = np.zeros((3, 3))
-        for i in range(3):
-            for j in range(3):
-                if i == j:
-                    corr[i, j] = 1.0
-                else:
-                    a = ds.get(params[i], 1)
-                    b = ds.get(params[j], 1)
-                    corr[i, j] = max(0, min(1, 1 - abs(a - b) / max(abs(a), abs(b), 1) * 0.5))
-        
-        im = ax4.imshow(corr, cmap="coolwarm", vmin=0, vmax=1, aspect='auto')
-        ax4.set_xticks(range(3))
-        ax4.set_yticks(range(3))
-        ax4.set_xticklabels(param_labels, color=TEXT_COLOR, fontsize=10)
-        ax4.set_yticklabels(param_labels, color=TEXT_COLOR, fontsize=10)
-        ax4.set_title("Parameter Correlation Heatmap", 
+        n = len(CORR_LABELS)
+        self.corr_image = self._animate(ax4.imshow(np.zeros((n, n)), cmap="coolwarm",
+                                                   vmin=-1, vmax=1, aspect='auto'))
+        self.corr_texts = [[self._animate(ax4.text(j, i, '', ha="center", va="center",
+                                                   fontweight="bold", fontsize=11))
+                            for j in range(n)] for i in range(n)]
+        self.corr_empty = self._placeholder(ax4)
+        ax4.set_xticks(range(n))
+        ax4.set_yticks(range(n))
+        ax4.set_xticklabels(CORR_LABELS, color=TEXT_COLOR, fontsize=10)
+        ax4.set_yticklabels(CORR_LABELS, color=TEXT_COLOR, fontsize=10)
+        ax4.set_title("Parameter Correlation Heatmap",
                      color=NEON_COLORS[2], fontsize=13, fontweight='bold', pad=12)
-        
-        # Add correlation values as text
-        for i in range(3):
-            for j in range(3):
-                text_color = 'white' if corr[i, j] < 0.5 else 'black'
-                ax4.text(j, i, f"{corr[i, j]:.2f}", 
-                        ha="center", va="center", 
-                        color=text_color, fontweight="bold", fontsize=11)
 
         # ========== 5. HEALTH GAUGE - System Health Index ==========
-        flow = ds.get("avg_flowrate", 100)
-        pressure = ds.get("avg_pressure", 5)
-        temp = ds.get("avg_temperature", 300)
-        
-        # Simple health calculation
-        health = max(0, min(100, 100 - abs((flow - 100)/10) - abs((pressure - 5)*5) - abs((temp - 300)/5)))
-        
-        # Create horizontal bar gauge with background
-        ax5.barh([0], [100], height=0.4, color=GRID_COLOR, 
+        # Horizontal bar gauge with background
+        ax5.barh([0], [100], height=0.4, color=GRID_COLOR,
                 edgecolor=TEXT_COLOR, linewidth=1.5, alpha=0.4)
-        ax5.barh([0], [health], height=0.4, color=NEON_COLORS[3], 
-                edgecolor='white', linewidth=2.5)
-        
+        self.health_bar = self._animate(ax5.barh([0], [0], height=0.4, color=NEON_COLORS[3],
+                                                 edgecolor='white', linewidth=2.5)[0])
+        self.health_text = self._animate(ax5.text(0, 0, '', ha='center', va='center',
+                                                  color='white', fontweight='bold', fontsize=13))
+
         ax5.set_xlim(0, 100)
         ax5.set_ylim(-0.6, 0.6)
         ax5.set_yticks([])
         ax5.set_xlabel("Health Index (%)", color=TEXT_COLOR, fontsize=11, fontweight='bold')
-        ax5.set_title("Overall System Health", 
+        ax5.set_title("Overall System Health",
                      color=NEON_COLORS[3], fontsize=13, fontweight='bold', pad=12)
-        
-        # Add percentage text
-        ax5.text(health/2, 0, f'{health:.1f}%', 
-                ha='center', va='center', 
-                color='white', fontweight='bold', fontsize=13)
-        
         ax5.grid(axis='x', alpha=0.3, color=GRID_COLOR, linestyle='--', linewidth=1.5)
 
-        # ========== 6. LINE CHART - Temperature Trend ==========
-        time_points = np.arange(0, 24, 2)
-        base_temp = ds.get("avg_temperature", 300)
-        temps = base_temp + np.sin(time_points / 4) * 10 + np.random.normal(0, 3, len(time_points))
-        
-        ax6.plot(time_points, temps, color=NEON_COLORS[4], linewidth=3, 
-                marker='o', markersize=7, markerfacecolor=NEON_COLORS[4], 
-                markeredgecolor='white', markeredgewidth=1.5)
-        
+        # ========== 6. LINE CHART - Temperature by Record ==========
+        self.temp_line, = ax6.plot([], [], color=NEON_COLORS[4], linewidth=1.5)
+        self._animate(self.temp_line)
         # Fill area under curve
-        ax6.fill_between(time_points, temps, alpha=0.3, color=NEON_COLORS[4])
-        
-        ax6.set_xlabel("Time (hours)", color=TEXT_COLOR, fontsize=11, fontweight='bold')
+        self.temp_fill = self._animate(ax6.fill_between([0, 1], [0, 0], alpha=0.3, color=NEON_COLORS[4]))
+        # Reference line for average
+        self.temp_avg = self._animate(ax6.axhline(y=0, color=NEON_COLORS[5], linestyle='--',
+                                                  linewidth=2, alpha=0.7, label='Avg'))
+        self.temp_legend = self._animate(ax6.legend(
+            loc='upper right', fontsize=9, facecolor=BG_COLOR, edgecolor=GRID_COLOR, labelcolor=TEXT_COLOR))
+        self.temp_empty = self._placeholder(ax6)
+
+        ax6.set_xlabel("Record #", color=TEXT_COLOR, fontsize=11, fontweight='bold')
+        # Row numbers run into the millions; label them 250k, 1M, ... rather
+        # than 0.25..1.0 with an easily missed 1e6 offset.
+        ax6.xaxis.set_major_formatter(EngFormatter(sep=""))
         ax6.set_ylabel("Temperature (K)", color=TEXT_COLOR, fontsize=11, fontweight='bold')
-        ax6.set_title("Temperature Trend Analysis", 
+        ax6.set_title("Temperature Trend Analysis",
                      color=NEON_COLORS[4], fontsize=13, fontweight='bold', pad=12)
         ax6.grid(True, alpha=0.3, color=GRID_COLOR, linestyle='--', linewidth=1.5)
-        
-        # Add reference line for average
-        ax6.axhline(y=base_temp, color=NEON_COLORS[5], linestyle='--', 
-                   linewidth=2, alpha=0.7, label=f'Avg: {base_temp:.1f}K')
-        ax6.legend(loc='best', fontsize=9, facecolor=BG_COLOR, 
-                  edgecolor=GRID_COLOR, labelcolor=TEXT_COLOR)
-
-        self.draw()
\ No newline at end of file
+
+    # ------------------------------------------------------------ blitting
+
+    def _limits(self):
+        return tuple((ax.get_xlim(), ax.get_ylim()) for ax in self.fig.axes)
+
+    def _on_draw(self, event):
+        # A full draw just rendered the static layer; keep it and put the
+        # dynamic artists back on top.
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        self._drawn_limits = self._limits()
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self._animated:
+            if artist.get_visible():
+                self.fig.draw_artist(artist)
+
+    def refresh(self):
+        """Show the current artist data, blitting when the background is still valid."""
+        if self._background is None or self._limits() != self._drawn_limits:
+            self.draw_idle()
+            return
+        self.restore_region(self._background)
+        self._draw_animated()
+        self.blit(self.fig.bbox)
+
+    # ------------------------------------------------------------- updates
+
+    def update_dataset(self, dataset, chart_data=None):
+        self.dataset = dataset
+        self.chart_data = chart_data
+        self._update_pie(dataset.get("equipment_type_distribution") or {})
+        self._update_bars(dataset)
+        self._update_scatter(chart_data)
+        self._update_correlation(chart_data)
+        self._update_health(dataset)
+        self._update_temperature(dataset, chart_data)
+        self.refresh()
+
+    def _resize_pie(self, n):
+        while len(self.pie_wedges) > n:
+            for artist in (self.pie_wedges.pop(), self.pie_labels.pop(), self.pie_pcts.pop()):
+                artist.remove()
+                self._animated.remove(artist)
+        while len(self.pie_wedges) < n:
+            wedge = Wedge((0, 0), PIE_RADIUS, 0, 0, linewidth=0,
+                          path_effects=[patheffects.withSimplePatchShadow()])
+            self.ax1.add_patch(wedge)
+            self.pie_wedges.append(self._animate(wedge))
+            self.pie_labels.append(self._animate(self.ax1.text(
+                0, 0, '', color=TEXT_COLOR, fontsize=9, fontweight='bold', va='center')))
+            self.pie_pcts.append(self._animate(self.ax1.text(
+                0, 0, '', color='white', fontsize=5, fontweight='bold', ha='center', va='center')))
+
+    def _update_pie(self, distribution):
+        labels = list(distribution.keys())
+        sizes = np.array(list(distribution.values()), dtype=float)
+        self._resize_pie(len(labels))
+        total = sizes.sum() or 1.0
+
+        theta = PIE_START_ANGLE
+        for i, (label, size) in enumerate(zip(labels, sizes)):
+            theta2 = theta + 360.0 * size / total
+            mid = np.deg2rad((theta + theta2) / 2)
+            cos, sin = np.cos(mid), np.sin(mid)
+            center = (PIE_EXPLODE * cos, PIE_EXPLODE * sin)
+
+            wedge = self.pie_wedges[i]
+            wedge.set_center(center)
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta2)
+            wedge.set_facecolor(NEON_COLORS[i % len(NEON_COLORS)])
+
+            text = self.pie_labels[i]
+            text.set_position((center[0] + 1.1 * PIE_RADIUS * cos, center[1] + 1.1 * PIE_RADIUS * sin))
+            text.set_horizontalalignment('left' if cos >= 0 else 'right')
+            text.set_text(label)
+
+            pct = self.pie_pcts[i]
+            pct.set_position((center[0] + 0.6 * PIE_RADIUS * cos, center[1] + 0.6 * PIE_RADIUS * sin))
+            pct.set_text(f'{100.0 * size / total:.1f}%')
+            theta = theta2
+
+    def _update_bars(self, ds):
+        values = [ds.get(m, 0) or 0 for m in ("avg_flowrate", "avg_pressure", "avg_temperature")]
+        for bar, text, val in zip(self.bars, self.bar_texts, values):
+            bar.set_height(val)
+            text.set_y(val)
+            text.set_text(f'{val:.1f}')
+        self.ax2.set_ylim(*_nice_range(0, max(max(values), 1) * 1.15))
+
+    def _update_scatter(self, cd):
+        has_data = cd is not None and len(cd["scatter.x"]) > 0
+        for artist in (self.density, self.scatter, self.trend, self.scatter_legend):
+            artist.set_visible(has_data)
+        self.scatter_empty.set_visible(not has_data)
+        if not has_data:
+            return
+
+        x, y = cd["scatter.x"], cd["scatter.y"]
+        rows = int(cd["rows"])
+        self.scatter.set_offsets(np.column_stack([x, y]))
+        self.scatter_legend.get_texts()[0].set_text(f'{len(x):,} of {rows:,} rows')
+
+        x_edges, y_edges = cd["hist2d.x_edges"], cd["hist2d.y_edges"]
+        counts = np.ma.masked_equal(cd["hist2d.counts"].T, 0)
+        self.density.set_data(counts)
+        self.density.set_extent((x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]))
+        self.density.set_clim(1, max(int(counts.max() or 1), 1))
+        # Only worth drawing when the sample does not already show every row.
+        self.density.set_visible(rows > len(x))
+
+        if len(x) > 1 and np.ptp(x) > 0:
+            z = np.polyfit(x, y, 1)
+            x_line = np.array([x.min(), x.max()])
+            self.trend.set_data(x_line, np.poly1d(z)(x_line))
+        else:
+            self.trend.set_data([], [])
+
+        self.ax3.set_xlim(*_nice_range(x_edges[0], x_edges[-1]))
+        self.ax3.set_ylim(*_nice_range(y_edges[0], y_edges[-1]))
+
+    def _update_correlation(self, cd):
+        has_data = cd is not None
+        self.corr_image.set_visible(has_data)
+        self.corr_empty.set_visible(not has_data)
+        for row in self.corr_texts:
+            for text in row:
+                text.set_visible(has_data)
+        if not has_data:
+            return
+
+        corr = cd["correlation.matrix"]
+        self.corr_image.set_data(corr)
+        # Correlation values as text
+        for i, row in enumerate(self.corr_texts):
+            for j, text in enumerate(row):
+                text.set_text(f"{corr[i, j]:.2f}")
+                text.set_color('black' if abs(corr[i, j]) < 0.5 else 'white')
+
+    def _update_health(self, ds):
+        flagged = ds.get("anomaly_count")
+        total = ds.get("total_equipment")
+        if flagged is not None and total:
+            # Share of equipment with no reading flagged by the server's
+            # anomaly detection.
+            health = 100 * (1 - flagged / total)
+            label = f'{health:.2f}% ({flagged:,} flagged)'
+        else:
+            # Older servers: simple estimate from the averages.
+            flow = ds.get("avg_flowrate", 100)
+            pressure = ds.get("avg_pressure", 5)
+            temp = ds.get("avg_temperature", 300)
+            health = max(0, min(100, 100 - abs((flow - 100)/10) - abs((pressure - 5)*5) - abs((temp - 300)/5)))
+            label = f'{health:.1f}%'
+        self.health_bar.set_width(health)
+        self.health_text.set_x(health / 2)
+        self.health_text.set_text(label)
+
+    def _update_temperature(self, ds, cd):
+        has_data = cd is not None and len(cd["temperature.index"]) > 0
+        for artist in (self.temp_line, self.temp_fill, self.temp_avg, self.temp_legend):
+            artist.set_visible(has_data)
+        self.temp_empty.set_visible(not has_data)
+        if not has_data:
+            return
+
+        index, temps = cd["temperature.index"], cd["temperature.values"]
+        base_temp = ds.get("avg_temperature", 300)
+        self.temp_line.set_data(index, temps)
+        self.temp_fill.set_verts([np.concatenate([
+            np.column_stack([index, temps]),
+            [[index[-1], 0], [index[0], 0]],
+        ])])
+        self.temp_avg.set_ydata([base_temp, base_temp])
+        self.temp_legend.get_texts()[0].set_text(f'Avg: {base_temp:.1f}K')
+
+        self.ax6.set_xlim(*_nice_range(index[0], index[-1]))
+        self.ax6.set_ylim(*_nice_range(0, max(float(temps.max()), base_temp) * 1.08))
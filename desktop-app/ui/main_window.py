@@ -1,46 +1,107 @@
+import importlib
+import os
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel,
     QFileDialog, QTableWidget, QTableWidgetItem, QListWidget, QListWidgetItem,
-    QHBoxLayout, QFrame, QScrollArea, QSplitter, QInputDialog, QLineEdit, QMessageBox
+    QHBoxLayout, QFrame, QScrollArea, QSplitter, QInputDialog, QLineEdit, QMessageBox,
+    QTabWidget, QTableView, QHeaderView, QComboBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QPalette, QColor
-from ui.charts import ChartsCanvas
 
 # Updated Import to use the Class
-from services.api_client import ChemicalAPIClient
+from services.api_client import RESUMABLE_UPLOAD_SIZE, ChemicalAPIClient
+from services.cache import LocalCache
+from services.workers import WorkerPool
 
 class MainWindow(QWidget):
     def __init__(self):
         super().__init__()
-        # Initialize the API client
-        self.api = ChemicalAPIClient()
+        # Initialize the API client; responses are cached on disk between runs.
+        self.api = ChemicalAPIClient(cache=LocalCache())
+        # Network calls run here so the GUI thread never blocks on them.
+        self.workers = WorkerPool()
+        self.uploads = {}  # file path -> percent sent
+        self.history_request = 0
         
         self.setWindowTitle("Chemical Equipment Parameter Visualizer")
         self.setGeometry(50, 50, 1600, 950)
         self.dataset = None
         self.history = []
         
+        self.session_started = False
+        # Charts wait for the warm-up import of matplotlib (see start_session).
+        self.charts_loaded = False
+
         self.apply_theme()
         self.initUI()
-        
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Everything slow waits until the window has been painted once.
+        if not self.session_started:
+            self.session_started = True
+            QTimer.singleShot(0, self.start_session)
+
+    def start_session(self):
+        # Load matplotlib on a pool thread while the user logs in; charts of
+        # the cached state are drawn once it is in.
+        self.workers.start(
+            importlib.import_module, "ui.charts",
+            on_result=lambda _: self.on_charts_loaded(),
+            on_error=lambda _: self.on_charts_loaded(),
+        )
+        # Last known state first; the server revalidates it after login.
+        self.show_cached_state()
+
         # Authentication Trigger
-        if self.handle_login():
-            self.load_history()
-        else:
-            QMessageBox.critical(self, "Access Denied", "Valid login required to use this application.")
-            sys.exit()
+        self.handle_login()
+
+    def on_charts_loaded(self):
+        self.charts_loaded = True
+        if self.dataset:
+            self.show_charts()
 
     def handle_login(self):
-        """Simple popup to handle JWT Authentication"""
+        """Simple popup to handle JWT Authentication; the request runs on the pool."""
         user, ok1 = QInputDialog.getText(self, "Login", "Username:", QLineEdit.Normal)
-        if not ok1: return False
+        if not ok1: return self.on_login(False)
         
         pw, ok2 = QInputDialog.getText(self, "Login", "Password:", QLineEdit.Password)
-        if not ok2: return False
-        
-        return self.api.login(user, pw)
+        if not ok2: return self.on_login(False)
+
+        self.uploadBtn.setEnabled(False)
+        self.statusLabel.setText("CONNECTING | Logging in...")
+        self.statusLabel.setStyleSheet(self.STATUS_OK)
+        self.workers.start(
+            self.api.login, user, pw,
+            on_result=self.on_login,
+            on_error=lambda _: self.on_login(False),
+        )
+
+    def on_login(self, ok):
+        if ok:
+            self.uploadBtn.setEnabled(True)
+            self.statusLabel.setText("Ready to analyze | Upload CSV file with equipment data")
+            self.load_history()
+        elif self.api.offline and self.history:
+            self.go_offline()
+        else:
+            QMessageBox.critical(self, "Access Denied", "Valid login required to use this application.")
+            self.close()
+            QApplication.quit()
+
+    def show_cached_state(self):
+        history = self.api.cached_history()
+        if history:
+            self.on_history(self.history_request, history)
+
+    def go_offline(self):
+        """Server unreachable: keep showing cached data, read-only."""
+        self.uploadBtn.setEnabled(False)
+        self.statusLabel.setText("OFFLINE | Server unreachable, showing data cached from the last session")
+        self.statusLabel.setStyleSheet(self.STATUS_ERROR)
 
     def apply_theme(self):
         """Apply chemical engineering neon theme"""
@@ -125,7 +186,7 @@ class MainWindow(QWidget):
                 border-bottom: 2px solid #00e5ff;
             }
             
-            QTableWidget {
+            QTableView {
                 background: rgba(10, 14, 39, 0.7);
                 border: 2px solid rgba(0, 229, 255, 0.3);
                 border-radius: 8px;
@@ -135,18 +196,18 @@ class MainWindow(QWidget):
                 selection-background-color: rgba(0, 229, 255, 0.3);
             }
             
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid rgba(124, 77, 255, 0.15);
             }
             
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: rgba(0, 229, 255, 0.25);
                 color: #ffffff;
                 border: 1px solid #00e5ff;
             }
             
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background: rgba(124, 77, 255, 0.15);
             }
             
@@ -252,6 +313,32 @@ class MainWindow(QWidget):
                 padding: 12px;
             }
             
+            QTabWidget::pane {
+                border: none;
+            }
+
+            QTabBar::tab {
+                background: rgba(26, 31, 58, 0.8);
+                color: #7c4dff;
+                padding: 6px 18px;
+                min-width: 90px;
+                font-weight: bold;
+                border-bottom: 2px solid transparent;
+            }
+
+            QTabBar::tab:selected {
+                color: #00e5ff;
+                border-bottom: 2px solid #00e5ff;
+            }
+
+            QComboBox {
+                background: rgba(10, 14, 39, 0.7);
+                border: 1px solid rgba(0, 229, 255, 0.3);
+                border-radius: 6px;
+                padding: 4px 8px;
+                color: #e0e6ed;
+            }
+
             QSplitter::handle {
                 background: rgba(0, 229, 255, 0.2);
                 width: 2px;
@@ -366,9 +453,38 @@ class MainWindow(QWidget):
         self.chartContainer.setLayout(self.chartContainerLayout)
         
         self.scrollArea.setWidget(self.chartContainer)
-        self.chartLayout.addWidget(self.scrollArea)
-        
+
+        # RECORDS: every row of the dataset, paged in as the table scrolls
+        recordsTab = QWidget()
+        recordsLayout = QVBoxLayout()
+        recordsLayout.setContentsMargins(0, 6, 0, 0)
+        recordsLayout.setSpacing(4)
+
+        filterLayout = QHBoxLayout()
+        filterLayout.addWidget(QLabel("TYPE"))
+        self.typeFilter = QComboBox()
+        self.typeFilter.addItem("All types")
+        self.typeFilter.currentIndexChanged.connect(self.filter_records)
+        filterLayout.addWidget(self.typeFilter)
+        filterLayout.addStretch()
+        recordsLayout.addLayout(filterLayout)
+
+        self.recordsView = QTableView()
+        self.recordsView.setShowGrid(True)
+        self.recordsView.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Fixed row heights: the view never measures rows it doesn't show.
+        self.recordsView.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        recordsLayout.addWidget(self.recordsView)
+        recordsTab.setLayout(recordsLayout)
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.scrollArea, "CHARTS")
+        self.tabs.addTab(recordsTab, "RECORDS")
+        self.tabs.currentChanged.connect(lambda _: self.show_records())
+        self.chartLayout.addWidget(self.tabs)
+
         self.canvas = None
+        self.records = None
         self.chartFrame.setLayout(self.chartLayout)
         
         main_layout.addWidget(self.chartFrame, stretch=10) 
@@ -388,43 +504,83 @@ class MainWindow(QWidget):
 
         self.setLayout(main_layout)
 
+    STATUS_OK = """
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+            stop:0 rgba(0, 197, 131, 0.3), stop:1 rgba(0, 229, 255, 0.2));
+        border-radius: 6px;
+        border-left: 4px solid #00c853;
+        padding: 10px;
+        font-size: 12px;
+        color: #00e5ff;
+        font-weight: 600;
+    """
+    STATUS_ERROR = """
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+            stop:0 rgba(255, 82, 82, 0.3), stop:1 rgba(255, 64, 129, 0.2));
+        border-radius: 6px;
+        border-left: 4px solid #ff5252;
+        padding: 10px;
+        font-size: 12px;
+        color: #ff4081;
+        font-weight: 600;
+    """
+
     def upload_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select CSV Dataset", "", "CSV Files (*.csv);;All Files (*)")
-        if file_path:
-            try:
-                # Updated to use self.api
-                self.dataset = self.api.upload_csv(file_path)
-                filename = file_path.split('/')[-1]
-                
-                total_eq = self.dataset.get('total_equipment', 0)
-                self.statusLabel.setText(f"SUCCESS | Dataset '{filename}' uploaded | {total_eq} entries processed")
-                self.statusLabel.setStyleSheet("""
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                        stop:0 rgba(0, 197, 131, 0.3), stop:1 rgba(0, 229, 255, 0.2));
-                    border-radius: 6px;
-                    border-left: 4px solid #00c853;
-                    padding: 10px;
-                    font-size: 12px;
-                    color: #00e5ff;
-                    font-weight: 600;
-                """)
-                
-                self.show_summary()
-                self.show_charts()
-                self.load_history()
-                
-            except Exception as e:
-                self.statusLabel.setText(f"ERROR | Upload failed: {str(e)}")
-                self.statusLabel.setStyleSheet("""
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                        stop:0 rgba(255, 82, 82, 0.3), stop:1 rgba(255, 64, 129, 0.2));
-                    border-radius: 6px;
-                    border-left: 4px solid #ff5252;
-                    padding: 10px;
-                    font-size: 12px;
-                    color: #ff4081;
-                    font-weight: 600;
-                """)
+        # Several files may be picked; each streams on its own pool thread.
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select CSV Dataset", "", "CSV Files (*.csv);;All Files (*)")
+        for file_path in file_paths:
+            filename = os.path.basename(file_path)
+            self.uploads[file_path] = 0
+            # Large files go in resumable chunks so a dropped connection
+            # doesn't mean sending everything again.
+            if os.path.getsize(file_path) > RESUMABLE_UPLOAD_SIZE:
+                upload = self.api.upload_csv_resumable
+            else:
+                upload = self.api.upload_csv
+            self.workers.start(
+                upload, file_path,
+                on_progress=lambda done, total, path=file_path: self.on_upload_progress(path, done, total),
+                on_result=lambda result, path=file_path: self.on_upload_finished(path, result),
+                on_error=lambda message, path=file_path: self.on_upload_failed(path, message),
+            )
+        if file_paths:
+            self.show_upload_progress()
+
+    def show_upload_progress(self):
+        if not self.uploads:
+            return
+        parts = [f"{os.path.basename(path)} {percent}%" for path, percent in self.uploads.items()]
+        self.statusLabel.setText("UPLOADING | " + " | ".join(parts))
+        self.statusLabel.setStyleSheet(self.STATUS_OK)
+
+    def on_upload_progress(self, file_path, done, total):
+        percent = int(100 * done / total) if total else 100
+        if file_path in self.uploads and percent != self.uploads[file_path]:
+            self.uploads[file_path] = percent
+            self.show_upload_progress()
+
+    def on_upload_finished(self, file_path, result):
+        if not isinstance(result, dict):
+            # The client reports HTTP errors as text.
+            self.on_upload_failed(file_path, str(result))
+            return
+        self.uploads.pop(file_path, None)
+        self.dataset = result
+        filename = os.path.basename(file_path)
+
+        total_eq = self.dataset.get('total_equipment', 0)
+        self.statusLabel.setText(f"SUCCESS | Dataset '{filename}' uploaded | {total_eq} entries processed")
+        self.statusLabel.setStyleSheet(self.STATUS_OK)
+
+        self.show_summary()
+        self.show_charts()
+        self.show_records()
+        self.load_history()
+
+    def on_upload_failed(self, file_path, message):
+        self.uploads.pop(file_path, None)
+        self.statusLabel.setText(f"ERROR | Upload of '{os.path.basename(file_path)}' failed: {message}")
+        self.statusLabel.setStyleSheet(self.STATUS_ERROR)
 
     def show_summary(self):
         if not self.dataset:
@@ -457,41 +613,106 @@ class MainWindow(QWidget):
         self.table.resizeColumnsToContents()
 
     def show_charts(self):
-        if self.canvas:
-            self.chartContainerLayout.removeWidget(self.canvas)
-            self.canvas.deleteLater()
-        
-        self.canvas = ChartsCanvas(self.dataset)
-        self.chartContainerLayout.addWidget(self.canvas)
+        if not self.charts_loaded:
+            return  # on_charts_loaded draws them
+        # One canvas for the window's lifetime; new datasets only update its artists.
+        if self.canvas is None:
+            # matplotlib and NumPy load on a pool thread in start_session;
+            # this only picks the module up (or raises its import error).
+            from ui.charts import ChartsCanvas
+            self.canvas = ChartsCanvas()
+            self.chartContainerLayout.addWidget(self.canvas)
+        # Summary panels (and cached arrays) right away, fresh arrays once they arrive.
+        dataset_id = self.dataset.get("id")
+        cached = self.api.cached_chart_data(dataset_id) if dataset_id is not None else None
+        self.canvas.update_dataset(self.dataset, cached)
+
+        if dataset_id is not None and self.api.access_token:
+            self.workers.start(
+                self.api.fetch_chart_data, dataset_id,
+                on_result=lambda chart_data: self.on_chart_data(dataset_id, chart_data),
+            )
+
+    def show_records(self):
+        """Point the records table at the shown dataset, once its tab is opened."""
+        if not self.dataset or self.tabs.currentIndex() != 1 or not self.api.access_token:
+            return
+        if self.records is None:
+            # NumPy loads with the first table, not at startup.
+            from ui.records_model import RecordTableModel
+            self.records = RecordTableModel(self.api, self.workers, parent=self)
+            self.records.failed.connect(self.on_records_failed)
+            self.recordsView.setModel(self.records)
+            self.recordsView.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            self.recordsView.setSortingEnabled(True)
+
+        dataset_id = self.dataset.get("id")
+        if self.records.dataset_id != dataset_id:
+            types = sorted(self.dataset.get("equipment_type_distribution") or {})
+            self.typeFilter.blockSignals(True)
+            self.typeFilter.clear()
+            self.typeFilter.addItems(["All types", *types])
+            self.typeFilter.blockSignals(False)
+            self.records.filters = {}
+            self.records.set_dataset(dataset_id)
+
+    def filter_records(self, index):
+        if self.records is not None:
+            self.records.set_filter(types=[self.typeFilter.currentText()] if index > 0 else None)
+
+    def on_records_failed(self, message):
+        self.statusLabel.setText(f"ERROR | Unable to load records: {message}")
+        self.statusLabel.setStyleSheet(self.STATUS_ERROR)
+
+    def on_chart_data(self, dataset_id, chart_data):
+        # Ignore answers for a dataset that is no longer shown.
+        if self.dataset and self.dataset.get("id") == dataset_id and chart_data is not None:
+            self.canvas.update_dataset(self.dataset, chart_data)
 
     def load_history(self):
-        try:
-            # Updated to use self.api
-            self.history = self.api.fetch_history()
-            self.timeline.clear()
-            
-            if not self.history:
-                placeholder = QListWidgetItem("[EMPTY] No upload history available yet")
-                placeholder.setForeground(QColor("#7c4dff"))
-                self.timeline.addItem(placeholder)
-            else:
-                for d in self.history:
-                    timestamp = d.get('uploaded_at', 'Unknown time')
-                    filename = d.get('filename', 'Unknown file')
-                    
-                    item = QListWidgetItem(f"[FILE] {filename}")
-                    item.setFont(QFont("Segoe UI", 9))
-                    self.timeline.addItem(item)
-                    
-                    time_item = QListWidgetItem(f"      [TIME] {timestamp}")
-                    time_item.setForeground(QColor("#7c4dff"))
-                    time_item.setFont(QFont("Segoe UI", 8))
-                    self.timeline.addItem(time_item)
-                    
-        except Exception as e:
-            error_item = QListWidgetItem(f"[ERROR] Unable to fetch history: {str(e)}")
+        self.history_request += 1
+        request = self.history_request
+        self.workers.start(
+            self.api.fetch_history,
+            on_result=lambda history: self.on_history(request, history),
+            on_error=lambda message: self.on_history(request, message),
+        )
+
+    def on_history(self, request, history):
+        if request != self.history_request:
+            return  # a newer refresh is in flight
+        self.timeline.clear()
+        if not isinstance(history, list):
+            error_item = QListWidgetItem(f"[ERROR] Unable to fetch history: {history}")
             error_item.setForeground(QColor("#ff5252"))
             self.timeline.addItem(error_item)
+            return
+
+        self.history = history
+        if not self.history:
+            placeholder = QListWidgetItem("[EMPTY] No upload history available yet")
+            placeholder.setForeground(QColor("#7c4dff"))
+            self.timeline.addItem(placeholder)
+        else:
+            for d in self.history:
+                timestamp = d.get('uploaded_at', 'Unknown time')
+                filename = d.get('filename', 'Unknown file')
+
+                item = QListWidgetItem(f"[FILE] {filename}")
+                item.setFont(QFont("Segoe UI", 9))
+                self.timeline.addItem(item)
+
+                time_item = QListWidgetItem(f"      [TIME] {timestamp}")
+                time_item.setForeground(QColor("#7c4dff"))
+                time_item.setFont(QFont("Segoe UI", 8))
+                self.timeline.addItem(time_item)
+
+            # Nothing on screen yet: show the most recent dataset.
+            if self.dataset is None:
+                self.dataset = self.history[0]
+                self.show_summary()
+                self.show_charts()
+                self.show_records()
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,186 @@
+"""Table model over a dataset's per-row records, paged in from the server.
+
+Rows are fetched a page at a time from ``/records/`` as the view scrolls
+(``canFetchMore``/``fetchMore``) and held as NumPy columns. Only the
+``max_pages`` most recently used pages are kept; a dropped page is fetched
+again by the cursor it was first loaded from, so memory stays flat however
+far the user scrolls. Sorting and filtering run on the server against its
+indexes: changing either resets the model and pages in the new order.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+COLUMNS = (
+    ("name", "NAME"),
+    ("type", "TYPE"),
+    ("flowrate", "FLOWRATE"),
+    ("pressure", "PRESSURE"),
+    ("temperature", "TEMPERATURE"),
+)
+METRICS = ("flowrate", "pressure", "temperature")
+
+PAGE_SIZE = 1000
+MAX_PAGES = 32
+
+
+def page_columns(results):
+    """One page of record dicts as NumPy columns (NaN for missing readings)."""
+    columns = {name: np.array([r[name] for r in results], dtype=str) for name in ("name", "type")}
+    for name in METRICS:
+        columns[name] = np.array(
+            [np.nan if r[name] is None else r[name] for r in results], dtype=np.float64
+        )
+    return columns
+
+
+class RecordTableModel(QAbstractTableModel):
+    # A page could not be loaded; paging stops until the next reset.
+    failed = pyqtSignal(str)
+
+    def __init__(self, api, workers, page_size=PAGE_SIZE, max_pages=MAX_PAGES, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.workers = workers
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.dataset_id = None
+        self.ordering = "id"
+        self.filters = {}
+        self.generation = 0
+        self._clear()
+
+    def _clear(self):
+        # Answers from before a reset carry an older generation and are dropped.
+        self.generation += 1
+        self.pages = OrderedDict()  # page number -> columns, least recently used first
+        self.page_urls = []         # page number -> URL it was loaded from (None: first page)
+        self.next_url = None
+        self.rows = 0
+        self.loading = set()        # page numbers in flight
+        self.done = self.dataset_id is None
+        self.error = None
+
+    def reload(self):
+        self.beginResetModel()
+        self._clear()
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def set_dataset(self, dataset_id):
+        self.dataset_id = dataset_id
+        self.reload()
+
+    def set_filter(self, types=None, **ranges):
+        """Keep only ``types`` and rows within bounds such as ``pressure__gte=5``."""
+        filters = {name: value for name, value in ranges.items() if value is not None}
+        if types:
+            filters["type"] = ",".join(types)
+        if filters != self.filters:
+            self.filters = filters
+            self.reload()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Name and type have no server-side index to sort on; they fall back
+        # to file order.
+        field = COLUMNS[column][0] if 0 <= column < len(COLUMNS) else "id"
+        if field not in METRICS:
+            field = "id"
+        ordering = f"-{field}" if order == Qt.DescendingOrder else field
+        if ordering != self.ordering:
+            self.ordering = ordering
+            self.reload()
+
+    def query(self):
+        return {"page_size": self.page_size, "ordering": self.ordering, **self.filters}
+
+    # Paging
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not (self.done or self.error) and len(self.page_urls) not in self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._fetch(len(self.page_urls), self.next_url)
+
+    def _fetch(self, page, url):
+        generation = self.generation
+        self.loading.add(page)
+        self.workers.start(
+            self.api.fetch_records, self.dataset_id, self.query(), url=url,
+            on_result=lambda body: self._on_page(generation, page, url, body),
+            on_error=lambda message: self._on_error(generation, page, message),
+        )
+
+    def _on_page(self, generation, page, url, body):
+        if generation != self.generation:
+            return
+        self.loading.discard(page)
+        columns = page_columns(body["results"])
+        count = len(body["results"])
+        self._keep(page, columns)
+
+        if page == len(self.page_urls):
+            self.page_urls.append(url)
+            self.next_url = body["next"]
+            self.done = self.next_url is None
+            if count:
+                self.beginInsertRows(QModelIndex(), self.rows, self.rows + count - 1)
+                self.rows += count
+                self.endInsertRows()
+        elif count:
+            first = page * self.page_size
+            self.dataChanged.emit(self.index(first, 0), self.index(first + count - 1, len(COLUMNS) - 1))
+
+    def _on_error(self, generation, page, message):
+        if generation != self.generation:
+            return
+        self.loading.discard(page)
+        self.error = message
+        self.failed.emit(message)
+
+    def _keep(self, page, columns):
+        self.pages[page] = columns
+        self.pages.move_to_end(page)
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+
+    # QAbstractTableModel
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return COLUMNS[section][1] if orientation == Qt.Horizontal else section + 1
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        field = COLUMNS[index.column()][0]
+        if role == Qt.TextAlignmentRole:
+            return int((Qt.AlignRight if field in METRICS else Qt.AlignLeft) | Qt.AlignVCenter)
+        if role != Qt.DisplayRole:
+            return None
+
+        page, offset = divmod(index.row(), self.page_size)
+        columns = self.pages.get(page)
+        if columns is None:
+            # Dropped to save memory and scrolled back into view.
+            if page not in self.loading and not self.error:
+                self._fetch(page, self.page_urls[page])
+            return "…" if index.column() == 0 else None
+        self.pages.move_to_end(page)
+
+        values = columns[field]
+        if offset >= len(values):
+            return None
+        value = values[offset]
+        if field in METRICS:
+            return "" if np.isnan(value) else f"{value:g}"
+        return str(value)
@@ -1,4 +1,4 @@
-import React, { useState, useMemo } from "react";
+import React, { useState, useEffect } from "react";
 import {
   PieChart,
   Pie,
@@ -11,11 +11,23 @@ import {
   ResponsiveContainer,
   ScatterChart,
   Scatter,
+  ZAxis,
+  LineChart,
+  Line,
   CartesianGrid,
   Sector,
 } from "recharts";
 
 import HeatmapChart from "./HeatmapChart";
+import { getChartData } from "../services/api";
+
+/* ---------- SERVER-SIDE DOWNSAMPLING TARGETS ---------- */
+// Density cells per axis for the scatter, and points for the LTTB line;
+// both keep payloads and render times flat regardless of dataset size.
+const DENSITY_BINS = 40;
+const SERIES_POINTS = 400;
+
+const zip = ({ x, y, count }) => x.map((xi, i) => ({ x: xi, y: y[i], count: count[i] }));
 
 /* ---------- COLORS ---------- */
 const COLORS = [
@@ -150,14 +162,32 @@ function Charts({ dataset }) {
     { name: "Temperature", value: dataset.avg_temperature },
   ];
 
-  const scatterData = useMemo(
-    () =>
-      Array.from({ length: dataset.total_equipment }).map(() => ({
-        x: dataset.avg_flowrate + Math.random() * 30 - 15,
-        y: dataset.avg_pressure + Math.random() * 4 - 2,
-      })),
-    [dataset]
-  );
+  const [chartData, setChartData] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    setChartData(null);
+    getChartData(dataset.id, {
+      charts: "density,temperature",
+      bins: DENSITY_BINS,
+      points: SERIES_POINTS,
+    })
+      .then((response) => {
+        if (!cancelled) setChartData(response.data);
+      })
+      .catch((err) => console.error("Chart data error:", err));
+    return () => {
+      cancelled = true;
+    };
+  }, [dataset.id]);
+
+  const scatterData = chartData ? zip(chartData.density) : [];
+  const temperatureData = chartData
+    ? chartData.temperature.index.map((row, i) => ({
+        row,
+        temperature: chartData.temperature.values[i],
+      }))
+    : [];
 
   const [activeIndex, setActiveIndex] = useState(null);
 
@@ -215,14 +245,35 @@ function Charts({ dataset }) {
         <ResponsiveContainer width="100%" height={280}>
           <ScatterChart>
             <CartesianGrid stroke="rgba(255,255,255,0.05)" />
-            <XAxis dataKey="x" stroke="#aaa" />
-            <YAxis dataKey="y" stroke="#aaa" />
+            <XAxis dataKey="x" type="number" name="Flowrate" domain={["auto", "auto"]} stroke="#aaa" />
+            <YAxis dataKey="y" type="number" name="Pressure" domain={["auto", "auto"]} stroke="#aaa" />
+            {/* Each point is a density cell; its size is the row count. */}
+            <ZAxis dataKey="count" name="Rows" range={[20, 220]} />
             <Tooltip content={<NeonTooltip />} />
-            <Scatter data={scatterData} fill="#00e5ff" />
+            <Scatter data={scatterData} fill="#00e5ff" fillOpacity={0.7} isAnimationActive={false} />
           </ScatterChart>
         </ResponsiveContainer>
       </GlassCard>
 
+      {/* LINE */}
+      <GlassCard title="Temperature Trend">
+        <ResponsiveContainer width="100%" height={280}>
+          <LineChart data={temperatureData}>
+            <CartesianGrid stroke="rgba(255,255,255,0.05)" />
+            <XAxis dataKey="row" type="number" domain={["dataMin", "dataMax"]} stroke="#aaa" />
+            <YAxis domain={["auto", "auto"]} stroke="#aaa" />
+            <Tooltip content={<NeonTooltip />} />
+            <Line
+              dataKey="temperature"
+              stroke="#ffab00"
+              strokeWidth={2}
+              dot={false}
+              isAnimationActive={false}
+            />
+          </LineChart>
+        </ResponsiveContainer>
+      </GlassCard>
+
       {/* VERTICAL BAR */}
       <GlassCard title="Equipment Count by Type">
         <ResponsiveContainer width="100%" height={280}>
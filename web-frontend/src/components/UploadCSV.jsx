@@ -1,9 +1,11 @@
 import React, { useState } from "react";
 import axios from "axios";
 import { useNavigate } from "react-router-dom";
+import { RESUMABLE_UPLOAD_SIZE, uploadCSVResumable } from "../services/api";
 
 const UploadCSV = ({ onUploadSuccess, token }) => {
   const [file, setFile] = useState(null);
+  const [progress, setProgress] = useState(null);
   const navigate = useNavigate();
 
   const handleFileChange = (e) => {
@@ -14,19 +16,27 @@ const UploadCSV = ({ onUploadSuccess, token }) => {
     if (!file) return alert("Please select a CSV file");
 
     try {
-      const formData = new FormData();
-      formData.append("file", file);
+      let response;
+      if (file.size > RESUMABLE_UPLOAD_SIZE) {
+        // Chunked, so a failed upload resumes where it stopped when retried.
+        response = await uploadCSVResumable(file, token, {
+          onProgress: (sent, total) => setProgress(Math.round((100 * sent) / total)),
+        });
+      } else {
+        const formData = new FormData();
+        formData.append("file", file);
 
-      const response = await axios.post(
-        "http://127.0.0.1:8000/api/upload/",
-        formData,
-        {
-          headers: {
-            "Content-Type": "multipart/form-data",
-            Authorization: `Bearer ${token}`, // 🔥 send JWT token
-          },
-        }
-      );
+        response = await axios.post(
+          "http://127.0.0.1:8000/api/upload/",
+          formData,
+          {
+            headers: {
+              "Content-Type": "multipart/form-data",
+              Authorization: `Bearer ${token}`, // 🔥 send JWT token
+            },
+          }
+        );
+      }
 
       // Call parent callback to update dashboard
       if (onUploadSuccess) onUploadSuccess(response.data);
@@ -38,6 +48,8 @@ const UploadCSV = ({ onUploadSuccess, token }) => {
       alert(
         error.response?.data?.error || "Upload failed! Check console for details."
       );
+    } finally {
+      setProgress(null);
     }
   };
 
@@ -70,6 +82,10 @@ const UploadCSV = ({ onUploadSuccess, token }) => {
         />
       </div>
 
+      {progress !== null && (
+        <p style={{ color: "#00e5ff" }}>Uploading… {progress}%</p>
+      )}
+
       <button
         onClick={handleUpload}
         style={{
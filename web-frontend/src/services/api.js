@@ -21,15 +21,124 @@ export const uploadCSV = (file, token) => {
   });
 };
 
+// ---- Resumable uploads ----
+// Large files are sent in numbered chunks through /api/uploads/. The session
+// id is kept in localStorage per file, so after a failure (or a page reload)
+// uploading the same file again only sends the chunks the server is missing.
+export const RESUMABLE_UPLOAD_SIZE = 32 * 1024 * 1024;
+const CHUNK_CONCURRENCY = 4;
+// SubtleCrypto can't hash incrementally, so the whole-file checksum means
+// reading the file into memory once; larger files rely on chunk checksums.
+const WHOLE_FILE_DIGEST_LIMIT = 512 * 1024 * 1024;
+const SESSIONS_KEY = "uploadSessions";
+
+const fileKey = (file) => `${file.name}:${file.size}:${file.lastModified}`;
+
+const savedSessions = () => JSON.parse(localStorage.getItem(SESSIONS_KEY) || "{}");
+
+const rememberSession = (file, id) => {
+  const sessions = savedSessions();
+  if (id == null) delete sessions[fileKey(file)];
+  else sessions[fileKey(file)] = id;
+  localStorage.setItem(SESSIONS_KEY, JSON.stringify(sessions));
+};
+
+// SubtleCrypto only exists in secure contexts (https or localhost).
+const sha256Hex = async (buffer) => {
+  if (!window.crypto?.subtle) return null;
+  const digest = await window.crypto.subtle.digest("SHA-256", buffer);
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+};
+
+const openUploadSession = async (file, headers, chunkSize) => {
+  const saved = savedSessions()[fileKey(file)];
+  if (saved != null) {
+    try {
+      const { data } = await axios.get(`${API_URL}uploads/${saved}/`, { headers });
+      if (data.status === "open") return data;
+    } catch (error) {
+      if (error.response?.status !== 404) throw error;
+    }
+  }
+  // With the file's checksum the server verifies the assembled upload, and
+  // resumes an open session for the same content started elsewhere.
+  const sha256 =
+    file.size <= WHOLE_FILE_DIGEST_LIMIT ? await sha256Hex(await file.arrayBuffer()) : null;
+  const { data } = await axios.post(
+    `${API_URL}uploads/`,
+    { filename: file.name, size: file.size, chunk_size: chunkSize, ...(sha256 && { sha256 }) },
+    { headers }
+  );
+  rememberSession(file, data.id);
+  return data;
+};
+
+// Upload a CSV in chunks, `concurrency` at a time. Resolves like uploadCSV
+// (the dataset, or a job for async ingestion); onProgress(sent, total).
+export const uploadCSVResumable = async (
+  file,
+  token,
+  { chunkSize, concurrency = CHUNK_CONCURRENCY, onProgress } = {}
+) => {
+  const headers = { Authorization: `Bearer ${token}` };
+  const session = await openUploadSession(file, headers, chunkSize);
+  const received = new Set(session.received);
+  const chunkBytes = (index) => Math.min(session.chunk_size, file.size - index * session.chunk_size);
+
+  const queue = [];
+  for (let index = 0; index < session.chunks; index++) {
+    if (!received.has(index)) queue.push(index);
+  }
+  let sent = file.size - queue.reduce((sum, index) => sum + chunkBytes(index), 0);
+  if (onProgress) onProgress(sent, file.size);
+
+  const sendChunk = async (index) => {
+    const start = index * session.chunk_size;
+    const buffer = await file.slice(start, start + session.chunk_size).arrayBuffer();
+    const checksum = await sha256Hex(buffer);
+    await axios.put(`${API_URL}uploads/${session.id}/chunks/${index}/`, buffer, {
+      headers: {
+        ...headers,
+        "Content-Type": "application/octet-stream",
+        ...(checksum && { "X-Chunk-SHA256": checksum }),
+      },
+    });
+    sent += buffer.byteLength;
+    if (onProgress) onProgress(sent, file.size);
+  };
+
+  // A few workers drain the shared queue of missing chunks.
+  const worker = async () => {
+    while (queue.length) await sendChunk(queue.shift());
+  };
+  await Promise.all(Array.from({ length: Math.min(concurrency, queue.length) }, worker));
+
+  const response = await axios.post(`${API_URL}uploads/${session.id}/complete/`, null, { headers });
+  rememberSession(file, null);
+  return response;
+};
+
 // Get history - Modified to accept token from App.js
+// The dashboard reads the type distribution of the latest dataset, which the
+// history endpoint only includes on request.
 export const getHistory = (token) => {
   return axios.get(`${API_URL}history/`, {
+    params: { include: "distribution" },
     headers: {
       Authorization: `Bearer ${token}`,
     },
   });
 };
 
+// Get plot-ready arrays for one dataset. The server reduces them to the
+// requested sizes, e.g. { charts: "density,temperature", points: 400, bins: 40 }
+export const getChartData = (datasetId, params = {}) => {
+  return axios.get(`${API_URL}datasets/${datasetId}/chart-data/`, {
+    params,
+    headers: getAuthHeader(),
+  });
+};
+
 // Login to get tokens
 export const login = (username, password) => {
   return axios.post(`${API_URL}token/`, { username, password });